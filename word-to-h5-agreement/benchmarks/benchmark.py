@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Word转H5转换流程基准测试
+用 python-docx 生成不同规模的合成协议文档，分阶段计时并统计吞吐量和内存峰值
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import tempfile
+import subprocess
+import importlib.util
+from pathlib import Path
+
+# 设置UTF-8输出编码（Windows兼容）
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+CONVERTER_PATH = Path(__file__).resolve().parent.parent / 'scripts' / 'convert-docx.py'
+
+# 预设规模：段落数、表格数、表格行列数、超链接密度（含超链接段落的比例）
+SIZES = {
+    'small': {'paragraphs': 200, 'tables': 2, 'rows': 10, 'cols': 4, 'link_density': 0.05},
+    'medium': {'paragraphs': 2000, 'tables': 10, 'rows': 50, 'cols': 5, 'link_density': 0.1},
+    'large': {'paragraphs': 10000, 'tables': 20, 'rows': 200, 'cols': 6, 'link_density': 0.1},
+    'xlarge': {'paragraphs': 30000, 'tables': 5, 'rows': 3000, 'cols': 6, 'link_density': 0.2},
+}
+
+# 按顺序计时的阶段
+STAGES = ('docx_load', 'extract_title_and_date', 'extract_text_from_docx',
+          'fix_heading_numbers', 'generate_html')
+
+SENTENCES = (
+    '我们会按照法律法规要求，采取相应的安全保护措施保护您的个人信息',
+    '为向您提供服务，我们需要收集您的设备信息、日志信息',
+    '您可以通过本政策载明的方式联系我们行使访问、更正、删除等权利',
+    '未经您的同意，我们不会向第三方共享您的个人信息',
+    '如您为未满十四周岁的未成年人，请在监护人的陪同下阅读本政策',
+)
+
+CHINESE_NUMS = '一二三四五六七八九十'
+
+def load_converter():
+    """加载 convert-docx.py（文件名含连字符，无法直接 import）"""
+    spec = importlib.util.spec_from_file_location('convert_docx', CONVERTER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.load_dependencies()
+    return module
+
+def _add_hyperlink(paragraph, text, url):
+    """在段落末尾添加外部超链接"""
+    from docx.opc.constants import RELATIONSHIP_TYPE as RT
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
+    r_id = paragraph.part.relate_to(url, RT.HYPERLINK, is_external=True)
+    hyperlink = OxmlElement('w:hyperlink')
+    hyperlink.set(qn('r:id'), r_id)
+    run = OxmlElement('w:r')
+    t = OxmlElement('w:t')
+    t.text = text
+    run.append(t)
+    hyperlink.append(run)
+    paragraph._p.append(hyperlink)
+
+def _add_table(doc, rows, cols, rng):
+    """添加表格，首行加粗作为表头，偶尔合并单元格"""
+    from docx.table import _Cell
+
+    table = doc.add_table(rows=rows, cols=cols)
+    # 直接遍历 w:tr/w:tc 填充，避免 row.cells 每次重建整个网格
+    for r_idx, tr in enumerate(table._tbl.tr_lst):
+        for c_idx, tc in enumerate(tr.tc_lst):
+            cell = _Cell(tc, table)
+            cell.text = f'第{r_idx}行第{c_idx}列' if r_idx else f'字段{c_idx}'
+            if r_idx == 0:
+                cell.paragraphs[0].runs[0].bold = True
+    if rows > 3 and cols > 2 and rng.random() < 0.5:
+        table.cell(1, 0).merge(table.cell(1, 1))
+        table.cell(2, cols - 1).merge(table.cell(3, cols - 1))
+    return table
+
+def generate_document(path, paragraphs, tables, rows, cols, link_density, seed=0):
+    """
+    生成合成协议文档
+
+    标题混合使用样式（Heading 1-3、List Paragraph）和文本序号（一、/1./2.1/1、），
+    正文段落包含加粗、斜体、下划线和超链接。
+    """
+    from docx import Document
+
+    rng = random.Random(seed)
+    doc = Document()
+    doc.add_paragraph('隐私政策')
+    doc.add_paragraph('生效日期：2026年1月1日')
+
+    table_every = paragraphs // (tables + 1) if tables else 0
+    section = 0
+    for i in range(paragraphs):
+        kind = rng.random()
+        if kind < 0.04:
+            section += 1
+            doc.add_paragraph(f'{section}. 第{section}部分')
+        elif kind < 0.06:
+            doc.add_paragraph(f'{CHINESE_NUMS[section % 10]}、信息的使用')
+        elif kind < 0.09:
+            doc.add_paragraph(f'{section}.{i % 9 + 1} 子标题')
+        elif kind < 0.11:
+            doc.add_paragraph(f'{i % 9 + 1}、列表标题')
+        elif kind < 0.13:
+            doc.add_heading(f'样式标题{i}', level=rng.randint(1, 3))
+        elif kind < 0.15:
+            doc.add_paragraph(f'列表段落{i}', style='List Paragraph')
+        else:
+            p = doc.add_paragraph(rng.choice(SENTENCES) + '，')
+            run = p.add_run(rng.choice(SENTENCES))
+            run.bold = rng.random() < 0.3
+            run.italic = rng.random() < 0.1
+            run.underline = rng.random() < 0.1
+            p.add_run('。')
+            if rng.random() < link_density:
+                _add_hyperlink(p, 'privacy@example.com', 'mailto:privacy@example.com')
+
+        if table_every and (i + 1) % table_every == 0 and i // table_every < tables:
+            _add_table(doc, rows, cols, rng)
+
+    doc.save(path)
+
+def ensure_corpus(corpus_dir, size_names, seed):
+    """生成（或复用已生成的）合成文档，返回 {规模名称: 文件路径}"""
+    corpus_dir = Path(corpus_dir)
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for name in size_names:
+        spec = SIZES[name]
+        path = corpus_dir / f'{name}-{seed}.docx'
+        if not path.exists():
+            print(f'[生成] {path.name} ({spec["paragraphs"]} 段落, {spec["tables"]} 表格 '
+                  f'{spec["rows"]}x{spec["cols"]})')
+            tmp_path = path.with_name(path.name + '.tmp')
+            generate_document(tmp_path, seed=seed, **spec)
+            os.replace(tmp_path, path)
+        paths[name] = path
+    return paths
+
+def _peak_rss_mb():
+    """当前进程的内存峰值（MB），无法获取时返回None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位为KB，macOS 为字节
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+def run_case(docx_path):
+    """
+    在当前进程中执行一次完整转换并分阶段计时（由子进程调用，保证内存峰值互不影响）
+
+    Returns:
+        结果字典：stages（每阶段 wall/cpu 秒数）、计数和内存峰值
+    """
+    converter = load_converter()
+    docx_path = Path(docx_path)
+    stages = {}
+
+    def timed(name, func, *args, **kwargs):
+        wall, cpu = time.perf_counter(), time.process_time()
+        value = func(*args, **kwargs)
+        stages[name] = {
+            'wall': time.perf_counter() - wall,
+            'cpu': time.process_time() - cpu,
+        }
+        return value
+
+    doc = timed('docx_load', converter.Document, str(docx_path))
+    timed('extract_title_and_date', converter.extract_title_and_date, doc, docx_path)
+    del doc
+
+    content, title, date = timed('extract_text_from_docx', converter.extract_text_from_docx, docx_path)
+    timed('fix_heading_numbers', converter.fix_heading_numbers, content)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        # generate_html 在docx同目录输出，传入临时目录中的虚拟路径
+        html_path = timed('generate_html', converter.generate_html,
+                          content, title, date, Path(out_dir) / docx_path.name, footer_links='')
+        html_bytes = html_path.stat().st_size
+
+    return {
+        'stages': stages,
+        'paragraphs': sum(1 for item in content if item['type'] == 'paragraph'),
+        'tables': sum(1 for item in content if item['type'] == 'table'),
+        'docx_bytes': docx_path.stat().st_size,
+        'html_bytes': html_bytes,
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+def run_case_subprocess(docx_path):
+    """在独立子进程中运行一次测量"""
+    proc = subprocess.run(
+        [sys.executable, __file__, '--run-case', str(docx_path)],
+        capture_output=True, text=True, encoding='utf-8', check=False
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f'基准测试子进程失败（{docx_path}）:\n{proc.stderr}')
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def summarize(runs):
+    """多次运行中每个阶段取最小耗时，内存取最大值"""
+    best = dict(runs[0])
+    best['stages'] = {
+        stage: {
+            'wall': min(r['stages'][stage]['wall'] for r in runs),
+            'cpu': min(r['stages'][stage]['cpu'] for r in runs),
+        }
+        for stage in STAGES
+    }
+    rss = [r['peak_rss_mb'] for r in runs if r['peak_rss_mb'] is not None]
+    best['peak_rss_mb'] = max(rss) if rss else None
+    best['total_wall'] = sum(best['stages'][s]['wall'] for s in STAGES if s not in
+                             ('docx_load', 'extract_title_and_date'))
+    extract = best['stages']['extract_text_from_docx']['wall']
+    best['paragraphs_per_sec'] = best['paragraphs'] / extract if extract else None
+    best['docx_mb_per_sec'] = best['docx_bytes'] / (1024 * 1024) / extract if extract else None
+    return best
+
+def print_report(results):
+    """打印各规模、各阶段的耗时表格"""
+    header = f'{"规模":<8}' + ''.join(f'{s:>24}' for s in STAGES)
+    print('\n' + header)
+    print('-' * len(header))
+    for name, result in results.items():
+        cells = ''.join(
+            f'{result["stages"][s]["wall"] * 1000:>13.1f} ms ({result["stages"][s]["cpu"] * 1000:>5.0f})'
+            for s in STAGES
+        )
+        print(f'{name:<8}{cells}')
+
+    print('\n（括号内为CPU时间 ms）\n')
+    for name, result in results.items():
+        rss = f'{result["peak_rss_mb"]:.1f} MB' if result['peak_rss_mb'] is not None else '未知'
+        print(f'[{name}] {result["paragraphs"]} 段落 / {result["tables"]} 表格，'
+              f'提取 {result["paragraphs_per_sec"]:.0f} 段落/秒（{result["docx_mb_per_sec"]:.2f} MB/秒），'
+              f'HTML {result["html_bytes"] / 1024:.0f} KB，内存峰值 {rss}')
+
+def compare_with_baseline(results, baseline_path, max_regression):
+    """
+    与基线结果比较，任一阶段耗时超过基线 (1 + max_regression) 倍即视为回归
+
+    Returns:
+        回归描述列表
+    """
+    baseline = json.loads(Path(baseline_path).read_text(encoding='utf-8'))['results']
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for stage in STAGES:
+            old = baseline[name]['stages'].get(stage, {}).get('wall')
+            new = result['stages'][stage]['wall']
+            # 忽略 1ms 以下的阶段，计时噪声太大
+            if old and new > 0.001 and new > old * (1 + max_regression):
+                regressions.append(f'{name}/{stage}: {old * 1000:.1f} ms → {new * 1000:.1f} ms '
+                                   f'(+{(new / old - 1) * 100:.0f}%)')
+    return regressions
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Word转H5转换流程基准测试')
+    parser.add_argument('--sizes', default='small,medium,large',
+                        help=f'逗号分隔的规模（可选：{", ".join(SIZES)}；默认 small,medium,large）')
+    parser.add_argument('--repeat', type=int, default=3, help='每个规模运行次数，取最优（默认3）')
+    parser.add_argument('--seed', type=int, default=0, help='合成文档随机种子（默认0）')
+    parser.add_argument('--corpus-dir', default=str(Path(tempfile.gettempdir()) / 'h5-benchmark-corpus'),
+                        help='合成文档目录（已存在的文档会复用）')
+    parser.add_argument('--json', metavar='FILE', help='将结果写入JSON文件，可作为之后的基线')
+    parser.add_argument('--baseline', metavar='FILE', help='与基线JSON比较，出现回归时返回非零退出码')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='允许的最大耗时增幅（默认0.2，即20%%）')
+    parser.add_argument('--run-case', metavar='DOCX', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case)))
+        return
+
+    size_names = [s.strip() for s in args.sizes.split(',') if s.strip()]
+    unknown = [s for s in size_names if s not in SIZES]
+    if unknown:
+        print(f'[错误] 未知规模: {", ".join(unknown)}（可选：{", ".join(SIZES)}）')
+        sys.exit(1)
+
+    corpus = ensure_corpus(args.corpus_dir, size_names, args.seed)
+
+    results = {}
+    for name, docx_path in corpus.items():
+        print(f'[测量] {name} × {args.repeat}')
+        runs = [run_case_subprocess(docx_path) for _ in range(max(1, args.repeat))]
+        results[name] = summarize(runs)
+
+    print_report(results)
+
+    if args.json:
+        data = {'python': sys.version.split()[0], 'platform': sys.platform, 'results': results}
+        Path(args.json).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f'\n[完成] 结果已写入 {args.json}')
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.max_regression)
+        if regressions:
+            print('\n[回归] 以下阶段耗时超过基线：')
+            for line in regressions:
+                print(f'  - {line}')
+            sys.exit(1)
+        print('\n[通过] 未发现性能回归')
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,15 @@ Word文档转HTML脚本
 import sys
 import os
 import re
+import json
+import hashlib
+import time
+import posixpath
+import textwrap
+import zipfile
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
+from html import escape as html_escape
 from pathlib import Path
 from datetime import datetime
 
@@ -17,12 +26,246 @@ if sys.platform == 'win32':
     import io
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
-try:
-    from docx import Document
-except ImportError:
-    print("[错误] 未安装 python-docx")
-    print("请运行: pip install python-docx")
-    sys.exit(1)
+# python-docx/lxml 导入较慢（约0.1秒），在首次转换时才加载；
+# 守护进程运行时命令行只作为客户端，无需加载
+Document = None
+etree = None
+
+def load_dependencies():
+    """导入 python-docx 和 lxml（只在首次调用时导入），未安装时提示并退出"""
+    global Document, etree
+    if etree is None:
+        try:
+            from docx import Document as document_class
+            from lxml import etree as etree_module
+        except ImportError:
+            print("[错误] 未安装 python-docx")
+            print("请运行: pip install python-docx")
+            sys.exit(1)
+        Document, etree = document_class, etree_module
+
+# 转换器版本：修改提取或渲染逻辑导致输出变化时需递增，使增量缓存失效
+CONVERTER_VERSION = '1.3.0'
+
+# 增量转换缓存文件（位于输出目录）
+CACHE_FILENAME = '.h5-cache.json'
+CACHE_FORMAT = 1
+
+# WordprocessingML 命名空间及常用标签（Clark 表示法）
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W_BODY = f'{{{W_NS}}}body'
+W_P = f'{{{W_NS}}}p'
+W_PPR = f'{{{W_NS}}}pPr'
+W_PSTYLE = f'{{{W_NS}}}pStyle'
+W_R = f'{{{W_NS}}}r'
+W_RPR = f'{{{W_NS}}}rPr'
+W_T = f'{{{W_NS}}}t'
+W_TAB = f'{{{W_NS}}}tab'
+W_BR = f'{{{W_NS}}}br'
+W_CR = f'{{{W_NS}}}cr'
+W_B = f'{{{W_NS}}}b'
+W_B_CS = f'{{{W_NS}}}bCs'
+W_I = f'{{{W_NS}}}i'
+W_I_CS = f'{{{W_NS}}}iCs'
+W_U = f'{{{W_NS}}}u'
+W_HYPERLINK = f'{{{W_NS}}}hyperlink'
+W_DRAWING = f'{{{W_NS}}}drawing'
+W_TBL = f'{{{W_NS}}}tbl'
+W_TR = f'{{{W_NS}}}tr'
+W_TRPR = f'{{{W_NS}}}trPr'
+W_GRID_BEFORE = f'{{{W_NS}}}gridBefore'
+W_TC = f'{{{W_NS}}}tc'
+W_TCPR = f'{{{W_NS}}}tcPr'
+W_GRID_SPAN = f'{{{W_NS}}}gridSpan'
+W_VMERGE = f'{{{W_NS}}}vMerge'
+W_STYLE = f'{{{W_NS}}}style'
+W_NAME = f'{{{W_NS}}}name'
+W_VAL = f'{{{W_NS}}}val'
+W_TYPE = f'{{{W_NS}}}type'
+W_DEFAULT = f'{{{W_NS}}}default'
+W_STYLE_ID = f'{{{W_NS}}}styleId'
+
+# DrawingML 图片（w:drawing/wp:inline|wp:anchor 中的 wp:extent、wp:docPr 和 a:blip）
+WP_NS = 'http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing'
+WP_EXTENT = f'{{{WP_NS}}}extent'
+WP_DOC_PR = f'{{{WP_NS}}}docPr'
+A_BLIP = '{http://schemas.openxmlformats.org/drawingml/2006/main}blip'
+R_EMBED = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed'
+
+# ST_OnOff 中表示"开"的取值
+ON_VALUES = frozenset(('1', 'true', 'on'))
+
+# OPC 关系命名空间
+RELS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+RELS_RELATIONSHIP = f'{{{RELS_NS}}}Relationship'
+
+# 流式读取document.xml时每次送入解析器的字节数
+XML_CHUNK_SIZE = 64 * 1024
+
+# 性能分析开关（环境变量）：H5_PROFILE=1 输出到stderr，或指定JSON lines文件路径；
+# H5_PROFILE_DUMP=目录 为每个文档保存 cProfile 统计（<docx文件名>.pstats）
+PROFILE_ENV = 'H5_PROFILE'
+PROFILE_DUMP_ENV = 'H5_PROFILE_DUMP'
+
+def _peak_rss_mb():
+    """当前进程的内存峰值（MB），无法获取时返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为KB，macOS 为字节
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+class ConversionProfiler:
+    """
+    按阶段累计墙钟时间、CPU时间和调用次数，以JSON lines输出
+
+    热路径上的函数通过 wrap() 在每个文档开始时包装一次，
+    未启用分析时调用方直接使用原函数，没有任何额外开销。
+    """
+
+    def __init__(self, output='-', dump_dir=None):
+        self.output = output
+        self.dump_dir = Path(dump_dir) if dump_dir else None
+        self.doc = None
+        self.stages = {}
+
+    def emit(self, record):
+        """输出一行JSON（多进程追加写同一文件时每行一次写入）"""
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        if self.output in ('-', '1', 'true', 'stderr'):
+            sys.stderr.write(line)
+            sys.stderr.flush()
+        else:
+            with open(self.output, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def _add(self, stage, wall, cpu):
+        totals = self.stages.get(stage)
+        if totals is None:
+            self.stages[stage] = [wall, cpu, 1]
+        else:
+            totals[0] += wall
+            totals[1] += cpu
+            totals[2] += 1
+
+    def wrap(self, stage, func):
+        """返回计入指定阶段的包装函数"""
+        perf_counter, process_time, add = time.perf_counter, time.process_time, self._add
+
+        def timed(*args, **kwargs):
+            wall, cpu = perf_counter(), process_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add(stage, perf_counter() - wall, process_time() - cpu)
+        return timed
+
+    @contextmanager
+    def stage(self, stage):
+        """计时一个粗粒度阶段"""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self._add(stage, time.perf_counter() - wall, time.process_time() - cpu)
+
+    @contextmanager
+    def document(self, docx_path):
+        """
+        统计一个文档的转换：结束时输出各阶段记录和文档汇总记录
+
+        Yields:
+            汇总字典，调用方可写入段落数等计数
+        """
+        self.doc = str(docx_path)
+        self.stages = {}
+        summary = {}
+        profile = None
+        if self.dump_dir:
+            import cProfile
+            profile = cProfile.Profile()
+            profile.enable()
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield summary
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            if profile:
+                profile.disable()
+                self.dump_dir.mkdir(parents=True, exist_ok=True)
+                profile.dump_stats(str(self.dump_dir / f'{Path(docx_path).name}.pstats'))
+
+            for stage, (stage_wall, stage_cpu, count) in self.stages.items():
+                self.emit({
+                    'event': 'stage',
+                    'doc': self.doc,
+                    'stage': stage,
+                    'wall_ms': round(stage_wall * 1000, 3),
+                    'cpu_ms': round(stage_cpu * 1000, 3),
+                    'count': count,
+                })
+            record = {
+                'event': 'document',
+                'doc': self.doc,
+                'pid': os.getpid(),
+                'wall_ms': round(wall * 1000, 3),
+                'cpu_ms': round(cpu * 1000, 3),
+                'peak_rss_mb': _peak_rss_mb(),
+            }
+            record.update(summary)
+            self.emit(record)
+            self.doc = None
+            self.stages = {}
+
+def _profiler_from_env():
+    """根据环境变量创建分析器，未启用时返回None"""
+    output = os.environ.get(PROFILE_ENV, '').strip()
+    dump_dir = os.environ.get(PROFILE_DUMP_ENV, '').strip()
+    if output.lower() in ('', '0', 'false') and not dump_dir:
+        return None
+    if output.lower() in ('', '0', 'false'):
+        output = '-'
+    return ConversionProfiler(output, dump_dir or None)
+
+_profiler = _profiler_from_env()
+
+def enable_profiling(output='-', dump_dir=None):
+    """
+    启用性能分析，并写入环境变量使子进程（批量转换的进程池）同样启用
+    """
+    global _profiler
+    os.environ[PROFILE_ENV] = str(output)
+    if dump_dir:
+        os.environ[PROFILE_DUMP_ENV] = str(dump_dir)
+    _profiler = ConversionProfiler(output, dump_dir)
+    return _profiler
+
+def profile_stage(stage):
+    """粗粒度阶段计时；未启用分析时返回空上下文"""
+    if _profiler is None:
+        return _NULL_STAGE
+    return _profiler.stage(stage)
+
+_NULL_STAGE = nullcontext()
+
+def parse_effective_date(text):
+    """
+    从包含"生效日期"的段落文本中提取日期
+
+    Args:
+        text: 段落文本（已去除首尾空白）
+
+    Returns:
+        日期字符串（如 "2026年1月1日"），提取不到时返回去掉前缀的整段文本
+    """
+    match = re.search(r'(\d{4}年\d{1,2}月\d{1,2}日|\d{4}-\d{1,2}-\d{1,2})', text)
+    if match:
+        return match.group(1)
+    # 如果提取不到日期，保留整段
+    return text.replace("生效日期：", "").replace("生效日期:", "").strip()
 
 def extract_title_and_date(doc, docx_path):
     """
@@ -40,13 +283,7 @@ def extract_title_and_date(doc, docx_path):
 
         # 识别生效日期
         if not date and "生效日期" in text:
-            # 提取日期部分
-            match = re.search(r'(\d{4}年\d{1,2}月\d{1,2}日|\d{4}-\d{1,2}-\d{1,2})', text)
-            if match:
-                date = match.group(1)
-            else:
-                # 如果提取不到日期，保留整段
-                date = text.replace("生效日期：", "").replace("生效日期:", "").strip()
+            date = parse_effective_date(text)
 
     # 如果没有提取到标题，使用文件名
     if not title:
@@ -54,407 +291,1325 @@ def extract_title_and_date(doc, docx_path):
 
     return title, date
 
-def extract_formatted_text(paragraph):
-    """
-    提取段落文本并保留加粗等格式，包括超链接
+def _is_on(element):
+    """开关型格式元素（w:b、w:i）是否生效：元素存在且 w:val 缺省或为真"""
+    return element is not None and element.get(W_VAL, 'true') in ON_VALUES
+
+def _run_format_tag(rpr):
     """
-    html_parts = []
+    根据run属性返回格式标签：加粗优先，其次斜体，最后下划线
 
-    # 首先处理普通的run
-    for run in paragraph.runs:
-        if not run.text:
-            continue
-        text = run.text
-        # 检查是否有加粗
-        if run.bold:
-            html_parts.append(f"<strong>{text}</strong>")
-        # 检查是否有斜体
-        elif run.italic:
-            html_parts.append(f"<em>{text}</em>")
-        # 检查是否有下划线
-        elif run.underline:
-            html_parts.append(f"<u>{text}</u>")
-        else:
-            html_parts.append(text)
+    Returns:
+        'strong'、'em'、'u' 或 None
+    """
+    if rpr is None:
+        return None
+    # 检查是否有加粗
+    if _is_on(rpr.find(W_B)):
+        return 'strong'
+    # 检查是否有斜体
+    if _is_on(rpr.find(W_I)):
+        return 'em'
+    # 检查是否有下划线（w:val 缺省或为 none 时不算下划线）
+    u = rpr.find(W_U)
+    if u is not None and u.get(W_VAL) not in (None, 'none'):
+        return 'u'
+    return None
 
-    # 处理hyperlink（超链接）中的文本
-    # python-docx的runs不会包含hyperlink，需要从XML中提取
-    for child in paragraph._element.iterchildren():
-        # 检查是否是hyperlink元素
-        if child.tag.endswith('}hyperlink'):
-            # 获取hyperlink中的文本
-            hyperlink_text = ''
-            for text_elem in child.iter():
-                if text_elem.tag.endswith('}t'):
-                    if text_elem.text:
-                        hyperlink_text += text_elem.text
+def paragraph_runs(p, media=None):
+    """
+    按文档顺序一次遍历段落XML，提取内联run节点
 
-            if not hyperlink_text:
-                continue
+    直接比较 Clark 表示法的标签常量，不创建 python-docx 代理对象；
+    run 和 hyperlink 按在段落中出现的顺序输出。
 
-            # 检查hyperlink中是否有格式
-            is_bold = False
-            is_italic = False
-            is_underline = False
-
-            # 检查rPr（run properties）中的格式
-            for rpr in child.iterchildren():
-                if rpr.tag.endswith('}rPr'):
-                    for prop in rpr.iterchildren():
-                        if prop.tag.endswith('}b') or prop.tag.endswith('}bCs'):
-                            is_bold = True
-                        elif prop.tag.endswith('}i') or prop.tag.endswith('}iCs'):
-                            is_italic = True
-                        elif prop.tag.endswith('}u'):
-                            is_underline = True
-
-            # 应用格式
-            formatted_text = hyperlink_text
-            if is_bold:
-                formatted_text = f"<strong>{formatted_text}</strong>"
-            if is_italic:
-                formatted_text = f"<em>{formatted_text}</em>"
-            if is_underline:
-                formatted_text = f"<u>{formatted_text}</u>"
-
-            html_parts.append(formatted_text)
-
-    # 如果没有提取到内容，回退到paragraph.text
-    if not html_parts:
-        return paragraph.text
-
-    return ''.join(html_parts)
-
-def convert_table_to_html(table):
-    """将Word表格转换为HTML表格"""
-    html = '<div class="table-wrapper">\n  <table>\n'
+    Args:
+        p: 段落元素（w:p）
+        media: 图片提取器（MediaExtractor），为None时忽略图片
 
-    # 判断是否包含表头（第一行作为表头）
-    if len(table.rows) > 0:
-        # 表头
-        header_row = table.rows[0]
-        html += '    <thead>\n      <tr>\n'
-        for cell in header_row.cells:
-            cell_text = cell.text.strip()
-            # 检查是否有加粗格式
-            is_bold = False
-            for para in cell.paragraphs:
-                for run in para.runs:
-                    if run.bold:
-                        is_bold = True
-                        break
-            cell_html = f'<strong>{cell_text}</strong>' if is_bold else cell_text
-            html += f'        <th>{cell_html}</th>\n'
-        html += '      </tr>\n    </thead>\n'
+    Returns:
+        run节点列表，每个节点为 {'text': 文本, 'marks': 格式标签列表, 'link': True}：
+        marks 按由内向外的嵌套顺序排列，无格式时省略；
+        link 只出现在超链接文本上（超链接不计入段落纯文本）；
+        图片为 {'text': '', 'image': media/ 中的文件名, 'width', 'height', 'alt'}
+    """
+    runs = []
 
-        # 表体
-        html += '    <tbody>\n'
-        for row in table.rows[1:]:
-            html += '      <tr>\n'
-            for cell in row.cells:
-                cell_text = cell.text.strip()
-                html += f'        <td>{cell_text}</td>\n'
-            html += '      </tr>\n'
-        html += '    </tbody>\n'
-
-    html += '  </table>\n</div>'
-    return html
-
-def extract_text_from_docx(docx_path):
-    """严格提取Word文档的所有内容，不修改任何文字，并保留加粗格式"""
-    from docx.oxml.text.paragraph import CT_P
-    from docx.oxml.table import CT_Tbl
-    from docx.table import _Cell, Table
-    from docx.text.paragraph import Paragraph
-
-    doc = Document(docx_path)
-    content = []
-
-    # 先识别标题和日期
-    title, date = extract_title_and_date(doc, docx_path)
-
-    # 提取所有段落和表格（按照文档顺序）
-    title_found = False
-    date_found = False
+    for child in p:
+        tag = child.tag
 
-    # 遍历文档body的所有元素
-    for element in doc.element.body:
-        if isinstance(element, CT_P):
-            # 处理段落
-            para = Paragraph(element, doc)
-            plain_text = para.text
+        if tag == W_R:
+            # 一次遍历run的子元素，同时取得属性和文本
+            rpr = None
+            run_parts = []
+            for elem in child:
+                elem_tag = elem.tag
+                if elem_tag == W_T:
+                    if elem.text:
+                        run_parts.append(elem.text)
+                elif elem_tag == W_RPR:
+                    rpr = elem
+                elif elem_tag == W_TAB:
+                    run_parts.append('\t')
+                elif elem_tag == W_BR or elem_tag == W_CR:
+                    run_parts.append('\n')
+                elif elem_tag == W_DRAWING and media is not None:
+                    image = _drawing_image(elem, media)
+                    if image is not None:
+                        # 图片之前的文本单独成为一个run，保持文档顺序
+                        if run_parts:
+                            fmt = _run_format_tag(rpr)
+                            runs.append({'text': ''.join(run_parts), 'marks': [fmt]} if fmt
+                                        else {'text': ''.join(run_parts)})
+                            run_parts = []
+                        runs.append(image)
 
-            if not plain_text.strip():
+            if not run_parts:
                 continue
 
-            # 跳过标题段落
-            if not title_found and plain_text.strip() == title:
-                title_found = True
-                continue
+            fmt = _run_format_tag(rpr)
+            if fmt:
+                runs.append({'text': ''.join(run_parts), 'marks': [fmt]})
+            else:
+                runs.append({'text': ''.join(run_parts)})
 
-            # 跳过生效日期段落
-            if not date_found and ("生效日期" in plain_text or plain_text.strip() == date):
-                date_found = True
+        elif tag == W_HYPERLINK:
+            # 获取hyperlink中的文本
+            hyperlink_text = ''.join(t.text for t in child.iter(W_T) if t.text)
+            if not hyperlink_text:
                 continue
 
-            # 提取带格式的文本
-            formatted_text = extract_formatted_text(para)
+            # 检查hyperlink的rPr（run properties）中的格式
+            is_bold = is_italic = is_underline = False
+            for rpr in child.iterchildren(W_RPR):
+                for prop in rpr:
+                    prop_tag = prop.tag
+                    if prop_tag == W_B or prop_tag == W_B_CS:
+                        is_bold = True
+                    elif prop_tag == W_I or prop_tag == W_I_CS:
+                        is_italic = True
+                    elif prop_tag == W_U:
+                        is_underline = True
 
-            # 识别标题级别
-            content.append({
-                'type': 'paragraph',
-                'text': formatted_text,
-                'plain_text': plain_text,
-                'style': para.style.name,
-                'level': get_heading_level(para, plain_text)
-            })
+            # 格式由内向外：加粗、斜体、下划线
+            run = {'text': hyperlink_text, 'link': True}
+            marks = [mark for mark, on in (('strong', is_bold), ('em', is_italic), ('u', is_underline)) if on]
+            if marks:
+                run['marks'] = marks
+            runs.append(run)
 
-        elif isinstance(element, CT_Tbl):
-            # 处理表格
-            table = Table(element, doc)
-            # 将表格转换为HTML
-            table_html = convert_table_to_html(table)
-            content.append({
-                'type': 'table',
-                'html': table_html
-            })
+    return runs
 
-    return content, title, date
-
-def get_heading_level(para, text):
-    """智能获取标题级别"""
-    style_name = para.style.name
-
-    # 优先使用样式名称
-    if 'Heading 1' in style_name:
-        return 1
-    elif 'Heading 2' in style_name:
-        return 2
-    elif 'Heading 3' in style_name:
-        return 3
-    elif 'Heading 4' in style_name:
-        return 4
-    elif 'Heading 5' in style_name:
-        return 5
-    elif 'Heading 6' in style_name:
-        return 6
-
-    # 根据文本内容智能识别
-    text = text.strip()
+def render_image(run):
+    """图片run节点的 <img> 标签（延迟加载，带尺寸以免加载时页面跳动）"""
+    attrs = f' alt="{html_escape(run.get("alt", ""))}"'
+    if 'width' in run:
+        attrs += f' width="{run["width"]}" height="{run["height"]}"'
+    return f'<img src="./{MEDIA_DIRNAME}/{run["image"]}"{attrs} loading="lazy">'
 
-    # 识别主标题（序号格式：一、二、三、）
-    if re.match(r'^[一二三四五六七八九十]+、', text):
-        return 2
+def render_runs(runs):
+    """将run节点渲染为带格式的HTML"""
+    parts = []
+    for run in runs:
+        if 'image' in run:
+            parts.append(render_image(run))
+            continue
+        html = run['text']
+        marks = run.get('marks')
+        if marks:
+            for mark in marks:
+                html = f"<{mark}>{html}</{mark}>"
+        parts.append(html)
+    return ''.join(parts)
 
-    # 识别主标题（序号格式：1.、2.、3.、4.、等，注意：不包含 "x.x" 格式）
-    if re.match(r'^\d+\.\s+[^\d]', text):
-        return 2
+def runs_plain_text(runs):
+    """run节点的纯文本（与 python-docx 的 paragraph.text 一致，不含超链接文本）"""
+    return ''.join(run['text'] for run in runs if 'link' not in run)
 
-    # 处理 List Paragraph 样式（通常是一级标题）
-    # 但是：如果以【】开头且长度较短，可能是段落而非标题
-    if 'List Paragraph' in style_name:
-        if re.match(r'^【', text) or len(text) >= 50:
-            return 0  # 普通段落
-        return 2
+def walk_paragraph(p):
+    """
+    一次遍历段落XML，提取带格式的HTML和纯文本
 
-    # 识别子标题（序号格式：2.1、3.1、8.1、等）
-    # 注意：需要区分子标题和段落编号（如 "9.1 ...长文本..."）
-    # 规则：如果文本长度 <= 30，认为是子标题（h3）；否则是段落（p）
-    match = re.match(r'^(\d+\.\d+)\s+', text)
-    if match and len(text) <= 30:
-        return 3
+    Args:
+        p: 段落元素（w:p）
 
-    # 识别列表标题（序号格式：1、2、3、）
-    if re.match(r'^\d+、', text):
-        return 3
+    Returns:
+        (带格式的HTML, 纯文本)；纯文本与 python-docx 的 paragraph.text 一致，
+        只包含段落直接子run的文本
+    """
+    runs = paragraph_runs(p)
+    return render_runs(runs), runs_plain_text(runs)
 
-    # 特殊标题：权限申请使用
-    if text == '权限申请使用':
-        return 3
+def extract_formatted_text(paragraph):
+    """
+    提取段落文本并保留加粗等格式，包括超链接
+    """
+    return walk_paragraph(paragraph._element)[0]
 
-    # 识别独立的小标题（需要更严格的条件，避免误判列表项为标题）
-    # 排除列表项（如"（1）..."、"1、..."、"·..."、"—..."、"【"等）
-    # 优先检查是否包含特殊字符开头
-    if (len(text) < 30 and
-        text.count('。') == 0 and
-        text.count('！') == 0 and
-        text.count('？') == 0 and
-        text.count('；') == 0 and
-        text.count('，') == 0 and
-        not re.match(r'^[（\(【\[]', text) and  # 不以（、【或[开头
-        not re.match(r'^\d+、', text) and
-        not re.match(r'^\d+\.', text) and
-        not re.match(r'^·', text) and
-        not text.startswith('—') and
-        not text.startswith('-')):
-        # 只有在不以任何列表符号开头时，才认为是 h2
-        return 2
-
-    return 0  # 普通段落
+def paragraph_style_id(p):
+    """读取段落的样式ID（w:pPr/w:pStyle/@w:val），未设置时返回None"""
+    ppr = p.find(W_PPR)
+    if ppr is None:
+        return None
+    pstyle = ppr.find(W_PSTYLE)
+    return pstyle.get(W_VAL) if pstyle is not None else None
 
-def number_to_chinese(num):
-    """将数字转换为中文序号（支持1-100+）"""
-    if num <= 10:
-        mapping = {
-            1: '一', 2: '二', 3: '三', 4: '四', 5: '五',
-            6: '六', 7: '七', 8: '八', 9: '九', 10: '十'
-        }
-        return mapping[num]
-    elif num < 20:
-        return '十' + number_to_chinese(num - 10) if num > 10 else '十'
-    elif num < 100:
-        tens = num // 10
-        units = num % 10
-        result = number_to_chinese(tens) + '十'
-        if units > 0:
-            result += number_to_chinese(units)
-        return result
-    else:
-        return str(num)
+def _cell_layout(tc):
+    """
+    读取单元格的合并属性
 
-def fix_heading_numbers(content):
+    Returns:
+        (横向跨越的网格列数, 纵向合并状态：None / 'restart' / 'continue')
     """
-    智能修复标题序号，确保连续性和一致性
+    tcpr = tc.find(W_TCPR)
+    if tcpr is None:
+        return 1, None
+    span = 1
+    grid_span = tcpr.find(W_GRID_SPAN)
+    if grid_span is not None:
+        try:
+            span = max(1, int(grid_span.get(W_VAL, '1')))
+        except ValueError:
+            span = 1
+    v_merge = tcpr.find(W_VMERGE)
+    if v_merge is None:
+        return span, None
+    return span, v_merge.get(W_VAL, 'continue')
 
-    处理以下情况：
-    1. 第一个标题缺少序号（如"个人信息的收集和使用"，但后面是"2. 信息的存储"）
-    2. 序号不连续（如1, 3, 4）
-    3. 序号格式不一致（部分有中文序号"一、"，部分有数字序号"1."）
-    4. 根据文档主要使用的序号格式进行统一和补齐
+def _row_grid_before(tr):
+    """行首跳过的网格列数（w:trPr/w:gridBefore）"""
+    trpr = tr.find(W_TRPR)
+    if trpr is None:
+        return 0
+    grid_before = trpr.find(W_GRID_BEFORE)
+    if grid_before is None:
+        return 0
+    try:
+        return max(0, int(grid_before.get(W_VAL, '0')))
+    except ValueError:
+        return 0
+
+def _cell_has_bold(tc):
+    """单元格中是否有加粗的run"""
+    for p in tc.iterchildren(W_P):
+        for r in p.iterchildren(W_R):
+            rpr = r.find(W_RPR)
+            if rpr is not None and _is_on(rpr.find(W_B)):
+                return True
+    return False
+
+def table_to_ir(table):
     """
-    # 只处理段落类型的content，跳过表格类型
-    h2_items = [item for item in content if item.get('type') == 'paragraph' and item.get('level') == 2]
+    直接读取 w:tr/w:tc 将Word表格转换为表格节点
 
-    if len(h2_items) < 2:
-        return content  # 标题太少，无需修复
+    Args:
+        table: 表格元素（w:tbl），也接受 python-docx 表格对象
 
-    # 统计序号格式（使用plain_text进行匹配）
-    has_chinese_num = 0
-    has_digit_num = 0
-    has_no_num = 0
+    Returns:
+        {'type': 'table', 'rows': [行节点, ...]}；行节点为 {'cells': [...], 'grid_before': n}，
+        单元格节点为 {'paragraphs': [run节点列表, ...], 'span': n, 'vmerge': 'restart'/'continue',
+        'bold': True}，取默认值（0、1、无合并、无加粗）的字段省略
+    """
+    tbl = getattr(table, '_tbl', table)
+    rows = []
+    for tr in tbl.iterchildren(W_TR):
+        cells = []
+        for tc in tr.iterchildren(W_TC):
+            cell = {'paragraphs': [paragraph_runs(p) for p in tc.iterchildren(W_P)]}
+            span, v_merge = _cell_layout(tc)
+            if span > 1:
+                cell['span'] = span
+            if v_merge is not None:
+                cell['vmerge'] = v_merge
+            if _cell_has_bold(tc):
+                cell['bold'] = True
+            cells.append(cell)
+        row = {'cells': cells}
+        grid_before = _row_grid_before(tr)
+        if grid_before:
+            row['grid_before'] = grid_before
+        rows.append(row)
+    return {'type': 'table', 'rows': rows}
 
-    for item in h2_items:
-        text = item['plain_text'].strip()  # 使用纯文本进行匹配
-        if re.match(r'^[一二三四五六七八九十]+、', text):
-            has_chinese_num += 1
-        elif re.match(r'^\d+\.\s', text):
-            has_digit_num += 1
-        else:
-            has_no_num += 1
+def _table_layout(rows):
+    """
+    计算纵向合并：每个合并起始单元格的 rowspan、被合并而不输出的单元格，
+    以及每行之后是否仍有未结束的纵向合并（分块时不能在这些行之后切分）
 
-    # 决定使用哪种序号格式
-    # 如果中文序号更多，使用中文序号；否则使用数字序号
-    use_chinese = has_chinese_num > has_digit_num and has_chinese_num > 0
-    use_digit = has_digit_num >= has_chinese_num and has_digit_num > 0
+    表头行（第一行）的合并不会延伸到表体，因为 rowspan 不能跨越 thead/tbody。
 
-    # 如果两种序号都有，按数量多的一方为准
-    # 如果都没有序号，默认使用数字序号
-    if not use_chinese and not use_digit:
-        use_digit = True
+    Args:
+        rows: 表格节点的行节点列表
 
-    # 根据选择的格式统一和补齐序号
-    for i, item in enumerate(h2_items):
-        plain_text = item['plain_text'].strip()  # 使用纯文本提取序号
-        formatted_text = item['text']  # 使用带格式的文本
-        num = i + 1
+    Returns:
+        (rowspans {(行号, 单元格序号): 行数}, 跳过的 (行号, 单元格序号) 集合, open_after 布尔列表)
+    """
+    rowspans = {}
+    merged = set()
+    origins = []
+    active = {}
 
-        # 提取标题文本（去掉已有序号）
-        title_text = None
+    for row_idx, row in enumerate(rows):
+        col = row.get('grid_before', 0)
+        next_active = {}
+        for cell_idx, cell in enumerate(row['cells']):
+            v_merge = cell.get('vmerge')
+            origin = active.get(col) if v_merge == 'continue' else None
+            if origin is not None:
+                # 延续上一行同一列的合并
+                origin[2] = row_idx
+                rowspans[origin[0]] += 1
+                merged.add((row_idx, cell_idx))
+                next_active[col] = origin
+            elif v_merge is not None:
+                # 合并起点（或找不到起点的延续单元格，按新起点处理）
+                origin = [(row_idx, cell_idx), row_idx, row_idx]
+                origins.append(origin)
+                rowspans[(row_idx, cell_idx)] = 1
+                next_active[col] = origin
+            col += cell.get('span', 1)
+        # 表头的合并不延伸到表体
+        active = next_active if row_idx > 0 else {}
 
-        # 尝试匹配中文序号
-        match_cn = re.match(r'^[一二三四五六七八九十]+、\s*(.+)$', plain_text)
-        if match_cn:
-            title_text = match_cn.group(1)
-        else:
-            # 尝试匹配数字序号
-            match_digit = re.match(r'^\d+\.\s+(.+)$', plain_text)
-            if match_digit:
-                title_text = match_digit.group(1)
-            else:
-                # 没有序号，直接使用带格式的全文
-                title_text = formatted_text
+    open_after = [False] * len(rows)
+    for _, first_row, last_row in origins:
+        for row_idx in range(first_row, last_row):
+            open_after[row_idx] = True
 
-        # 根据选择的格式设置序号（保留带格式的标题文本）
-        if use_chinese:
-            cn_num = number_to_chinese(num)
-            item['text'] = f"{cn_num}、{title_text}"
-        elif use_digit:
-            item['text'] = f"{num}. {title_text}"
+    return rowspans, merged, open_after
 
-    return content
+def _cell_text(cell):
+    """单元格文本：直接子段落的run文本以换行连接（与 python-docx 的 cell.text 一致）"""
+    return '\n'.join(runs_plain_text(runs) for runs in cell['paragraphs'])
 
-def generate_english_filename(title, date):
+def _cell_attrs(key, span, rowspans):
+    """生成单元格的 colspan/rowspan 属性"""
+    attrs = ''
+    if span > 1:
+        attrs += f' colspan="{span}"'
+    rowspan = rowspans.get(key, 1)
+    if rowspan > 1:
+        attrs += f' rowspan="{rowspan}"'
+    return attrs
+
+def write_table_html(table, write, chunk_rows=0, minify=False):
     """
-    根据标题和生效日期生成英文文件名
+    将表格逐行写出为HTML表格
+
+    横向合并（gridSpan）输出为 colspan，纵向合并（vMerge）输出为 rowspan。
+    chunk_rows 大于0且表体行数超过它时，表体按块拆分为多个 tbody，
+    第一块之外默认隐藏，由页面脚本在滚动到附近或点击"显示更多"时逐块显示。
 
     Args:
-        title: 文档标题（中文）
-        date: 生效日期（如 "2026年1月1日" 或 "2026-01-01"）
+        table: 表格节点（见 table_to_ir），也接受 w:tbl 元素或 python-docx 表格对象
+        write: 写入函数（如文件对象的 write 或 list.append）
+        chunk_rows: 每块表体的行数，0 表示不分块
+        minify: 省略标签之间用于排版的缩进和换行（单元格文本原样保留）
 
     Returns:
-        英文文件名（如 "privacy-policy-20260101.html"）
+        是否进行了分块
     """
-    # 根据标题判断协议类型
-    title_lower = title.lower()
+    if not isinstance(table, dict):
+        table = table_to_ir(table)
+    rows = table['rows']
+    rowspans, merged, open_after = _table_layout(rows)
+    body_rows = len(rows) - 1
+    chunked = chunk_rows > 0 and body_rows > chunk_rows
 
-    if '隐私' in title and '儿童' in title:
-        english_name = 'children-privacy'
-    elif '隐私' in title:
-        english_name = 'privacy-policy'
-    elif '用户' in title and ('协议' in title or '服务' in title):
-        english_name = 'user-agreement'
+    if minify:
+        nl = i2 = i4 = i6 = i8 = ''
     else:
-        # 默认使用 document
-        english_name = 'document'
+        nl, i2, i4, i6, i8 = '\n', '  ', '    ', '      ', '        '
 
-    # 格式化日期
-    date_str = format_date_for_filename(date)
+    write(f'<div class="table-wrapper table-chunked">{nl}{i2}<table>{nl}' if chunked
+          else f'<div class="table-wrapper">{nl}{i2}<table>{nl}')
 
-    return f"{english_name}-{date_str}.html"
+    # 判断是否包含表头（第一行作为表头）
+    if rows:
+        # 表头
+        header = rows[0]
+        write(f'{i4}<thead>{nl}{i6}<tr>{nl}')
+        grid_before = header.get('grid_before', 0)
+        if grid_before:
+            write(f'{i8}<th colspan="{grid_before}"></th>{nl}' if grid_before > 1 else f'{i8}<th></th>{nl}')
+        for cell_idx, cell in enumerate(header['cells']):
+            cell_text = _cell_text(cell).strip()
+            # 检查是否有加粗格式
+            cell_html = f'<strong>{cell_text}</strong>' if cell.get('bold') else cell_text
+            write(f'{i8}<th{_cell_attrs((0, cell_idx), cell.get("span", 1), rowspans)}>{cell_html}</th>{nl}')
+        write(f'{i6}</tr>{nl}{i4}</thead>{nl}')
 
-def format_date_for_filename(date):
+        # 表体
+        write(f'{i4}<tbody>{nl}')
+        chunk_size = 0
+        for row_idx in range(1, len(rows)):
+            row = rows[row_idx]
+            # 分块：只在没有跨行合并的行之间切分
+            if chunked and chunk_size >= chunk_rows and not open_after[row_idx - 1]:
+                write(f'{i4}</tbody>{nl}{i4}<tbody hidden>{nl}')
+                chunk_size = 0
+            chunk_size += 1
+
+            write(f'{i6}<tr>{nl}')
+            grid_before = row.get('grid_before', 0)
+            if grid_before:
+                write(f'{i8}<td colspan="{grid_before}"></td>{nl}' if grid_before > 1 else f'{i8}<td></td>{nl}')
+            for cell_idx, cell in enumerate(row['cells']):
+                key = (row_idx, cell_idx)
+                if key in merged:
+                    continue
+                attrs = _cell_attrs(key, cell.get('span', 1), rowspans)
+                write(f'{i8}<td{attrs}>{_cell_text(cell).strip()}</td>{nl}')
+            write(f'{i6}</tr>{nl}')
+        write(f'{i4}</tbody>{nl}')
+
+    write(f'{i2}</table>{nl}')
+    if chunked:
+        write(f'{i2}<button type="button" class="table-more">显示更多（共 {body_rows} 行）</button>{nl}')
+    write('</div>')
+    return chunked
+
+def convert_table_to_html(table, chunk_rows=0, minify=False):
+    """将Word表格转换为HTML表格"""
+    parts = []
+    write_table_html(table, parts.append, chunk_rows, minify)
+    return ''.join(parts)
+
+def _read_relationships(zf, rels_member, source_dir):
     """
-    将日期格式化为文件名友好的格式（YYYYMMDD）
+    读取 .rels 关系文件
 
-    Args:
-        date: 日期字符串（如 "2026年1月1日" 或 "2026-01-01"）
+    Returns:
+        [(关系ID, 关系类型, 包内目标路径), ...]，文件不存在时返回空列表
+    """
+    try:
+        data = zf.read(rels_member)
+    except KeyError:
+        return []
+
+    relationships = []
+    for rel in etree.fromstring(data).iter(RELS_RELATIONSHIP):
+        if rel.get('TargetMode') == 'External':
+            continue
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            member = target.lstrip('/')
+        else:
+            member = posixpath.normpath(posixpath.join(source_dir, target))
+        relationships.append((rel.get('Id'), rel.get('Type', ''), member))
+    return relationships
+
+def _find_docx_parts(zf):
+    """
+    定位主文档部件、样式部件和主文档引用的图片
 
     Returns:
-        格式化的日期字符串（如 "20260101"）
+        (document.xml 包内路径, styles.xml 包内路径或None, {图片关系ID: 包内路径})
     """
-    if not date:
-        # 默认使用当前月份的1日
-        now = datetime.now()
-        return f"{now.year}{now.month:02d}01"
+    document_member = 'word/document.xml'
+    for _, rel_type, member in _read_relationships(zf, '_rels/.rels', ''):
+        if rel_type.endswith('/officeDocument'):
+            document_member = member
+            break
 
-    # 匹配 "2026年1月1日" 或 "2026年01月01日"
-    match = re.match(r'(\d{4})年(\d{1,2})月(\d{1,2})日', date)
-    if match:
-        year, month, day = match.groups()
-        return f"{year}{month.zfill(2)}{day.zfill(2)}"
+    doc_dir, doc_name = posixpath.split(document_member)
+    rels_member = posixpath.join(doc_dir, '_rels', doc_name + '.rels')
+    styles_member = None
+    images = {}
+    for rel_id, rel_type, member in _read_relationships(zf, rels_member, doc_dir):
+        if rel_type.endswith('/styles'):
+            styles_member = styles_member or member
+        elif rel_type.endswith('/image'):
+            images[rel_id] = member
 
-    # 匹配 "2026-01-01"
-    match = re.match(r'(\d{4})-(\d{1,2})-(\d{1,2})', date)
-    if match:
-        year, month, day = match.groups()
-        return f"{year}{month.zfill(2)}{day.zfill(2)}"
+    return document_member, styles_member, images
 
-    # 无法解析，返回默认日期
-    return '19700101'
+# 图片输出到页面目录的 media/ 子目录，以内容哈希命名，不同文档中相同的图片只保存一份
+MEDIA_DIRNAME = 'media'
+MEDIA_HASH_LENGTH = 16
+MEDIA_CHUNK_SIZE = 64 * 1024
+# 浏览器可以直接显示的图片格式（EMF/WMF等矢量图元文件跳过）
+WEB_IMAGE_EXTENSIONS = frozenset(('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.svg'))
+# DrawingML 尺寸单位：每像素（96 DPI）914400 / 96 EMU
+EMU_PER_PIXEL = 9525
 
-def get_document_type_from_filename(filename):
+class MediaExtractor:
     """
-    根据HTML文件名识别文档类型
+    将docx中引用的图片从zip成员逐块流式写入 media/<内容哈希>.<扩展名>
 
-    Args:
-        filename: 文件名（不带扩展名）
+    先流式计算哈希，目标文件已存在（其他文档或上次转换已写出）时不再写入；
+    内存占用只与读取块大小有关，与图片大小无关。
+    """
+
+    def __init__(self, zf, images, media_dir):
+        self.zf = zf
+        self.images = images
+        self.media_dir = Path(media_dir)
+        self.names = {}
+
+    def _stream(self, info):
+        with self.zf.open(info) as src:
+            for chunk in iter(lambda: src.read(MEDIA_CHUNK_SIZE), b''):
+                yield chunk
+
+    def extract(self, rel_id):
+        """
+        输出关系ID对应的图片
+
+        Returns:
+            media/ 中的文件名；关系不存在、图片缺失或不是网页可显示的格式时返回None
+        """
+        member = self.images.get(rel_id)
+        if member is None:
+            return None
+        if member in self.names:
+            return self.names[member]
+
+        name = None
+        ext = posixpath.splitext(member)[1].lower()
+        try:
+            info = self.zf.getinfo(member)
+        except KeyError:
+            info = None
+        if info is not None and ext in WEB_IMAGE_EXTENSIONS:
+            digest = hashlib.sha256()
+            for chunk in self._stream(info):
+                digest.update(chunk)
+            name = f'{digest.hexdigest()[:MEDIA_HASH_LENGTH]}{ext}'
+            target = self.media_dir / name
+            if not target.exists():
+                self.media_dir.mkdir(exist_ok=True)
+                tmp_path = target.with_name(f'{name}.{os.getpid()}.tmp')
+                try:
+                    with open(tmp_path, 'wb') as dst:
+                        for chunk in self._stream(info):
+                            dst.write(chunk)
+                    os.replace(tmp_path, target)
+                except BaseException:
+                    tmp_path.unlink(missing_ok=True)
+                    raise
+        self.names[member] = name
+        return name
+
+    def files(self):
+        """本文档引用的 media/ 文件名（排序）"""
+        return sorted(name for name in self.names.values() if name)
+
+def _drawing_image(drawing, media):
+    """
+    读取 w:drawing 中的图片并输出到 media/
 
     Returns:
-        文档类型字符串（user-agreement, privacy-policy, children-privacy等）
+        图片run节点 {'text': '', 'image': 文件名, 'width', 'height', 'alt'}，不是图片或无法输出时返回None
     """
-    filename_lower = filename.lower()
+    blip = next(drawing.iter(A_BLIP), None)
+    if blip is None:
+        return None
+    name = media.extract(blip.get(R_EMBED))
+    if name is None:
+        return None
 
-    # 优先匹配明确的关键词
+    run = {'text': '', 'image': name}
+    extent = next(drawing.iter(WP_EXTENT), None)
+    if extent is not None:
+        try:
+            width = round(int(extent.get('cx', '0')) / EMU_PER_PIXEL)
+            height = round(int(extent.get('cy', '0')) / EMU_PER_PIXEL)
+        except ValueError:
+            width = height = 0
+        if width > 0 and height > 0:
+            run['width'] = width
+            run['height'] = height
+    doc_pr = next(drawing.iter(WP_DOC_PR), None)
+    if doc_pr is not None:
+        alt = doc_pr.get('descr') or doc_pr.get('title')
+        if alt:
+            run['alt'] = alt
+    return run
+
+def read_paragraph_style_names(zf, styles_member):
+    """
+    读取段落样式 styleId → 样式名称 的映射（与 python-docx 的 para.style.name 一致）
+
+    Returns:
+        (样式映射字典, 默认段落样式名称)
+    """
+    from docx.styles import BabelFish
+
+    style_names = {}
+    default_name = 'Normal'
+    if not styles_member:
+        return style_names, default_name
+
+    try:
+        root = etree.fromstring(zf.read(styles_member))
+    except KeyError:
+        return style_names, default_name
+
+    for style in root.iter(W_STYLE):
+        if style.get(W_TYPE) != 'paragraph':
+            continue
+        name_elem = style.find(W_NAME)
+        name = name_elem.get(W_VAL) if name_elem is not None else None
+        name = BabelFish.internal2ui(name) if name is not None else ''
+        style_names.setdefault(style.get(W_STYLE_ID), name)
+        # 规范要求取文档顺序中最后一个默认样式
+        if style.get(W_DEFAULT) in ('1', 'true', 'on'):
+            default_name = name
+
+    return style_names, default_name
+
+def _make_body_parser():
+    """创建只关注段落和表格结束事件的增量XML解析器"""
+    return etree.XMLPullParser(events=('end',), tag=(W_P, W_TBL),
+                               remove_blank_text=True, resolve_entities=False)
+
+def iter_body_elements(docx_path, media_dir=None):
+    """
+    流式遍历document.xml中body下的段落和表格元素
+
+    逐块解析XML，每个顶层元素处理完后即从树中移除，
+    内存占用只与最大的单个元素有关，而非整个文档。
+
+    Args:
+        docx_path: Word文件路径
+        media_dir: 图片输出目录，为None时不提取图片
+
+    Yields:
+        (元素, 段落样式映射, 默认段落样式名称, 图片提取器或None)
+    """
+    load_dependencies()
+    with zipfile.ZipFile(docx_path) as zf:
+        document_member, styles_member, images = _find_docx_parts(zf)
+        media = MediaExtractor(zf, images, media_dir) if media_dir is not None else None
+        with profile_stage('styles'):
+            style_names, default_style = read_paragraph_style_names(zf, styles_member)
+
+        parser = _make_body_parser()
+        with zf.open(document_member) as stream:
+            read, feed = stream.read, parser.feed
+            if _profiler is not None:
+                read = _profiler.wrap('unzip', read)
+                feed = _profiler.wrap('xml_parse', feed)
+
+            while True:
+                chunk = read(XML_CHUNK_SIZE)
+                if chunk:
+                    feed(chunk)
+                else:
+                    parser.close()
+
+                for _, element in parser.read_events():
+                    parent = element.getparent()
+                    # 只处理body的直接子元素，嵌套在表格中的段落随表格一起处理
+                    if parent is None or parent.tag != W_BODY:
+                        continue
+                    yield element, style_names, default_style, media
+                    # 释放已处理的元素
+                    element.clear()
+                    while element.getprevious() is not None:
+                        del parent[0]
+
+                if not chunk:
+                    break
+
+def iter_document_blocks(docx_path, meta=None, classifier=None, extract_media=True):
+    """
+    单次遍历Word文档，边解析边识别标题和生效日期，逐个产出中间表示的块节点
+
+    Args:
+        docx_path: Word文件路径
+        meta: 可选字典，遍历过程中写入 'title' 和 'date'；
+              标题在第一个非空段落处确定，遍历结束后保证存在；
+              遍历结束后写入 'media'（本文档引用的 media/ 文件名列表）
+        classifier: 标题识别器（默认使用内置规则）
+        extract_media: 是否将段落中的图片输出到文档目录的 media/ 子目录
+
+    Yields:
+        段落节点 {'type': 'paragraph', 'style', 'level', 'runs'} 或表格节点（见 table_to_ir）
+    """
+    if meta is None:
+        meta = {}
+    meta.setdefault('title', None)
+    meta.setdefault('date', None)
+
+    if classifier is None:
+        classifier = _default_heading_classifier
+
+    # 热路径函数只在这里绑定一次，启用分析时替换为计时包装
+    walk, classify, parse_date = paragraph_runs, classifier.classify, parse_effective_date
+    walk_table = table_to_ir
+    if _profiler is not None:
+        walk = _profiler.wrap('paragraph_walk', walk)
+        classify = _profiler.wrap('heading_classification', classify)
+        parse_date = _profiler.wrap('title_detection', parse_date)
+        walk_table = _profiler.wrap('table_walk', walk_table)
+
+    title_found = False
+    date_found = False
+    media = None
+    media_dir = Path(docx_path).parent / MEDIA_DIRNAME if extract_media else None
+
+    for element, style_names, default_style, media in iter_body_elements(docx_path, media_dir):
+        if element.tag == W_P:
+            # 处理段落，一次遍历得到run节点
+            runs = walk(element, media)
+            plain_text = runs_plain_text(runs)
+            text = plain_text.strip()
+
+            if not text:
+                # 只有图片的段落（如二维码）按普通段落输出
+                if any('image' in run for run in runs):
+                    style_id = paragraph_style_id(element)
+                    style_name = style_names.get(style_id, default_style) if style_id else default_style
+                    yield {'type': 'paragraph', 'style': style_name, 'level': 0, 'runs': runs}
+                continue
+
+            # 第一个非空段落即标题，跳过
+            if not title_found:
+                title_found = True
+                meta['title'] = text
+                if meta['date'] is None and "生效日期" in text:
+                    meta['date'] = parse_date(text)
+                continue
+
+            # 跳过生效日期段落
+            if not date_found and ("生效日期" in plain_text or text == meta['date']):
+                date_found = True
+                if meta['date'] is None:
+                    meta['date'] = parse_date(text)
+                continue
+
+            style_id = paragraph_style_id(element)
+            style_name = style_names.get(style_id, default_style) if style_id else default_style
+
+            # 识别标题级别
+            yield {
+                'type': 'paragraph',
+                'style': style_name,
+                'level': classify(plain_text, style_name),
+                'runs': runs,
+            }
+
+        else:
+            yield walk_table(element)
+
+    # 如果没有提取到标题，使用文件名
+    if not meta['title']:
+        meta['title'] = Path(docx_path).stem
+    meta['media'] = media.files() if media is not None else []
+
+def iter_block_content(blocks, table_chunk_rows=0):
+    """
+    将中间表示的块节点渲染为内容项（不依赖 python-docx/lxml）
+
+    表格项只携带表格节点，由页面写出时逐行写入输出文件（见 PageBody），
+    不在内存中生成整个表格的HTML。
+
+    Args:
+        blocks: 块节点的可迭代对象
+        table_chunk_rows: 大表格表体分块的行数，0 表示不分块
+
+    Yields:
+        内容项字典：段落 {'type': 'paragraph', 'text', 'plain_text', 'style', 'level'}，
+        表格 {'type': 'table', 'table': 表格节点, 'chunk_rows': 分块行数}
+    """
+    render_paragraph = render_runs
+    if _profiler is not None:
+        render_paragraph = _profiler.wrap('paragraph_render', render_paragraph)
+
+    for block in blocks:
+        if block['type'] == 'paragraph':
+            runs = block['runs']
+            yield {
+                'type': 'paragraph',
+                'text': render_paragraph(runs),
+                'plain_text': runs_plain_text(runs),
+                'style': block['style'],
+                'level': block['level'],
+            }
+
+        else:
+            yield {
+                'type': 'table',
+                'table': block,
+                'chunk_rows': table_chunk_rows,
+            }
+
+def iter_docx_content(docx_path, meta=None, classifier=None, table_chunk_rows=0):
+    """
+    单次遍历Word文档，边解析边识别标题和生效日期，逐个产出内容项
+
+    Args:
+        docx_path: Word文件路径
+        meta: 可选字典，遍历过程中写入 'title' 和 'date'；
+              标题在第一个非空段落处确定，遍历结束后保证存在
+        classifier: 标题识别器（默认使用内置规则）
+        table_chunk_rows: 大表格表体分块的行数，0 表示不分块
+
+    Yields:
+        内容项字典（见 iter_block_content）
+    """
+    blocks = iter_document_blocks(docx_path, meta, classifier)
+    return iter_block_content(blocks, table_chunk_rows)
+
+def _with_table_html(content, minify=False):
+    """为表格项补上渲染好的 html 和 chunked（旧接口返回的内容项列表）"""
+    for item in content:
+        if item['type'] == 'table':
+            parts = []
+            item['chunked'] = write_table_html(item['table'], parts.append, item['chunk_rows'], minify)
+            item['html'] = ''.join(parts)
+        yield item
+
+def extract_text_from_docx(docx_path, classifier=None, table_chunk_rows=0, minify=False):
+    """
+    严格提取Word文档的所有内容，不修改任何文字，并保留加粗格式
+
+    保留原有的 (内容项列表, 标题, 生效日期) 接口，会把整个文档的内容项和表格HTML保存在内存中；
+    转换流程直接把 iter_docx_content 生成器交给 generate_html 流式写出。
+    """
+    meta = {}
+    content = list(_with_table_html(iter_docx_content(docx_path, meta, classifier, table_chunk_rows), minify))
+    return content, meta['title'], meta['date']
+
+# 中间表示（IR）：段落/表格/内联run节点及标题级别，可缓存在docx旁边，
+# 重新渲染（换选项、换模板）时直接读取，不再加载 python-docx/lxml 解析docx
+IR_FORMAT = 'h5-agreement-ir'
+IR_VERSION = 2
+IR_CACHE_FORMATS = ('auto', 'json', 'msgpack')
+
+def _msgpack_module():
+    """返回 msgpack 模块，未安装时返回None"""
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+def resolve_ir_format(fmt):
+    """将 auto 解析为具体的序列化格式：安装了 msgpack 时使用 msgpack，否则使用JSON"""
+    if fmt == 'auto':
+        return 'msgpack' if _msgpack_module() is not None else 'json'
+    return fmt
+
+def heading_rules_hash(rule_files=None):
+    """标题规则文件内容的哈希（标题级别依赖规则），未使用自定义规则时返回None"""
+    if not rule_files:
+        return None
+    digest = hashlib.sha256()
+    for rules_path in rule_files:
+        try:
+            digest.update(Path(rules_path).read_bytes())
+        except OSError:
+            pass
+    return digest.hexdigest()
+
+def build_document_ir(docx_path, classifier=None, docx_hash=None, rules_hash=None, extract_media=True):
+    """
+    解析Word文档，生成带版本的中间表示
+
+    Args:
+        docx_path: Word文件路径
+        classifier: 标题识别器（默认使用内置规则）
+        docx_hash: 文档内容的SHA-256，用于判断缓存是否过期
+        rules_hash: 标题规则的哈希（见 heading_rules_hash）
+        extract_media: 是否将图片输出到文档目录的 media/ 子目录
+
+    Returns:
+        IR字典：format、version、converter、source、heading_rules、title、date、
+        media（引用的 media/ 文件名）、blocks（块节点列表，见 iter_document_blocks）
+    """
+    meta = {}
+    blocks = list(iter_document_blocks(docx_path, meta, classifier, extract_media))
+    return {
+        'format': IR_FORMAT,
+        'version': IR_VERSION,
+        'converter': CONVERTER_VERSION,
+        'source': {'name': Path(docx_path).name, 'sha256': docx_hash},
+        'heading_rules': rules_hash,
+        'title': meta['title'],
+        'date': meta['date'],
+        'media': meta['media'],
+        'blocks': blocks,
+    }
+
+def ir_cache_path(docx_path, fmt='json'):
+    """docx旁边的中间表示缓存文件路径（隐藏文件 .<文件名>.h5-ir.json / .msgpack）"""
+    docx_path = Path(docx_path)
+    return docx_path.with_name(f'.{docx_path.stem}.h5-ir.{fmt}')
+
+def dump_ir(ir, path):
+    """按文件扩展名将中间表示原子写入为紧凑JSON或msgpack"""
+    path = Path(path)
+    if path.suffix == '.msgpack':
+        msgpack = _msgpack_module()
+        if msgpack is None:
+            raise ValueError("未安装 msgpack，请运行: pip install msgpack")
+        data = msgpack.packb(ir, use_bin_type=True)
+    else:
+        data = json.dumps(ir, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    _write_bytes_atomic(path, data)
+
+def load_ir(path):
+    """
+    读取中间表示文件（按扩展名识别JSON或msgpack）
+
+    Raises:
+        OSError: 文件无法读取
+        ValueError: 内容损坏、不是中间表示或版本不符
+    """
+    path = Path(path)
+    data = path.read_bytes()
+    if path.suffix == '.msgpack':
+        msgpack = _msgpack_module()
+        if msgpack is None:
+            raise ValueError("未安装 msgpack，请运行: pip install msgpack")
+        try:
+            ir = msgpack.unpackb(data, raw=False)
+        except Exception as e:
+            raise ValueError(f"{path} 不是有效的msgpack: {e}")
+    else:
+        ir = json.loads(data.decode('utf-8'))
+    if not isinstance(ir, dict) or ir.get('format') != IR_FORMAT:
+        raise ValueError(f"{path} 不是中间表示文件")
+    if ir.get('version') != IR_VERSION:
+        raise ValueError(f"{path} 的中间表示版本 {ir.get('version')} 不受支持（当前为 {IR_VERSION}）")
+    return ir
+
+def load_cached_ir(docx_path, fmt, docx_hash, rules_hash):
+    """
+    读取docx旁边缓存的中间表示
+
+    文档内容、转换器版本和标题规则均未变化、且引用的图片仍在 media/ 中时才有效。
+
+    Returns:
+        IR字典，缓存不存在、损坏或过期时返回None
+    """
+    try:
+        ir = load_ir(ir_cache_path(docx_path, fmt))
+    except (OSError, ValueError):
+        return None
+    if (ir.get('converter') != CONVERTER_VERSION or
+            (ir.get('source') or {}).get('sha256') != docx_hash or
+            ir.get('heading_rules') != rules_hash):
+        return None
+    media_dir = Path(docx_path).parent / MEDIA_DIRNAME
+    if not all((media_dir / name).is_file() for name in ir.get('media', ())):
+        return None
+    return ir
+
+def get_document_ir(docx_path, fmt='json', classifier=None, docx_hash=None, rule_files=None):
+    """
+    读取docx旁边缓存的中间表示，缓存缺失或过期时解析docx并写回缓存
+
+    命中缓存时完全不加载 python-docx。
+
+    Returns:
+        (IR字典, 是否命中缓存)
+    """
+    if docx_hash is None:
+        docx_hash = file_sha256(docx_path)
+    rules_hash = heading_rules_hash(rule_files)
+    ir = load_cached_ir(docx_path, fmt, docx_hash, rules_hash)
+    if ir is not None:
+        return ir, True
+
+    cache_path = ir_cache_path(docx_path, fmt)
+    ir = build_document_ir(docx_path, classifier, docx_hash, rules_hash)
+    try:
+        dump_ir(ir, cache_path)
+    except OSError:
+        # 文档目录只读时不缓存，不影响本次转换
+        pass
+    return ir, False
+
+def render_ir_content(ir, table_chunk_rows=0, minify=False):
+    """
+    将中间表示渲染为内容项，结果与 extract_text_from_docx 相同
+
+    转换流程直接使用 iter_block_content 流式写出，不调用本函数。
+
+    Returns:
+        (内容项列表, 标题, 生效日期)
+    """
+    content = list(_with_table_html(iter_block_content(ir['blocks'], table_chunk_rows), minify))
+    return content, ir['title'], ir['date']
+
+# 样式名称中的标题样式（优先于文本规则）
+HEADING_STYLE_LEVELS = (
+    ('Heading 1', 1),
+    ('Heading 2', 2),
+    ('Heading 3', 3),
+    ('Heading 4', 4),
+    ('Heading 5', 5),
+    ('Heading 6', 6),
+)
+
+HeadingRule = namedtuple('HeadingRule', [
+    'level',       # 命中时返回的级别（0 表示普通段落）
+    'pattern',     # 文本须匹配的正则（re.match），None 表示不限
+    'text',        # 文本须完全相等，None 表示不限
+    'style',       # 样式名称须包含的子串，None 表示不限
+    'min_length',  # 文本最小长度（含），None 表示不限
+    'max_length',  # 文本最大长度（含），None 表示不限
+    'forbid',      # 文本中不得出现的字符（正则 search），None 表示不限
+    'exclude',     # 文本不得匹配的正则（re.match），None 表示不限
+], defaults=(None,) * 7)
+
+# 内置文本规则，按顺序匹配，第一个命中的规则决定级别
+DEFAULT_HEADING_RULES = (
+    # 识别主标题（序号格式：一、二、三、）
+    HeadingRule(2, pattern=re.compile(r'^[一二三四五六七八九十]+、')),
+    # 识别主标题（序号格式：1.、2.、3.、4.、等，注意：不包含 "x.x" 格式）
+    HeadingRule(2, pattern=re.compile(r'^\d+\.\s+[^\d]')),
+    # 处理 List Paragraph 样式（通常是一级标题）
+    # 但是：如果以【】开头且长度较短，可能是段落而非标题
+    HeadingRule(0, style='List Paragraph', pattern=re.compile(r'^【')),
+    HeadingRule(0, style='List Paragraph', min_length=50),
+    HeadingRule(2, style='List Paragraph'),
+    # 识别子标题（序号格式：2.1、3.1、8.1、等）
+    # 注意：需要区分子标题和段落编号（如 "9.1 ...长文本..."）
+    # 规则：如果文本长度 <= 30，认为是子标题（h3）；否则是段落（p）
+    HeadingRule(3, pattern=re.compile(r'^(\d+\.\d+)\s+'), max_length=30),
+    # 识别列表标题（序号格式：1、2、3、）
+    HeadingRule(3, pattern=re.compile(r'^\d+、')),
+    # 特殊标题：权限申请使用
+    HeadingRule(3, text='权限申请使用'),
+    # 识别独立的小标题（需要更严格的条件，避免误判列表项为标题）
+    # 排除列表项（如"（1）..."、"1、..."、"·..."、"—..."、"【"等）和带标点的句子
+    HeadingRule(2, max_length=29,
+                forbid=re.compile(r'[。！？；，]'),
+                exclude=re.compile(r'^(?:[（\(【\[]|\d+、|\d+\.|·|—|-)')),
+)
+
+def _compile_rule_pattern(value, field, source):
+    """编译规则文件中的正则，出错时给出规则文件位置"""
+    if value is None:
+        return None
+    try:
+        return re.compile(value)
+    except (re.error, TypeError) as e:
+        raise ValueError(f"标题规则文件 {source} 中的 {field} 不是有效的正则表达式: {value!r} ({e})")
+
+def load_heading_rules(rules_path):
+    """
+    读取用户自定义的标题规则文件（JSON）
+
+    文件格式为规则数组，或 {"rules": [...]}。每条规则的字段：
+    level（必填）、pattern、text、style、min_length、max_length、
+    forbid_chars（不得出现的字符集合）、exclude（不得匹配的正则）。
+
+    Returns:
+        HeadingRule 列表
+    """
+    try:
+        data = json.loads(Path(rules_path).read_text(encoding='utf-8'))
+    except OSError as e:
+        raise ValueError(f"无法读取标题规则文件 {rules_path}: {e}")
+    except ValueError as e:
+        raise ValueError(f"标题规则文件 {rules_path} 不是有效的JSON: {e}")
+
+    if isinstance(data, dict):
+        data = data.get('rules')
+    if not isinstance(data, list):
+        raise ValueError(f"标题规则文件 {rules_path} 应为规则数组或包含 rules 数组的对象")
+
+    rules = []
+    for index, item in enumerate(data):
+        source = f"{rules_path}#{index}"
+        if not isinstance(item, dict) or not isinstance(item.get('level'), int) \
+                or not 0 <= item['level'] <= 6:
+            raise ValueError(f"标题规则文件 {source}: 每条规则必须包含 0-6 的整数 level")
+        forbid_chars = item.get('forbid_chars')
+        rules.append(HeadingRule(
+            item['level'],
+            pattern=_compile_rule_pattern(item.get('pattern'), 'pattern', source),
+            text=item.get('text'),
+            style=item.get('style'),
+            min_length=item.get('min_length'),
+            max_length=item.get('max_length'),
+            forbid=re.compile('[' + re.escape(forbid_chars) + ']') if forbid_chars else None,
+            exclude=_compile_rule_pattern(item.get('exclude'), 'exclude', source),
+        ))
+    return rules
+
+class HeadingClassifier:
+    """
+    表驱动的标题级别识别
+
+    样式名称只解析一次：每个样式名称对应的标题样式级别和适用的规则子集会被缓存，
+    之后每个段落只需按顺序匹配预编译的规则。
+    """
+
+    def __init__(self, extra_rules=None):
+        # 用户规则优先于内置规则
+        self.rules = tuple(extra_rules or ()) + DEFAULT_HEADING_RULES
+        self._style_cache = {}
+
+    def compile_style(self, style_name):
+        """
+        返回样式对应的 (标题样式级别或None, 适用规则元组)，结果按样式名称缓存
+        """
+        compiled = self._style_cache.get(style_name)
+        if compiled is None:
+            style_name = style_name or ''
+            style_level = None
+            for name, level in HEADING_STYLE_LEVELS:
+                if name in style_name:
+                    style_level = level
+                    break
+            rules = tuple(r for r in self.rules if r.style is None or r.style in style_name)
+            compiled = (style_level, rules)
+            self._style_cache[style_name] = compiled
+        return compiled
+
+    def classify(self, text, style_name):
+        """根据样式名称和段落文本返回标题级别（0 表示普通段落）"""
+        style_level, rules = self.compile_style(style_name)
+
+        # 优先使用样式名称
+        if style_level is not None:
+            return style_level
+
+        # 根据文本内容智能识别
+        text = text.strip()
+        length = len(text)
+        for rule in rules:
+            if rule.text is not None and text != rule.text:
+                continue
+            if rule.min_length is not None and length < rule.min_length:
+                continue
+            if rule.max_length is not None and length > rule.max_length:
+                continue
+            if rule.pattern is not None and not rule.pattern.match(text):
+                continue
+            if rule.forbid is not None and rule.forbid.search(text):
+                continue
+            if rule.exclude is not None and rule.exclude.match(text):
+                continue
+            return rule.level
+
+        return 0  # 普通段落
+
+_default_heading_classifier = HeadingClassifier()
+
+_heading_classifiers = {}
+
+def _file_signature(path):
+    """文件的 (修改时间, 大小)，文件不存在时返回None；用于判断进程内缓存是否过期"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def get_heading_classifier(rule_files=None):
+    """
+    获取标题识别器，相同的规则文件组合在进程内只加载一次
+
+    规则文件的修改时间或大小变化后重新加载（常驻服务中修改规则文件无需重启）。
+
+    Args:
+        rule_files: 用户规则文件路径列表，按顺序优先
+    """
+    if not rule_files:
+        return _default_heading_classifier
+    key = tuple(str(p) for p in rule_files)
+    signature = tuple(_file_signature(p) for p in key)
+    cached = _heading_classifiers.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    extra_rules = []
+    for rules_path in key:
+        extra_rules.extend(load_heading_rules(rules_path))
+    classifier = HeadingClassifier(extra_rules)
+    _heading_classifiers[key] = (signature, classifier)
+    return classifier
+
+def get_heading_level(para, text, style_name=None, classifier=None):
+    """
+    智能获取标题级别
+
+    Args:
+        para: 段落对象
+        text: 段落纯文本
+        style_name: 段落样式名称；为None时从 para.style 读取
+        classifier: 标题识别器（默认使用内置规则）
+    """
+    if style_name is None:
+        style_name = para.style.name
+    return (classifier or _default_heading_classifier).classify(text, style_name)
+
+def number_to_chinese(num):
+    """将数字转换为中文序号（支持1-100+）"""
+    if num <= 10:
+        mapping = {
+            1: '一', 2: '二', 3: '三', 4: '四', 5: '五',
+            6: '六', 7: '七', 8: '八', 9: '九', 10: '十'
+        }
+        return mapping[num]
+    elif num < 20:
+        return '十' + number_to_chinese(num - 10) if num > 10 else '十'
+    elif num < 100:
+        tens = num // 10
+        units = num % 10
+        result = number_to_chinese(tens) + '十'
+        if units > 0:
+            result += number_to_chinese(units)
+        return result
+    else:
+        return str(num)
+
+# 标题序号格式
+CHINESE_NUM_PREFIX = re.compile(r'^[一二三四五六七八九十]+、')
+DIGIT_NUM_PREFIX = re.compile(r'^\d+\.\s')
+CHINESE_NUM_TITLE = re.compile(r'^[一二三四五六七八九十]+、\s*(.+)$')
+DIGIT_NUM_TITLE = re.compile(r'^\d+\.\s+(.+)$')
+
+def fix_heading_numbers(content):
+    """
+    智能修复标题序号，确保连续性和一致性
+
+    处理以下情况：
+    1. 第一个标题缺少序号（如"个人信息的收集和使用"，但后面是"2. 信息的存储"）
+    2. 序号不连续（如1, 3, 4）
+    3. 序号格式不一致（部分有中文序号"一、"，部分有数字序号"1."）
+    4. 根据文档主要使用的序号格式进行统一和补齐
+    """
+    # 只处理段落类型的content，跳过表格类型
+    h2_items = [item for item in content if item.get('type') == 'paragraph' and item.get('level') == 2]
+
+    if len(h2_items) < 2:
+        return content  # 标题太少，无需修复
+
+    # 统计序号格式（使用plain_text进行匹配）
+    has_chinese_num = 0
+    has_digit_num = 0
+    has_no_num = 0
+
+    for item in h2_items:
+        text = item['plain_text'].strip()  # 使用纯文本进行匹配
+        if CHINESE_NUM_PREFIX.match(text):
+            has_chinese_num += 1
+        elif DIGIT_NUM_PREFIX.match(text):
+            has_digit_num += 1
+        else:
+            has_no_num += 1
+
+    # 决定使用哪种序号格式
+    # 如果中文序号更多，使用中文序号；否则使用数字序号
+    use_chinese = has_chinese_num > has_digit_num and has_chinese_num > 0
+    use_digit = has_digit_num >= has_chinese_num and has_digit_num > 0
+
+    # 如果两种序号都有，按数量多的一方为准
+    # 如果都没有序号，默认使用数字序号
+    if not use_chinese and not use_digit:
+        use_digit = True
+
+    # 根据选择的格式统一和补齐序号
+    for i, item in enumerate(h2_items):
+        plain_text = item['plain_text'].strip()  # 使用纯文本提取序号
+        formatted_text = item['text']  # 使用带格式的文本
+        num = i + 1
+
+        # 提取标题文本（去掉已有序号）
+        title_text = None
+
+        # 尝试匹配中文序号
+        match_cn = CHINESE_NUM_TITLE.match(plain_text)
+        if match_cn:
+            title_text = match_cn.group(1)
+        else:
+            # 尝试匹配数字序号
+            match_digit = DIGIT_NUM_TITLE.match(plain_text)
+            if match_digit:
+                title_text = match_digit.group(1)
+            else:
+                # 没有序号，直接使用带格式的全文
+                title_text = formatted_text
+
+        # 根据选择的格式设置序号（保留带格式的标题文本）
+        if use_chinese:
+            cn_num = number_to_chinese(num)
+            item['text'] = f"{cn_num}、{title_text}"
+        elif use_digit:
+            item['text'] = f"{num}. {title_text}"
+
+    return content
+
+def generate_english_filename(title, date):
+    """
+    根据标题和生效日期生成英文文件名
+
+    Args:
+        title: 文档标题（中文）
+        date: 生效日期（如 "2026年1月1日" 或 "2026-01-01"）
+
+    Returns:
+        英文文件名（如 "privacy-policy-20260101.html"）
+    """
+    # 根据标题判断协议类型
+    title_lower = title.lower()
+
+    if '隐私' in title and '儿童' in title:
+        english_name = 'children-privacy'
+    elif '隐私' in title:
+        english_name = 'privacy-policy'
+    elif '用户' in title and ('协议' in title or '服务' in title):
+        english_name = 'user-agreement'
+    else:
+        # 默认使用 document
+        english_name = 'document'
+
+    # 格式化日期
+    date_str = format_date_for_filename(date)
+
+    return f"{english_name}-{date_str}.html"
+
+def format_date_for_filename(date):
+    """
+    将日期格式化为文件名友好的格式（YYYYMMDD）
+
+    Args:
+        date: 日期字符串（如 "2026年1月1日" 或 "2026-01-01"）
+
+    Returns:
+        格式化的日期字符串（如 "20260101"）
+    """
+    if not date:
+        # 默认使用当前月份的1日
+        now = datetime.now()
+        return f"{now.year}{now.month:02d}01"
+
+    # 匹配 "2026年1月1日" 或 "2026年01月01日"
+    match = re.match(r'(\d{4})年(\d{1,2})月(\d{1,2})日', date)
+    if match:
+        year, month, day = match.groups()
+        return f"{year}{month.zfill(2)}{day.zfill(2)}"
+
+    # 匹配 "2026-01-01"
+    match = re.match(r'(\d{4})-(\d{1,2})-(\d{1,2})', date)
+    if match:
+        year, month, day = match.groups()
+        return f"{year}{month.zfill(2)}{day.zfill(2)}"
+
+    # 无法解析，返回默认日期
+    return '19700101'
+
+def get_document_type_from_filename(filename):
+    """
+    根据HTML文件名识别文档类型
+
+    Args:
+        filename: 文件名（不带扩展名）
+
+    Returns:
+        文档类型字符串（user-agreement, privacy-policy, children-privacy等）
+    """
+    filename_lower = filename.lower()
+
+    # 优先匹配明确的关键词
     if 'user-agreement' in filename_lower or '用户协议' in filename_lower:
         return 'user-agreement'
     elif 'privacy-policy' in filename_lower or '隐私协议' in filename_lower:
@@ -464,582 +1619,2829 @@ def get_document_type_from_filename(filename):
     elif 'document' in filename_lower:
         return 'document'
     else:
-        # 默认使用user-agreement
-        return 'user-agreement'
+        # 默认使用user-agreement
+        return 'user-agreement'
+
+# footer链接索引文件（位于输出目录），记录目录中的HTML文件及其文档类型
+FOOTER_INDEX_FILENAME = '.h5-index.json'
+FOOTER_INDEX_FORMAT = 1
+
+# 文档类型到显示名称的映射
+DOC_TYPE_NAMES = {
+    'user-agreement': '用户协议',
+    'privacy-policy': '隐私协议',
+    'children-privacy': '儿童隐私保护',
+    'document': '第三方清单',
+}
+
+# footer链接的固定顺序：用户协议、隐私协议、儿童隐私、其他
+DOC_TYPE_ORDER = ['user-agreement', 'privacy-policy', 'children-privacy', 'document']
+
+def _html_version_key(name, info):
+    """
+    同类型文档中选择最新版本的排序键：优先比较文件名中的生效日期（YYYYMMDD），
+    再比较写入时间，结果与文件的生成顺序无关
+    """
+    match = re.search(r'(\d{8})$', Path(name).stem)
+    return (match.group(1) if match else '', info.get('mtime', 0), name)
+
+def latest_html_by_type(files):
+    """
+    从索引的文件表中选出每种文档类型的最新文件
+
+    Args:
+        files: {HTML文件名: {'type': 文档类型, 'mtime': 写入时间}}
+
+    Returns:
+        {文档类型: HTML文件名}
+    """
+    latest = {}
+    for name, info in files.items():
+        doc_type = info.get('type') or get_document_type_from_filename(Path(name).stem)
+        current = latest.get(doc_type)
+        if current is None or _html_version_key(name, info) > _html_version_key(current, files[current]):
+            latest[doc_type] = name
+    return latest
+
+def load_footer_index(dir_path):
+    """
+    读取目录的footer链接索引
+
+    Returns:
+        文件表字典；索引不存在或格式不符时返回None
+    """
+    index_path = Path(dir_path) / FOOTER_INDEX_FILENAME
+    try:
+        data = json.loads(index_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get('format') != FOOTER_INDEX_FORMAT:
+        return None
+    files = data.get('files')
+    return files if isinstance(files, dict) else None
+
+def save_footer_index(dir_path, files):
+    """原子写入footer链接索引（先写临时文件再替换）"""
+    index_path = Path(dir_path) / FOOTER_INDEX_FILENAME
+    tmp_path = index_path.with_name(f'{FOOTER_INDEX_FILENAME}.{os.getpid()}.tmp')
+    data = {
+        'format': FOOTER_INDEX_FORMAT,
+        'latest': latest_html_by_type(files),
+        'files': files,
+    }
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True), encoding='utf-8')
+    os.replace(tmp_path, index_path)
+
+def rebuild_footer_index(dir_path):
+    """
+    扫描目录中的HTML文件重建footer链接索引（索引丢失或与磁盘不一致时使用）
+
+    Returns:
+        重建后的文件表
+    """
+    files = {}
+    for html_file in Path(dir_path).glob("*.html"):
+        files[html_file.name] = {
+            'type': get_document_type_from_filename(html_file.stem),
+            'mtime': html_file.stat().st_mtime,
+        }
+    save_footer_index(dir_path, files)
+    return files
+
+def update_footer_index(dir_path, html_names):
+    """
+    将新写入的HTML文件登记到目录索引中（索引不存在时从磁盘重建）
+
+    Args:
+        dir_path: 输出目录
+        html_names: 新写入的HTML文件名列表
+    """
+    dir_path = Path(dir_path)
+    files = load_footer_index(dir_path)
+    if files is None:
+        rebuild_footer_index(dir_path)
+        return
+    for name in html_names:
+        files[name] = {
+            'type': get_document_type_from_filename(Path(name).stem),
+            'mtime': (dir_path / name).stat().st_mtime,
+        }
+    save_footer_index(dir_path, files)
+
+def get_footer_links(docx_path):
+    """
+    根据目录的HTML文件索引动态生成footer链接
+
+    索引不存在时扫描一次目录重建，之后只读取索引文件，不再逐个 stat HTML 文件。
+
+    Args:
+        docx_path: Word文件路径
+
+    Returns:
+        footer链接HTML字符串
+    """
+    dir_path = Path(docx_path).parent
+
+    files = load_footer_index(dir_path)
+    if files is None:
+        files = rebuild_footer_index(dir_path)
+    return build_footer_links(files)
+
+def build_footer_links(files):
+    """
+    根据索引文件表生成footer链接HTML
+
+    Args:
+        files: 索引文件表（文件名 -> {'type', 'mtime'}）
+
+    Returns:
+        footer链接HTML字符串
+    """
+    # 按文档类型分组，只保留最新的版本（如果有多个日期版本）
+    latest_files = latest_html_by_type(files)
+
+    # 按照固定顺序排序：用户协议、隐私协议、儿童隐私、其他
+    sorted_links = []
+    for doc_type in DOC_TYPE_ORDER:
+        if doc_type in latest_files:
+            label = DOC_TYPE_NAMES[doc_type]
+            sorted_links.append(f'          <a href="./{latest_files[doc_type]}">{label}</a>\n')
+
+    # 添加其他类型
+    for doc_type, html_name in latest_files.items():
+        if doc_type not in DOC_TYPE_ORDER:
+            label = DOC_TYPE_NAMES.get(doc_type, Path(html_name).stem)
+            sorted_links.append(f'          <a href="./{html_name}">{label}</a>\n')
+
+    return ''.join(sorted_links)
+
+# 分块表格的逐块显示脚本：滚动到"显示更多"按钮附近或点击按钮时显示下一块
+TABLE_CHUNK_JS = """          document.addEventListener('DOMContentLoaded', function () {
+            document.querySelectorAll('.table-chunked').forEach(function (wrapper) {
+              var button = wrapper.querySelector('.table-more');
+              if (!button) return;
+              var observer = null;
+              function showNext() {
+                var chunk = wrapper.querySelector('tbody[hidden]');
+                if (chunk) chunk.hidden = false;
+                if (!wrapper.querySelector('tbody[hidden]')) {
+                  if (observer) observer.disconnect();
+                  button.remove();
+                } else if (observer) {
+                  // 重新观察，按钮仍在可视范围内时继续加载
+                  observer.unobserve(button);
+                  observer.observe(button);
+                }
+              }
+              button.addEventListener('click', showNext);
+              if ('IntersectionObserver' in window) {
+                observer = new IntersectionObserver(function (entries) {
+                  if (entries[0].isIntersecting) showNext();
+                }, { rootMargin: '600px 0px' });
+                observer.observe(button);
+              }
+            });
+          });
+"""
+
+TABLE_CHUNK_SCRIPT = '        <script>\n' + TABLE_CHUNK_JS + '        </script>\n'
+
+# 分块表格的"显示更多"按钮样式，打印时显示全部表体
+TABLE_CHUNK_CSS = """.table-more {
+  display: block;
+  margin: var(--spacing-sm) auto 0;
+  padding: var(--spacing-xs) var(--spacing-lg);
+  background: none;
+  color: var(--primary-color);
+  border: 1px solid var(--primary-light);
+  border-radius: var(--border-radius);
+  font-size: 0.85rem;
+  cursor: pointer;
+}
+@media print {
+  .table-more {
+    display: none;
+  }
+  .table-chunked tbody[hidden] {
+    display: table-row-group;
+  }
+}
+"""
+
+# 长文档模式的目录样式和延后布局的章节，打印时章节全部正常布局
+LONG_DOC_CSS = """.toc {
+  margin-bottom: var(--spacing-lg);
+  padding: var(--spacing-md);
+  background: var(--bg-color);
+  border-radius: var(--spacing-sm);
+}
+.content-card .toc-title {
+  margin-bottom: var(--spacing-xs);
+  color: var(--text-primary);
+  font-weight: 700;
+}
+.content-card .toc ol {
+  margin: 0;
+  padding-left: 0;
+  list-style: none;
+}
+.content-card .toc ol ol {
+  padding-left: 1.2em;
+}
+.content-card .toc li {
+  margin-bottom: 0;
+}
+.content-card .toc a {
+  color: var(--text-secondary);
+  text-decoration: none;
+}
+.content-card .toc strong {
+  color: inherit;
+  font-weight: inherit;
+}
+.content-card h2[id],
+.content-card h3[id] {
+  scroll-margin-top: var(--spacing-md);
+}
+.doc-section.lazy {
+  content-visibility: auto;
+  contain-intrinsic-size: auto 800px;
+}
+@media print {
+  .doc-section.lazy {
+    content-visibility: visible;
+  }
+}
+"""
+
+# 正文图片样式：宽度不超出内容区域，按原比例缩放
+MEDIA_CSS = """.content-card img {
+  max-width: 100%;
+  height: auto;
+  vertical-align: middle;
+}
+"""
+
+# 功能样式：(功能名称, CSS)，内联模式下只追加到用到该功能的页面的模板CSS之后，
+# 外部资源模式下全部放入共享CSS
+FEATURE_STYLES = (
+    ('table_chunk', TABLE_CHUNK_CSS),
+    ('long_doc', LONG_DOC_CSS),
+    ('media', MEDIA_CSS),
+)
+
+# 压缩模式：只去掉模板自身用于排版的缩进、换行和CSS/JS中的空白与注释，
+# 从Word提取的正文和表格文本原样保留
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_CSS_SPACE = re.compile(r'\s+')
+_CSS_PUNCT_SPACE = re.compile(r'\s*([{};:,>])\s*')
+
+def minify_css(css):
+    """压缩本模块的CSS模板（去掉注释、多余空白和最后一个分号）"""
+    css = _CSS_COMMENT.sub('', css)
+    css = _CSS_SPACE.sub(' ', css)
+    css = _CSS_PUNCT_SPACE.sub(r'\1', css)
+    return css.replace(';}', '}').strip()
+
+def minify_js(js):
+    """压缩本模块的JS模板：去掉缩进、空行和整行注释，保留换行以免依赖自动分号插入的语句出错"""
+    lines = (line.strip() for line in js.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+def minify_markup(html):
+    """去掉本模块HTML模板中每行的缩进和换行（只用于模板和footer链接，不用于正文）"""
+    return ''.join(line.strip() for line in html.splitlines())
+
+# 页面模板：每个模板是 templates/ 下的一个目录，包含 layout.html（页面骨架）、
+# style.css、script.js 和 template.json（变量及继承的父模板），缺少的文件沿用父模板
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / 'templates'
+DEFAULT_TEMPLATE = 'default'
+TEMPLATE_CONFIG_FILENAME = 'template.json'
+TEMPLATE_FILES = (('layout', 'layout.html'), ('css', 'style.css'), ('js', 'script.js'))
+# 文档目录中的模板选择文件：{"template": 目录默认模板, "documents": {"文件名.docx": 模板}}
+TEMPLATE_SELECT_FILENAME = '.h5-template.json'
+
+# 布局中由每个页面填入的占位符；content、footer_links、script 为块占位符，
+# 单独成行时整行（含缩进和换行）替换为对应内容
+TEMPLATE_SLOTS = ('title', 'date', 'css', 'content', 'footer_links', 'script')
+TEMPLATE_BLOCK_SLOTS = ('content', 'footer_links', 'script')
+_PLACEHOLDER = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+_BLOCK_PLACEHOLDER_LINE = re.compile(
+    r'^[ \t]*(\{\{\s*(?:' + '|'.join(TEMPLATE_BLOCK_SLOTS) + r')\s*\}\})[ \t]*\n', re.M)
+
+# 按占位符切分后的布局：parts 为 [(静态文本, 占位符名称或None), ...]，
+# styles 为 {功能集合: 内联的CSS}，script/chunk_script 为内联模式下填入的脚本
+CompiledLayout = namedtuple('CompiledLayout', ['parts', 'styles', 'script', 'chunk_script'])
+
+class PageTemplate:
+    """
+    页面模板：布局和CSS/JS在每个进程中只编译一次
+
+    编译时代入模板变量，并将布局按占位符切分为静态片段，
+    渲染页面时只需依次写出片段和页面内容，与已加载的模板数量无关。
+    """
+
+    def __init__(self, name, source, layout, css, js, variables):
+        self.name = name
+        self.source = source
+        self.layout = layout
+        self.css = css
+        self.js = js
+        self.variables = variables
+        self._compiled = {}
+        self._assets = {}
+
+        digest = hashlib.sha256()
+        feature_css = [text for _, text in FEATURE_STYLES]
+        for part in (layout, css, js, TABLE_CHUNK_JS, *feature_css, json.dumps(variables, sort_keys=True)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        self.hash = digest.hexdigest()
+
+    def _substitute_variables(self):
+        """代入模板变量，页面占位符原样保留"""
+        def replace(match):
+            name = match.group(1)
+            if name in TEMPLATE_SLOTS:
+                return match.group(0)
+            if name not in self.variables:
+                raise ValueError(f"模板 {self.source} 的 layout.html 中有未定义的变量 {{{{{name}}}}}")
+            return str(self.variables[name])
+        return _PLACEHOLDER.sub(replace, self.layout)
+
+    def _styles(self, minify):
+        """模板CSS与每种功能组合的功能样式拼接后的内联CSS：{功能集合: <style>...</style>}"""
+        styles = {}
+        for mask in range(1 << len(FEATURE_STYLES)):
+            features = [FEATURE_STYLES[i] for i in range(len(FEATURE_STYLES)) if mask >> i & 1]
+            css = self.css + ''.join(text for _, text in features)
+            key = frozenset(name for name, _ in features)
+            styles[key] = '<style>' + minify_css(css) + '</style>' if minify else '<style>\n' + css + '</style>\n'
+        return styles
+
+    def compile(self, minify=False):
+        """
+        返回编译后的布局（CompiledLayout），压缩与未压缩版本各编译一次
+
+        Raises:
+            ValueError: 布局缺少 content/footer_links 占位符，或footer导航结构不符合要求
+        """
+        compiled = self._compiled.get(minify)
+        if compiled is not None:
+            return compiled
+
+        layout = self._substitute_variables()
+        if minify:
+            # 整个布局按行压缩，单独成行的块占位符随之去掉缩进和换行
+            layout = minify_markup(layout)
+            script = '<script>' + minify_js(self.js) + '</script>'
+            chunk_script = '<script>' + minify_js(TABLE_CHUNK_JS) + '</script>'
+        else:
+            layout = _BLOCK_PLACEHOLDER_LINE.sub(r'\1', layout)
+            script = '  <script>\n' + textwrap.indent(self.js, '    ') + '  </script>\n'
+            chunk_script = TABLE_CHUNK_SCRIPT
+
+        pieces = _PLACEHOLDER.split(layout)
+        parts = [(pieces[i], pieces[i + 1]) for i in range(0, len(pieces) - 1, 2)]
+        parts.append((pieces[-1], None))
+
+        slots = [slot for _, slot in parts if slot]
+        for slot in ('content', 'footer_links'):
+            if slots.count(slot) != 1:
+                raise ValueError(f"模板 {self.source} 的 layout.html 必须包含且只包含一个 {{{{{slot}}}}}")
+        # 重写footer导航（--relink、监视模式）依赖 <nav class="footer-links">{{footer_links}}</nav> 结构
+        index = slots.index('footer_links')
+        before = parts[index][0].rstrip()
+        after = parts[index + 1][0].lstrip()
+        if not before.endswith(FOOTER_NAV_START.decode()) or not after.startswith(FOOTER_NAV_END.decode()):
+            raise ValueError(f"模板 {self.source} 的 layout.html 中 {{{{footer_links}}}} "
+                             f"必须直接位于 <nav class=\"footer-links\"> 和 </nav> 之间")
+
+        compiled = CompiledLayout(parts, self._styles(minify), script, chunk_script)
+        self._compiled[minify] = compiled
+        return compiled
+
+    def assets(self, minify=False):
+        """
+        外部资源模式下的CSS/JS文件名与内容（每个进程只计算一次）
+
+        Returns:
+            {'css': (文件名, 内容), 'js': (文件名, 内容)}，文件名形如 agreement.<hash>.css，
+            不同模板的内容不同，哈希文件名也不同，可以共存于同一目录
+        """
+        assets = self._assets.get(minify)
+        if assets is None:
+            # 分块表格脚本和全部功能样式也放入共享文件，没有用到对应功能的页面中它们不起作用
+            css = self.css + ''.join(text for _, text in FEATURE_STYLES)
+            if minify:
+                sources = {
+                    'css': minify_css(css),
+                    'js': minify_js(self.js) + '\n' + minify_js(TABLE_CHUNK_JS),
+                }
+            else:
+                sources = {
+                    'css': css,
+                    'js': self.js + '\n' + textwrap.dedent(TABLE_CHUNK_JS),
+                }
+            assets = {}
+            for kind, text in sources.items():
+                digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:ASSET_HASH_LENGTH]
+                assets[kind] = (f'{ASSET_PREFIX}.{digest}.{kind}', text)
+            self._assets[minify] = assets
+        return assets
+
+_page_templates = {}
+
+def find_template_dir(ref, base_dir=None):
+    """
+    查找模板目录：绝对路径、相对于 base_dir 的路径、templates/ 下的模板名称依次尝试
+
+    每次都重新查找（只需几次 stat），新建或删除的模板目录立即生效。
+
+    Raises:
+        ValueError: 找不到模板目录
+    """
+    path = Path(ref)
+    candidates = [path] if path.is_absolute() else \
+        ([Path(base_dir) / path] if base_dir else []) + [TEMPLATES_DIR / path]
+    for candidate in candidates:
+        if candidate.is_dir():
+            return candidate.resolve()
+    raise ValueError(f"找不到页面模板 {ref}（可用模板位于 {TEMPLATES_DIR}）")
+
+def _template_signature(template_dir):
+    """模板目录中配置和模板文件的 (修改时间, 大小)"""
+    names = (TEMPLATE_CONFIG_FILENAME,) + tuple(filename for _, filename in TEMPLATE_FILES)
+    return tuple(_file_signature(template_dir / name) for name in names)
+
+def _load_template_dir(template_dir, loading=()):
+    """
+    读取模板目录（先加载父模板，缺少的文件和变量沿用父模板）
+
+    模板在进程内缓存，模板文件或父模板变化后重新读取（常驻服务中修改模板无需重启）。
+    """
+    if template_dir in loading:
+        raise ValueError(f"模板 {template_dir} 的 extends 形成了循环继承")
+    signature = _template_signature(template_dir)
+    cached = _page_templates.get(template_dir)
+    if cached is not None and cached[0] == signature:
+        _, template, parent_dir, parent = cached
+        if parent_dir is None or _load_template_dir(parent_dir, loading + (template_dir,)) is parent:
+            return template
+
+    config = {}
+    config_path = template_dir / TEMPLATE_CONFIG_FILENAME
+    if config_path.is_file():
+        try:
+            config = json.loads(config_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            raise ValueError(f"无法读取模板配置 {config_path}: {e}")
+        if not isinstance(config, dict) or not isinstance(config.get('variables', {}), dict):
+            raise ValueError(f"模板配置 {config_path} 应为对象，variables 应为对象")
+
+    # 默认模板之外的模板都继承默认模板，除非另行指定
+    default_dir = find_template_dir(DEFAULT_TEMPLATE)
+    extends = config.get('extends', None if template_dir == default_dir else DEFAULT_TEMPLATE)
+    parent = parent_dir = None
+    if extends:
+        parent_dir = find_template_dir(extends, template_dir.parent)
+        parent = _load_template_dir(parent_dir, loading + (template_dir,))
+
+    files = {}
+    for key, filename in TEMPLATE_FILES:
+        path = template_dir / filename
+        if path.is_file():
+            files[key] = path.read_text(encoding='utf-8')
+        elif parent is not None:
+            files[key] = getattr(parent, key)
+        else:
+            raise ValueError(f"模板 {template_dir} 缺少 {filename}")
+
+    variables = dict(parent.variables) if parent is not None else {}
+    variables.update(config.get('variables', {}))
+
+    template = PageTemplate(config.get('name') or template_dir.name, template_dir,
+                            files['layout'], files['css'], files['js'], variables)
+    _page_templates[template_dir] = (signature, template, parent_dir, parent)
+    return template
+
+def load_page_template(ref=None, base_dir=None):
+    """
+    加载页面模板，同一模板目录在进程内只读取和编译一次（文件变化后重新读取）
+
+    Args:
+        ref: 模板名称（templates/ 下的目录名）或模板目录路径，默认使用 default
+        base_dir: 相对路径的基准目录（模板选择文件所在目录）
+    """
+    return _load_template_dir(find_template_dir(ref or DEFAULT_TEMPLATE, base_dir))
+
+_template_selections = {}
+
+def read_template_selection(dir_path):
+    """
+    读取文档目录中的模板选择文件（按修改时间缓存，每次只需一次 stat）
+
+    Returns:
+        {'template': 模板, 'documents': {文件名: 模板}}，文件不存在时返回None
+    """
+    select_path = Path(dir_path) / TEMPLATE_SELECT_FILENAME
+    try:
+        mtime = select_path.stat().st_mtime_ns
+    except OSError:
+        return None
+    cached = _template_selections.get(select_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        selection = json.loads(select_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError) as e:
+        raise ValueError(f"无法读取模板选择文件 {select_path}: {e}")
+    if not isinstance(selection, dict) or not isinstance(selection.get('documents', {}), dict):
+        raise ValueError(f"模板选择文件 {select_path} 应为对象，documents 应为 文件名 → 模板 的对象")
+    _template_selections[select_path] = (mtime, selection)
+    return selection
+
+def get_document_template(docx_path, default=None):
+    """
+    选择文档使用的模板：目录选择文件中的文档条目 > 目录默认模板 > 命令行 --template > default
+
+    Args:
+        docx_path: Word文件路径
+        default: 命令行指定的模板（名称或目录路径）
+    """
+    docx_path = Path(docx_path)
+    selection = read_template_selection(docx_path.parent)
+    if selection:
+        ref = selection.get('documents', {}).get(docx_path.name) or selection.get('template')
+        if ref:
+            return load_page_template(ref, docx_path.parent)
+    return load_page_template(default)
+
+# 外部资源模式：每个输出目录共享一份按内容哈希命名的CSS/JS，页面通过长期缓存友好的文件名引用
+ASSET_MODES = ('inline', 'external')
+ASSET_PREFIX = 'agreement'
+ASSET_HASH_LENGTH = 10
+
+def write_page_assets(dir_path, minify=False, template=None):
+    """
+    确保输出目录中存在模板当前版本的共享CSS/JS文件（已存在则跳过，缺失时原子写入）
+
+    Returns:
+        本次写入的文件名列表
+    """
+    written = []
+    for name, text in (template or load_page_template()).assets(minify).values():
+        asset_path = Path(dir_path) / name
+        if asset_path.exists():
+            continue
+        tmp_path = asset_path.with_name(f'{name}.{os.getpid()}.tmp')
+        try:
+            # newline='' 保证各平台写出的字节一致，与文件名中的哈希对应
+            with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+                f.write(text)
+            os.replace(tmp_path, asset_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        written.append(name)
+    return written
+
+# 写入HTML文件时的缓冲区大小
+HTML_WRITE_BUFFER = 256 * 1024
+
+# 标题级别 → HTML标签
+HEADING_TAGS = {1: 'h1', 2: 'h2', 3: 'h3', 4: 'h4', 5: 'h5', 6: 'h6'}
+
+# 长文档模式：前几个章节正常渲染，其余章节使用 content-visibility 延后布局
+LONG_DOC_EAGER_SECTIONS = 1
+# 目录中包含的标题级别
+TOC_LEVELS = (2, 3)
+
+def write_toc(headings, write, minify=False):
+    """
+    写出目录：二级标题为第一层，其后的三级标题嵌套在其下（链接文字与标题一致）
+
+    Args:
+        headings: [(级别, 锚点id, 内容项), ...]，二级标题的序号已修复
+    """
+    if minify:
+        newline = i0 = i2 = i4 = i6 = i8 = ''
+    else:
+        newline, i0, i2, i4, i6, i8 = '\n', ' ' * 8, ' ' * 10, ' ' * 12, ' ' * 14, ' ' * 16
+
+    # 按二级标题分组；第一个二级标题之前的三级标题放在第一层
+    groups = []
+    for level, anchor, item in headings:
+        link = f'<a href="#{anchor}">{item["text"]}</a>'
+        if level == 3 and groups and groups[-1][2]:
+            groups[-1][1].append(link)
+        else:
+            groups.append((link, [], level == 2))
+
+    write(f'{i0}<nav class="toc" aria-label="目录">{newline}')
+    write(f'{i2}<p class="toc-title">目录</p>{newline}')
+    write(f'{i2}<ol>{newline}')
+    for link, children, _ in groups:
+        if not children:
+            write(f'{i4}<li>{link}</li>{newline}')
+            continue
+        write(f'{i4}<li>{link}{newline}')
+        write(f'{i6}<ol>{newline}')
+        for child in children:
+            write(f'{i8}<li>{child}</li>{newline}')
+        write(f'{i6}</ol>{newline}')
+        write(f'{i4}</li>{newline}')
+    write(f'{i2}</ol>{newline}')
+    write(f'{i0}</nav>{newline}')
+
+class PageBody:
+    """
+    页面正文：逐项写入临时文件，内存占用只与最大的单个内容项有关，与文档长度无关
+
+    二级标题的文字要等全部内容写完、统计过所有二级标题后才能修复序号，
+    因此先只记录它们在临时文件中的位置，写出页面时再插入；
+    长文档目录和页面用到的功能样式同样在正文写完后才确定。
+    严格按Word文档内容写出，不修改任何文字。
+    """
+
+    def __init__(self, chunk_script=TABLE_CHUNK_SCRIPT, minify=False, long_doc=False, count_original=False):
+        """
+        Args:
+            chunk_script: 第一个分块表格之后输出的展开脚本（外部资源模式下脚本在共享JS中，传入空字符串）
+            minify: 省略各项之间的缩进和换行
+            long_doc: 长文档模式：输出二、三级标题目录，并按二级标题分节，
+                      靠后的章节使用 content-visibility 延后布局
+            count_original: 压缩模式下同时统计未压缩正文的字节数（original_size）
+        """
+        import tempfile
+
+        self.long_doc = long_doc
+        self.spool = tempfile.TemporaryFile()
+        # 输出目标：(写入函数, 是否压缩, 分块表格脚本)；第一个为临时文件，其余只计数
+        self.sinks = [(self._spool_write, minify, chunk_script)]
+        self._count_original = None
+        if count_original:
+            self._count_original, self._original_size = count_written_bytes()
+            self.sinks.append((self._count_original, False, TABLE_CHUNK_SCRIPT if chunk_script else ''))
+        # 表格逐行写入临时文件，不生成整个表格的HTML字符串
+        self._render_table = write_table_html
+        if _profiler is not None:
+            self._render_table = _profiler.wrap('table_render', self._render_table)
+        self.minify = minify
+        self.items = 0
+        self.tables = 0
+        self.features = {'long_doc'} if long_doc else set()
+        # 二级标题：[(临时文件中的字节偏移, 内容项)]；目录中的标题：[(级别, 锚点id, 内容项)]
+        self.slots = []
+        self.headings = []
+        self.size = 0
+        self._section_open = False
+        self._sections = 0
+        self._chunk_script_written = False
+        self._h2_count = 0
+        self._h3_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.spool.close()
+
+    def _spool_write(self, text):
+        self.spool.write(text.encode('utf-8'))
+
+    def extend(self, content):
+        """逐项写出内容项（可以是生成器，边解析边写出）"""
+        for item in content:
+            self.add(item)
+
+    def add(self, item):
+        """写出一个内容项"""
+        self.items += 1
+        is_table = item.get('type') == 'table'
+        level = None if is_table else item['level']
+
+        # 长文档模式：每个二级标题开始一个新章节，第一个二级标题之前的内容单独成节；
+        # 二、三级标题按出现顺序分配锚点 sec-2、sec-2-1
+        section = None
+        anchor = None
+        if self.long_doc:
+            if level == 2 or not self._section_open:
+                if level == 2:
+                    self._sections += 1
+                section = (self._section_open, ' lazy' if self._sections > LONG_DOC_EAGER_SECTIONS else '')
+                self._section_open = True
+            if level == 2:
+                self._h2_count += 1
+                self._h3_count = 0
+                anchor = f'sec-{self._h2_count}'
+            elif level == 3:
+                self._h3_count += 1
+                anchor = f'sec-{self._h2_count}-{self._h3_count}'
+            if anchor:
+                self.headings.append((level, anchor, item))
+
+        if is_table:
+            self.tables += 1
+        write_chunk_script = False
+
+        for index, (write, minify, chunk_script) in enumerate(self.sinks):
+            indent, newline = ('', '') if minify else ('        ', '\n')
+            if section is not None:
+                if section[0]:
+                    write(f'{indent}</section>{newline}')
+                write(f'{indent}<section class="doc-section{section[1]}">{newline}')
+
+            # 处理表格类型：逐行写出，分块与否只取决于表格行数，各输出目标一致
+            if is_table:
+                write(indent)
+                chunked = self._render_table(item['table'], write, item.get('chunk_rows', 0), minify)
+                write(newline)
+                if index == 0 and chunked:
+                    self.features.add('table_chunk')
+                    # 分块表格的展开脚本每页只输出一次
+                    write_chunk_script = not self._chunk_script_written
+                    self._chunk_script_written = True
+                if write_chunk_script:
+                    write(chunk_script)
+                continue
+
+            # 处理段落类型，普通段落保持原样；二级标题的文字在修复序号后插入
+            tag = HEADING_TAGS.get(level, 'p')
+            attrs = f' id="{anchor}"' if anchor else ''
+            write(f'{indent}<{tag}{attrs}>')
+            if level != 2:
+                write(item['text'])
+            elif index == 0:
+                self.slots.append((self.spool.tell(), item))
+            write(f'</{tag}>{newline}')
+
+    def finish(self):
+        """全部内容写完后调用：关闭章节、修复二级标题序号"""
+        if self._section_open:
+            for write, minify, _ in self.sinks:
+                write('</section>' if minify else '        </section>\n')
+            self._section_open = False
+        self.size = self.spool.tell()
+
+        # 智能修复标题序号
+        with profile_stage('fix_heading_numbers'):
+            fix_heading_numbers([item for _, item in self.slots])
+
+        if self._count_original is not None:
+            for _, item in self.slots:
+                self._count_original(item['text'])
+            if self.has_toc:
+                write_toc(self.headings, self._count_original)
+
+    @property
+    def has_toc(self):
+        """长文档模式下至少有两个二级标题时输出目录"""
+        return self.long_doc and self._h2_count >= 2
+
+    @property
+    def original_size(self):
+        """未压缩正文的字节数（count_original 时有效）"""
+        return self._original_size()
+
+    def write_to(self, write):
+        """写出目录和正文：按块复制临时文件，在记录的位置插入修复序号后的二级标题"""
+        import codecs
+
+        if self.has_toc:
+            write_toc(self.headings, write, self.minify)
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        self.spool.seek(0)
+        position = 0
+        for offset, item in self.slots + [(self.size, None)]:
+            remaining = offset - position
+            while remaining:
+                chunk = self.spool.read(min(HTML_WRITE_BUFFER, remaining))
+                if not chunk:
+                    raise OSError("正文临时文件被截断")
+                remaining -= len(chunk)
+                write(decoder.decode(chunk))
+            position = offset
+            if item is not None:
+                write(item['text'])
+        write(decoder.decode(b'', final=True))
+
+def write_html_page(write, write_body, title, date_display, footer_links, assets='inline', minify=False,
+                    features=frozenset(), template=None):
+    """
+    按模板布局顺序写出完整页面：静态片段与标题、CSS、正文、footer链接、脚本
+
+    Args:
+        write: 写入函数
+        write_body: 写出正文的函数，以 write 为参数调用（如 PageBody.write_to）
+        title: 文档标题
+        date_display: 显示的生效日期
+        footer_links: footer链接HTML
+        assets: 'inline' 内联CSS/JS；'external' 引用同目录的 agreement.<hash>.css/.js
+        minify: 使用压缩模板（正文文本不变）
+        features: 页面用到的功能（见 FEATURE_STYLES），内联模式下决定追加哪些功能样式
+        template: 页面模板（PageTemplate），默认使用 default 模板
+    """
+    template = template or load_page_template()
+    layout = template.compile(minify)
+    if assets == 'external':
+        page_assets = template.assets(minify)
+        indent, newline = ('', '') if minify else ('  ', '\n')
+        css = f'<link rel="stylesheet" href="./{page_assets["css"][0]}">'
+        script = f'{indent}<script src="./{page_assets["js"][0]}"></script>{newline}'
+    else:
+        css = layout.styles[frozenset(features)]
+        script = layout.script
+    if minify:
+        footer_links = minify_markup(footer_links)
+
+    values = {'title': title, 'date': date_display, 'css': css,
+              'footer_links': footer_links, 'script': script}
+    for text, slot in layout.parts:
+        write(text)
+        if slot == 'content':
+            write_body(write)
+        elif slot:
+            write(values[slot])
+
+def count_written_bytes():
+    """
+    返回 (写入函数, 取值函数)，只统计写出的字节数（按平台换行符计算），不保存内容
+    """
+    total = 0
+    crlf = os.linesep != '\n'
+
+    def write(text):
+        nonlocal total
+        total += len(text.encode('utf-8'))
+        if crlf:
+            total += text.count('\n')
+
+    return write, lambda: total
+
+def generate_html(content, title, date, docx_path, footer_links=None, update_index=True, assets='inline',
+                  minify=False, stats=None, long_doc=False, template=None, meta=None):
+    """
+    生成HTML文件，内容严格从Word提取
+
+    内容项逐个写入正文临时文件（content 可以是边解析边产出的生成器），
+    内存占用只与最大的单个内容项有关。
+
+    Args:
+        content: 内容项的可迭代对象（列表或 iter_docx_content 等生成器）
+        title: 文档标题；传入 meta 时在内容遍历结束后从 meta 读取
+        date: 生效日期；传入 meta 时在内容遍历结束后从 meta 读取
+        footer_links: 预先生成的footer链接HTML；为None时根据目录索引动态生成
+        update_index: 写入后是否登记到目录的footer链接索引（批量模式由主进程统一登记）
+        assets: 'inline'（默认，单文件可独立使用）或 'external'（共享同目录的哈希命名CSS/JS）
+        minify: 输出压缩后的HTML/CSS/JS（正文文本不变）
+        stats: 可选字典，写入 'items'（内容项数）、'tables'（表格数），
+               压缩时写入 'original'（未压缩页面的字节数）
+        long_doc: 长文档模式：输出二、三级标题目录，靠后的章节延后布局
+        template: 页面模板（PageTemplate），默认按文档目录的模板选择文件或 default 模板
+        meta: 生成器填写的元数据字典（见 iter_docx_content），遍历结束后读取 title、date 和 media
+    """
+    docx_file = Path(docx_path)
+    if template is None:
+        template = get_document_template(docx_file)
+    chunk_script = '' if assets == 'external' else template.compile(minify).chunk_script
+
+    with PageBody(chunk_script, minify, long_doc, count_original=minify and stats is not None) as body:
+        body.extend(content)
+        body.finish()
+        if meta is not None:
+            title, date = meta['title'], meta['date']
+            if meta.get('media'):
+                body.features.add('media')
+
+        # 使用英文+日期格式生成文件名
+        html_filename = generate_english_filename(title, date)
+        html_path = docx_file.parent / html_filename
+
+        # 获取动态footer链接
+        if footer_links is None:
+            with profile_stage('footer_links'):
+                footer_links = get_footer_links(docx_path)
+
+        # 处理日期
+        if date:
+            date_display = date
+        else:
+            # 默认使用当前月份的1日
+            now = datetime.now()
+            date_display = f"{now.year}年{now.month}月1日"
+
+        # 先写入临时文件再替换，避免中途失败留下不完整的页面
+        tmp_path = html_path.with_name(f'{html_path.name}.{os.getpid()}.tmp')
+        try:
+            with profile_stage('html_write'):
+                with open(tmp_path, 'w', encoding='utf-8', buffering=HTML_WRITE_BUFFER) as f:
+                    write_html_page(f.write, body.write_to, title, date_display, footer_links, assets, minify,
+                                    body.features, template)
+                os.replace(tmp_path, html_path)
+                if assets == 'external':
+                    write_page_assets(html_path.parent, minify, template)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        if stats is not None:
+            stats['items'] = body.items
+            stats['tables'] = body.tables
+            if minify:
+                # 按未压缩模板计数页面骨架（不写文件），加上未压缩正文的字节数
+                write, written = count_written_bytes()
+                write_html_page(write, lambda write: None, title, date_display, footer_links, assets,
+                                features=body.features, template=template)
+                stats['original'] = written() + body.original_size
+
+    if update_index:
+        update_footer_index(html_path.parent, [html_path.name])
+
+    return html_path
+
+FOOTER_NAV_START = b'<nav class="footer-links">'
+FOOTER_NAV_END = b'</nav>'
+# 未压缩页面中 </nav> 前的缩进（页面中已有的缩进优先，模板可以使用不同的缩进）
+FOOTER_NAV_INDENT = b'        '
+# footer位于页面末尾，先只读取文件尾部查找导航块，找不到再读取整个文件
+FOOTER_SCAN_BYTES = 64 * 1024
+
+def replace_footer_links(html_path, footer_links, dry_run=False):
+    """
+    按字节偏移替换已生成页面中的footer导航链接
+
+    只读取文件尾部定位 <nav class="footer-links"> 块；导航块之前的字节原样复制到临时文件，
+    接上新的导航块后整体替换原文件，写入中断不会留下半截页面。
+    兼容 Windows 文本模式写出的 CRLF 换行和压缩模式的页面。
+
+    Args:
+        html_path: HTML文件路径
+        footer_links: 新的footer链接HTML字符串
+        dry_run: 只检查是否需要修改，不写入文件
+
+    Returns:
+        是否发生了修改（dry_run 时为是否需要修改）；页面中没有footer导航块时返回None
+    """
+    with open(html_path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        base = max(0, size - FOOTER_SCAN_BYTES)
+        f.seek(base)
+        data = f.read()
+        start = data.rfind(FOOTER_NAV_START)
+        if start == -1 and base:
+            base = 0
+            f.seek(0)
+            data = f.read()
+            start = data.rfind(FOOTER_NAV_START)
+        if start == -1:
+            return None
+
+        start += len(FOOTER_NAV_START)
+        end = data.find(FOOTER_NAV_END, start)
+        if end == -1:
+            return None
+
+        # 导航块以换行开头的是普通页面，否则是压缩页面
+        indent = data[data.rfind(b'\n', start, end) + 1:end]
+        if indent.strip():
+            indent = FOOTER_NAV_INDENT
+        if data.startswith(b'\r\n', start):
+            new_links = (b'\n' + footer_links.encode('utf-8')).replace(b'\n', b'\r\n') + indent
+        elif data.startswith(b'\n', start):
+            new_links = b'\n' + footer_links.encode('utf-8') + indent
+        else:
+            new_links = minify_markup(footer_links).encode('utf-8')
+        if data[start:end] == new_links:
+            return False
+
+    if not dry_run:
+        _replace_file_tail(html_path, base + start, new_links + data[end:])
+    return True
+
+# 预压缩：在页面旁写出 .gz 和（安装了 brotli 模块时）.br 文件，供静态服务器直接返回
+PRECOMPRESS_GZIP_LEVEL = 9
+PRECOMPRESS_BROTLI_QUALITY = 11
+
+def _brotli_module():
+    """brotli 为可选依赖，未安装时返回None"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+def _write_bytes_atomic(path, data):
+    """先写临时文件再替换"""
+    path = Path(path)
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+def _replace_file_tail(path, offset, tail, chunk_size=1 << 20):
+    """保留文件前 offset 个字节、替换其后的内容：前缀按块复制到临时文件后整体替换"""
+    path = Path(path)
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    try:
+        with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            remaining = offset
+            while remaining:
+                chunk = src.read(min(chunk_size, remaining))
+                if not chunk:
+                    raise OSError(f"{path} 在重写过程中被截断")
+                dst.write(chunk)
+                remaining -= len(chunk)
+            dst.write(tail)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+def precompress_page(html_path, existing_only=False):
+    """
+    为页面写出预压缩文件（只在压缩文件缺失或比页面旧时重新生成）
+
+    Args:
+        html_path: HTML文件路径
+        existing_only: 只刷新已存在的压缩文件，不新建（重新链接footer时使用）
+
+    Returns:
+        大小字典：html（页面字节数）以及已有的 gz、br
+    """
+    import gzip
+
+    html_path = Path(html_path)
+    html_stat = html_path.stat()
+    encoders = {'gz': lambda data: gzip.compress(data, PRECOMPRESS_GZIP_LEVEL, mtime=0)}
+    brotli = _brotli_module()
+    if brotli is not None:
+        encoders['br'] = lambda data: brotli.compress(data, quality=PRECOMPRESS_BROTLI_QUALITY)
+
+    sizes = {'html': html_stat.st_size}
+    data = None
+    for suffix, encode in encoders.items():
+        sibling = html_path.with_name(f'{html_path.name}.{suffix}')
+        try:
+            sibling_stat = sibling.stat()
+        except FileNotFoundError:
+            sibling_stat = None
+        if sibling_stat is None and existing_only:
+            continue
+        if sibling_stat is not None and sibling_stat.st_mtime_ns >= html_stat.st_mtime_ns:
+            sizes[suffix] = sibling_stat.st_size
+            continue
+        if data is None:
+            data = html_path.read_bytes()
+        compressed = encode(data)
+        _write_bytes_atomic(sibling, compressed)
+        sizes[suffix] = len(compressed)
+    return sizes
+
+def file_sha256(path):
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_conversion_cache(dir_path):
+    """
+    读取输出目录中的增量转换缓存
+
+    Returns:
+        {docx文件名: 缓存条目}，缓存不存在或格式不符时返回空字典
+    """
+    cache_path = Path(dir_path) / CACHE_FILENAME
+    try:
+        data = json.loads(cache_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('format') != CACHE_FORMAT:
+        return {}
+    entries = data.get('entries')
+    return entries if isinstance(entries, dict) else {}
+
+def save_conversion_cache(dir_path, entries):
+    """原子写入增量转换缓存（先写临时文件再替换）"""
+    cache_path = Path(dir_path) / CACHE_FILENAME
+    tmp_path = cache_path.with_name(f'{CACHE_FILENAME}.{os.getpid()}.tmp')
+    data = {'format': CACHE_FORMAT, 'entries': entries}
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True), encoding='utf-8')
+    os.replace(tmp_path, cache_path)
+
+def get_options_hash(options=None):
+    """
+    计算影响输出的转换选项的哈希（含标题规则文件内容），选项变化时缓存失效
+    """
+    options = options or {}
+    digest = hashlib.sha256(json.dumps(options, sort_keys=True, default=str).encode('utf-8'))
+    for rules_path in options.get('heading_rules') or ():
+        try:
+            digest.update(Path(rules_path).read_bytes())
+        except OSError:
+            pass
+    return digest.hexdigest()
+
+def lookup_conversion_cache(docx_path, docx_hash, entries, options_hash, template_hash):
+    """
+    判断文档是否可以跳过转换
+
+    文档内容、转换器版本、模板、转换选项均未变化，且生成的HTML及其引用的图片仍存在时命中缓存。
+
+    Returns:
+        命中时返回转换结果字典（skipped 为 True），否则返回None
+    """
+    docx_path = Path(docx_path)
+    entry = entries.get(docx_path.name)
+    if not entry:
+        return None
+    if (entry.get('docx_hash') != docx_hash or
+            entry.get('converter_version') != CONVERTER_VERSION or
+            entry.get('template_hash') != template_hash or
+            entry.get('options_hash') != options_hash):
+        return None
+
+    html_path = docx_path.parent / entry.get('html', '')
+    if not entry.get('html') or not html_path.is_file():
+        return None
+    media_dir = docx_path.parent / MEDIA_DIRNAME
+    if not all((media_dir / name).is_file() for name in entry.get('media', ())):
+        return None
+
+    return {
+        'success': True,
+        'skipped': True,
+        'docx_path': str(docx_path),
+        'html_path': str(html_path),
+        'title': entry.get('title'),
+        'date': entry.get('date'),
+        'count': entry.get('count', 0),
+    }
+
+def make_cache_entry(result, docx_hash, options_hash, template_hash):
+    """根据转换结果生成缓存条目"""
+    entry = {
+        'docx_hash': docx_hash,
+        'converter_version': CONVERTER_VERSION,
+        'template_hash': template_hash,
+        'options_hash': options_hash,
+        'html': Path(result['html_path']).name,
+        'title': result['title'],
+        'date': result['date'],
+        'count': result['count'],
+    }
+    if result.get('media'):
+        entry['media'] = result['media']
+    return entry
+
+def collect_docx_files(inputs, recursive=False):
+    """
+    将命令行参数（文件、目录、通配符）展开为去重后的docx文件列表
+
+    Args:
+        inputs: 路径列表，可以是 .docx 文件、目录或通配符（如 "D:\\协议\\*.docx"）
+        recursive: 目录是否递归扫描子目录
+
+    Returns:
+        (docx文件列表, 无法识别的输入列表)
+    """
+    import glob
+
+    docx_files = []
+    invalid = []
+    seen = set()
+
+    def add(path):
+        path = Path(path)
+        # 跳过Word打开文档时生成的 ~$ 临时文件
+        if path.name.startswith('~$') or path.suffix.lower() != '.docx':
+            return
+        key = os.path.normcase(str(path.resolve()))
+        if key not in seen:
+            seen.add(key)
+            docx_files.append(path)
+
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            pattern = '**/*' if recursive else '*'
+            for child in sorted(path.glob(pattern)):
+                if child.is_file():
+                    add(child)
+        elif path.is_file():
+            if path.suffix.lower() != '.docx':
+                invalid.append(item)
+            else:
+                add(path)
+        elif glob.has_magic(item):
+            matches = sorted(glob.glob(item, recursive=True))
+            if not matches:
+                invalid.append(item)
+            for match in matches:
+                if Path(match).is_file():
+                    add(match)
+        else:
+            invalid.append(item)
+
+    return docx_files, invalid
+
+def convert_document(docx_path, footer_links=None, options=None, update_index=True, docx_hash=None):
+    """
+    转换单个Word文档（可在子进程中执行）
+
+    Args:
+        docx_path: Word文件路径
+        footer_links: 预先生成的footer链接；批量模式下传入空字符串，由主进程统一补齐
+        update_index: 是否登记到目录索引；批量模式下由主进程统一登记，避免多进程同时改写
+        options: 转换选项字典（heading_rules：标题规则文件列表；
+                 table_chunk_rows：大表格分块行数；assets：inline/external；
+                 minify：压缩HTML/CSS/JS；precompress：由 convert_batch 写出 .gz/.br；
+                 long_doc：长文档模式；ir_cache：json/msgpack，使用docx旁边的中间表示缓存；
+                 template：目录未指定模板时使用的页面模板）
+        docx_hash: 文档内容的SHA-256（批量模式下已计算，避免重复读取）
+
+    Returns:
+        转换结果字典（success、docx_path、html_path、title、date、count 或 error）
+    """
+    options = options or {}
+    minify = options.get('minify', False)
+    sizes = {}
+    document_scope = _profiler.document(docx_path) if _profiler is not None else nullcontext({})
+    try:
+        with document_scope as summary:
+            classifier = get_heading_classifier(options.get('heading_rules'))
+            template = get_document_template(docx_path, options.get('template'))
+            table_chunk_rows = options.get('table_chunk_rows', 0)
+            # 内容项边解析（或边读取中间表示）边写出，不在内存中保存整个文档
+            if options.get('ir_cache'):
+                with profile_stage('ir_load'):
+                    ir, summary['ir_cached'] = get_document_ir(
+                        docx_path, options['ir_cache'], classifier, docx_hash, options.get('heading_rules'))
+                meta = {'title': ir['title'], 'date': ir['date'], 'media': ir.get('media', [])}
+                content = iter_block_content(ir['blocks'], table_chunk_rows)
+            else:
+                meta = {}
+                content = iter_docx_content(docx_path, meta, classifier, table_chunk_rows)
+            page_stats = {}
+            with profile_stage('generate_html'):
+                html_path = generate_html(content, None, None, docx_path,
+                                          footer_links=footer_links, update_index=update_index,
+                                          assets=options.get('assets', 'inline'),
+                                          minify=minify, stats=page_stats,
+                                          long_doc=options.get('long_doc', False),
+                                          template=template, meta=meta)
+            title, date, media = meta['title'], meta['date'], meta['media']
+            if 'original' in page_stats:
+                sizes['original'] = page_stats['original']
+            summary['items'] = page_stats['items']
+            summary['tables'] = page_stats['tables']
+        result = {
+            'success': True,
+            'docx_path': str(docx_path),
+            'html_path': str(html_path),
+            'title': title,
+            'date': date,
+            'count': page_stats['items'],
+        }
+        if sizes:
+            result['sizes'] = sizes
+        if media:
+            result['media'] = media
+        return result
+    except Exception as e:
+        import traceback
+        return {
+            'success': False,
+            'docx_path': str(docx_path),
+            'error': str(e),
+            'traceback': traceback.format_exc(),
+        }
+
+def resolve_footer_links(html_paths):
+    """
+    所有页面生成完毕后，按目录统一生成footer链接并回填
+
+    每个目录只扫描一次，结果与文件的转换顺序无关。
+
+    Args:
+        html_paths: 本次生成的HTML文件路径列表
+
+    Returns:
+        目录 -> footer链接HTML
+    """
+    links_by_dir = {}
+    by_dir = {}
+    for html_path in html_paths:
+        html_path = Path(html_path)
+        by_dir.setdefault(html_path.parent, []).append(html_path)
+
+    for dir_path, pages in by_dir.items():
+        wall, cpu = time.perf_counter(), time.process_time()
+        # get_footer_links 接收的是目录下任意文件路径
+        footer_links = links_by_dir[dir_path] = get_footer_links(dir_path / pages[0].name)
+        changed = sum(1 for html_path in pages if replace_footer_links(html_path, footer_links))
+        if _profiler is not None:
+            _profiler.emit({
+                'event': 'footer_links',
+                'dir': str(dir_path),
+                'pages': len(pages),
+                'changed': changed,
+                'wall_ms': round((time.perf_counter() - wall) * 1000, 3),
+                'cpu_ms': round((time.process_time() - cpu) * 1000, 3),
+            })
+    return links_by_dir
+
+def collect_html_dirs(inputs, recursive=False):
+    """
+    将命令行参数展开为包含HTML页面的目录列表（用于重新链接footer）
+
+    Args:
+        inputs: 目录或HTML文件路径列表
+        recursive: 是否递归查找子目录
+
+    Returns:
+        (目录列表, 无法识别的输入列表)
+    """
+    dirs = []
+    invalid = []
+    seen = set()
+
+    def add(dir_path):
+        key = os.path.normcase(str(dir_path.resolve()))
+        if key not in seen:
+            seen.add(key)
+            dirs.append(dir_path)
+
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            if not recursive:
+                add(path)
+                continue
+            for root, subdirs, names in os.walk(path):
+                subdirs.sort()
+                if any(name.lower().endswith('.html') for name in names):
+                    add(Path(root))
+        elif path.is_file() and path.suffix.lower() == '.html':
+            add(path.parent)
+        else:
+            invalid.append(item)
+
+    return dirs, invalid
+
+def relink_directory(dir_path, dry_run=False):
+    """
+    重新生成目录内所有页面的footer导航，不重新转换任何Word文档
+
+    先扫描目录重建索引（以磁盘上的HTML文件为准），再逐个页面按字节偏移替换导航块。
+
+    Args:
+        dir_path: 输出目录
+        dry_run: 只报告需要更新的页面，不写入
+
+    Returns:
+        结果字典：dir、pages（页面数）、changed（已更新/需更新的文件名列表）、
+        skipped（没有footer导航块的文件名列表）、errors（文件名 -> 错误信息）
+    """
+    dir_path = Path(dir_path)
+    files = rebuild_footer_index(dir_path)
+    footer_links = build_footer_links(files)
+
+    result = {'dir': str(dir_path), 'pages': len(files), 'changed': [], 'skipped': [], 'errors': {}}
+    for name in sorted(files):
+        html_path = dir_path / name
+        try:
+            changed = replace_footer_links(html_path, footer_links, dry_run=dry_run)
+            if changed is None:
+                result['skipped'].append(name)
+            elif changed:
+                result['changed'].append(name)
+                if not dry_run:
+                    # 已有的 .gz/.br 随页面一起更新
+                    precompress_page(html_path, existing_only=True)
+        except OSError as e:
+            result['errors'][name] = str(e)
+    return result
+
+def relink_directories(dir_paths, jobs=None, on_result=None, dry_run=False):
+    """
+    使用线程池并行重新链接多个目录的footer导航
+
+    每个目录由一个线程处理（目录内的索引和页面只被一个线程修改），以I/O为主，线程即可并行。
+
+    Args:
+        dir_paths: 目录列表
+        jobs: 并行线程数（默认：min(32, CPU核数 + 4)）
+        on_result: 每个目录完成时的回调，参数为 relink_directory 的结果字典
+        dry_run: 只报告需要更新的页面，不写入
+
+    Returns:
+        结果列表（按完成顺序）
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    results = []
+
+    def collect(result):
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    if jobs == 1 or len(dir_paths) <= 1:
+        for dir_path in dir_paths:
+            collect(relink_directory(dir_path, dry_run=dry_run))
+        return results
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(relink_directory, dir_path, dry_run) for dir_path in dir_paths]
+        for future in as_completed(futures):
+            collect(future.result())
+    return results
+
+# 版本对比：报告输出到文档目录的子目录，不会被登记到footer链接索引
+DIFF_DIRNAME = 'changes'
+# 每处改动前后保留的上下文段落数
+DIFF_CONTEXT = 1
+# 没有唯一锚点的区间用 difflib 精确比对的规模上限（两侧行数之积），超过时整段标记为替换
+DIFF_EXACT_LIMIT = 1_000_000
+# 逐字比对的相似度下限，低于此值的两行按删除+新增显示
+DIFF_INLINE_RATIO = 0.5
+# 逐字比对的长度上限（两行字符数之和），超过时只做整行比对
+DIFF_INLINE_MAX_CHARS = 4000
+
+DIFF_REPORT_CSS = """
+body{margin:0;padding:24px 16px;background:#FFF9F7;color:#3D3A38;line-height:1.8;
+font-family:-apple-system,BlinkMacSystemFont,'Segoe UI','PingFang SC','Microsoft YaHei',sans-serif}
+main{max-width:960px;margin:0 auto}
+h1{font-size:1.4rem;margin:0 0 8px}
+.meta{color:#6B6662;font-size:.9rem;margin:0 0 4px}
+.summary{margin:12px 0 24px;font-weight:600}
+.summary .ins,.summary .del,.summary .mod{padding:0 4px;border-radius:4px}
+.hunk{background:#fff;border-radius:12px;box-shadow:0 2px 12px rgba(232,138,122,.1);margin:0 0 16px;overflow:hidden}
+.hunk h2{margin:0;padding:8px 16px;font-size:.85rem;font-weight:600;color:#6B6662;border-bottom:1px solid #F0EBE7}
+.line{padding:4px 16px 4px 40px;position:relative;white-space:pre-wrap;word-break:break-word}
+.line::before{position:absolute;left:16px;color:#9A958F}
+.hunk h2 .no{float:right;font-weight:400;color:#9A958F}
+.ctx{color:#9A958F}
+.del{background:#FDECEC}.del::before{content:'-'}
+.ins{background:#EAF6EC}.ins::before{content:'+'}
+.mod{background:#FFF6E0}.mod::before{content:'~'}
+del{background:#F8C4C4;text-decoration:line-through}
+ins{background:#BFE5C6;text-decoration:none}
+.gap{padding:4px 16px;color:#9A958F;font-size:.8rem;text-align:center}
+"""
+
+def document_diff_lines(ir):
+    """
+    将中间表示展开为逐行比对的文本单元
+
+    每个非空段落为一行（包含超链接文本，图片不参与比对）；表格的每一行为一行，
+    单元格文本以 " | " 连接。同时记录每行所在的章节（最近的标题段落）。
+
+    Returns:
+        (文本行列表, 章节列表)，两者等长
+    """
+    lines = []
+    sections = []
+    section = ''
+    for block in ir['blocks']:
+        if block['type'] == 'paragraph':
+            text = ''.join(run['text'] for run in block['runs']).strip()
+            if not text:
+                continue
+            if block['level'] > 0:
+                section = text
+            lines.append(text)
+            sections.append(section)
+        else:
+            for row in block['rows']:
+                text = ' | '.join(_cell_text(cell).strip() for cell in row['cells'])
+                if text.strip(' |'):
+                    lines.append(text)
+                    sections.append(section)
+    return lines, sections
+
+def load_diff_document(docx_path, rule_files=None, ir_format=None):
+    """
+    读取版本对比所需的文档文本
+
+    优先使用docx旁边仍然有效的中间表示缓存（任一格式），否则解析docx；
+    指定 ir_format 时与转换一样写回缓存，未指定时不写缓存也不输出图片。
+
+    Returns:
+        字典：docx_path、title、date、lines、sections；失败时为 docx_path 和 error
+    """
+    try:
+        docx_hash = file_sha256(docx_path)
+        ir = None
+        if ir_format:
+            classifier = get_heading_classifier(rule_files) if rule_files else None
+            ir, _ = get_document_ir(docx_path, ir_format, classifier, docx_hash, rule_files)
+        else:
+            rules_hash = heading_rules_hash(rule_files)
+            for fmt in ('json', 'msgpack'):
+                if fmt == 'msgpack' and _msgpack_module() is None:
+                    continue
+                ir = load_cached_ir(docx_path, fmt, docx_hash, rules_hash)
+                if ir is not None:
+                    break
+            if ir is None:
+                classifier = get_heading_classifier(rule_files) if rule_files else None
+                ir = build_document_ir(docx_path, classifier, docx_hash, rules_hash, extract_media=False)
+    except Exception as e:
+        return {'docx_path': str(docx_path), 'error': f'{type(e).__name__}: {e}'}
+
+    lines, sections = document_diff_lines(ir)
+    return {
+        'docx_path': str(docx_path),
+        'title': ir['title'],
+        'date': ir['date'],
+        'lines': lines,
+        'sections': sections,
+    }
+
+def _longest_increasing_anchors(pairs):
+    """按 (旧行号, 新行号) 排列的锚点中，新行号最长递增的子序列（耐心排序，O(n log n)）"""
+    from bisect import bisect_left
+
+    tails = []      # tails[k]: 长度为 k+1 的递增序列的末尾新行号
+    tail_index = []
+    back = [-1] * len(pairs)
+    for idx, (_, j) in enumerate(pairs):
+        k = bisect_left(tails, j)
+        if k == len(tails):
+            tails.append(j)
+            tail_index.append(idx)
+        else:
+            tails[k] = j
+            tail_index[k] = idx
+        back[idx] = tail_index[k - 1] if k else -1
+
+    result = []
+    idx = tail_index[-1] if tail_index else -1
+    while idx >= 0:
+        result.append(pairs[idx])
+        idx = back[idx]
+    result.reverse()
+    return result
+
+def diff_sequences(a, b):
+    """
+    逐行比对两个版本（patience diff）
+
+    先去掉相同的首尾，再以两侧各只出现一次的行为锚点取最长递增子序列，
+    对锚点之间的区间继续同样处理；没有锚点的小区间交给 difflib 精确比对。
+    协议改版通常只改动少数段落，数万段的文档也只需接近线性的时间。
+
+    Args:
+        a: 旧版本文本行列表
+        b: 新版本文本行列表
+
+    Returns:
+        difflib 风格的操作码列表 [(tag, i1, i2, j1, j2), ...]，相邻的同类操作已合并
+    """
+    import difflib
+
+    opcodes = []
+
+    def emit(tag, i1, i2, j1, j2):
+        if i1 == i2 and j1 == j2:
+            return
+        if tag != 'equal':
+            tag = 'replace' if i1 < i2 and j1 < j2 else ('delete' if i1 < i2 else 'insert')
+        if opcodes:
+            last = opcodes[-1]
+            if last[0] == tag or (tag != 'equal' and last[0] != 'equal'):
+                if last[0] != tag:
+                    tag = 'replace'
+                opcodes[-1] = (tag, last[1], i2, last[3], j2)
+                return
+        opcodes.append((tag, i1, i2, j1, j2))
+
+    # 显式栈代替递归，超长文档也不会超出递归深度；按文档顺序出栈
+    stack = [('diff', 0, len(a), 0, len(b))]
+    while stack:
+        task, i1, i2, j1, j2 = stack.pop()
+        if task == 'equal':
+            emit('equal', i1, i2, j1, j2)
+            continue
+
+        start_i, start_j = i1, j1
+        while i1 < i2 and j1 < j2 and a[i1] == b[j1]:
+            i1 += 1
+            j1 += 1
+        emit('equal', start_i, i1, start_j, j1)
+        end_i, end_j = i2, j2
+        while i2 > i1 and j2 > j1 and a[i2 - 1] == b[j2 - 1]:
+            i2 -= 1
+            j2 -= 1
+        if i2 < end_i:
+            stack.append(('equal', i2, end_i, j2, end_j))
+
+        if i1 == i2 or j1 == j2:
+            emit('change', i1, i2, j1, j2)
+            continue
+
+        counts = {}
+        for i in range(i1, i2):
+            line = a[i]
+            entry = counts.get(line)
+            if entry is None:
+                counts[line] = [1, i, 0, 0]
+            else:
+                entry[0] += 1
+        for j in range(j1, j2):
+            entry = counts.get(b[j])
+            if entry is not None:
+                entry[2] += 1
+                entry[3] = j
+        pairs = sorted((entry[1], entry[3]) for entry in counts.values() if entry[0] == 1 and entry[2] == 1)
+        anchors = _longest_increasing_anchors(pairs)
+
+        if not anchors:
+            if (i2 - i1) * (j2 - j1) <= DIFF_EXACT_LIMIT:
+                matcher = difflib.SequenceMatcher(None, a[i1:i2], b[j1:j2], autojunk=False)
+                for tag, si1, si2, sj1, sj2 in matcher.get_opcodes():
+                    emit(tag, i1 + si1, i1 + si2, j1 + sj1, j1 + sj2)
+            else:
+                emit('change', i1, i2, j1, j2)
+            continue
+
+        # 锚点之间的区间逆序入栈
+        tasks = []
+        prev_i, prev_j = i1, j1
+        for ai, bj in anchors:
+            tasks.append(('diff', prev_i, ai, prev_j, bj))
+            tasks.append(('equal', ai, ai + 1, bj, bj + 1))
+            prev_i, prev_j = ai + 1, bj + 1
+        tasks.append(('diff', prev_i, i2, prev_j, j2))
+        stack.extend(reversed(tasks))
+
+    return opcodes
+
+def group_diff_opcodes(opcodes, context=DIFF_CONTEXT):
+    """将操作码分组为带上下文的改动块（与 difflib.SequenceMatcher.get_grouped_opcodes 相同）"""
+    if not opcodes:
+        return []
+    codes = list(opcodes)
+    if codes[0][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    if codes[-1][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+
+    groups = []
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        # 较长的相同区间在此切分，两侧各保留 context 行
+        if tag == 'equal' and i2 - i1 > context * 2:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            groups.append(group)
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        groups.append(group)
+    return [g for g in groups if any(code[0] != 'equal' for code in g)]
+
+def inline_diff(old, new):
+    """
+    逐字比对修改前后的一行
+
+    Returns:
+        带 <del>/<ins> 标记的HTML；两行差异过大或过长时返回None
+    """
+    import difflib
+
+    if len(old) + len(new) > DIFF_INLINE_MAX_CHARS:
+        return None
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    if matcher.quick_ratio() < DIFF_INLINE_RATIO or matcher.ratio() < DIFF_INLINE_RATIO:
+        return None
+    parts = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            parts.append(html_escape(old[i1:i2]))
+            continue
+        if i1 < i2:
+            parts.append(f'<del>{html_escape(old[i1:i2])}</del>')
+        if j1 < j2:
+            parts.append(f'<ins>{html_escape(new[j1:j2])}</ins>')
+    return ''.join(parts)
+
+def render_diff_report(old_doc, new_doc, opcodes, context=DIFF_CONTEXT):
+    """
+    生成两个版本的HTML变更报告
+
+    Args:
+        old_doc: 旧版本（load_diff_document 的结果）
+        new_doc: 新版本
+        opcodes: diff_sequences 的结果
+        context: 每处改动前后保留的上下文段落数
+
+    Returns:
+        (HTML字符串, 统计字典 {'added', 'removed', 'modified'})
+    """
+    a, b = old_doc['lines'], new_doc['lines']
+    stats = {'added': 0, 'removed': 0, 'modified': 0}
+    hunks = []
+
+    def line(cls, text):
+        return f'<div class="line {cls}">{text}</div>'
+
+    for group in group_diff_opcodes(opcodes, context):
+        first = group[0]
+        # 章节取第一处改动所在位置（新增内容按新版本计）
+        change = next(code for code in group if code[0] != 'equal')
+        if change[3] < change[4]:
+            section = new_doc['sections'][change[3]]
+        else:
+            section = old_doc['sections'][change[1]]
+        rows = [f'<h2>所在章节：{html_escape(section) if section else "（开头）"}'
+                f'<span class="no">第 {first[3] + 1} 段</span></h2>']
+
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                rows.extend(line('ctx', html_escape(b[j])) for j in range(j1, j2))
+                continue
+            paired = min(i2 - i1, j2 - j1) if tag == 'replace' else 0
+            removed, added = [], []
+            for k in range(paired):
+                merged = inline_diff(a[i1 + k], b[j1 + k])
+                if merged is None:
+                    removed.append(i1 + k)
+                    added.append(j1 + k)
+                else:
+                    stats['modified'] += 1
+                    rows.append(line('mod', merged))
+            removed.extend(range(i1 + paired, i2))
+            added.extend(range(j1 + paired, j2))
+            stats['removed'] += len(removed)
+            stats['added'] += len(added)
+            rows.extend(line('del', html_escape(a[i])) for i in removed)
+            rows.extend(line('ins', html_escape(b[j])) for j in added)
+
+        hunks.append('<section class="hunk">\n' + '\n'.join(rows) + '\n</section>')
+
+    title = new_doc['title'] or old_doc['title']
+    summary = (f'<span class="ins">新增 {stats["added"]} 段</span>，'
+               f'<span class="del">删除 {stats["removed"]} 段</span>，'
+               f'<span class="mod">修改 {stats["modified"]} 段</span>') if hunks else '两个版本内容相同'
+
+    def version(label, doc):
+        return (f'<p class="meta">{label}：{html_escape(Path(doc["docx_path"]).name)}'
+                f'（生效日期：{html_escape(doc["date"] or "未知")}，{len(doc["lines"])} 段）</p>')
+
+    html = (
+        '<!DOCTYPE html>\n<html lang="zh-CN">\n<head>\n<meta charset="UTF-8">\n'
+        '<meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+        f'<title>{html_escape(title)} - 版本变更</title>\n'
+        f'<style>{minify_css(DIFF_REPORT_CSS)}</style>\n</head>\n<body>\n<main>\n'
+        f'<h1>{html_escape(title)}</h1>\n'
+        f'{version("旧版本", old_doc)}\n{version("新版本", new_doc)}\n'
+        f'<p class="summary">{summary}</p>\n'
+        + '\n<div class="gap">⋯</div>\n'.join(hunks) +
+        '\n</main>\n</body>\n</html>\n'
+    )
+    return html, stats
+
+def _diff_version_key(doc):
+    """文档的类型和排序键（与转换输出的文件名规则一致）"""
+    name = generate_english_filename(doc['title'], doc['date'])[:-len('.html')]
+    doc_type, _, date_str = name.rpartition('-')
+    return doc_type, date_str
+
+def pair_document_versions(docs, explicit=False):
+    """
+    将文档按版本配对
+
+    同一目录中同类型的文档按生效日期排序，相邻两个版本为一对；
+    explicit 为True时（命令行只指定了两个文件）直接把这两个文件按日期配对。
+
+    Returns:
+        [(旧版本, 新版本), ...]
+    """
+    def sort_key(doc):
+        return _diff_version_key(doc)[1], Path(doc['docx_path']).name
+
+    if explicit:
+        old_doc, new_doc = sorted(docs, key=sort_key)
+        return [(old_doc, new_doc)]
+
+    groups = {}
+    for doc in docs:
+        groups.setdefault((str(Path(doc['docx_path']).parent), _diff_version_key(doc)[0]), []).append(doc)
+    pairs = []
+    for key in sorted(groups):
+        versions = sorted(groups[key], key=sort_key)
+        pairs.extend(zip(versions, versions[1:]))
+    return pairs
+
+def diff_report_path(old_doc, new_doc, output_dir=None):
+    """变更报告路径：<输出目录>/<类型>-<旧日期>-to-<新日期>.html，默认输出到新版本目录的 changes/"""
+    doc_type, old_date = _diff_version_key(old_doc)
+    _, new_date = _diff_version_key(new_doc)
+    if old_date == new_date:
+        old_date, new_date = Path(old_doc['docx_path']).stem, Path(new_doc['docx_path']).stem
+    dir_path = Path(output_dir) if output_dir else Path(new_doc['docx_path']).parent / DIFF_DIRNAME
+    return dir_path / f'{doc_type}-{old_date}-to-{new_date}.html'
+
+def diff_versions(docx_files, jobs=None, rule_files=None, ir_format=None, output_dir=None,
+                  explicit=False, on_result=None):
+    """
+    批量对比相邻版本并写出HTML变更报告
+
+    每个文档只读取一次（即使同时属于前后两对），读取在进程池中并行执行；
+    比对本身接近线性，在当前进程中完成。
+
+    Args:
+        docx_files: Word文件路径列表
+        jobs: 并行进程数（默认CPU核数；为1时在当前进程中顺序执行）
+        rule_files: 标题规则文件列表
+        ir_format: 中间表示缓存格式（None时只读取已有缓存）
+        output_dir: 报告输出目录（默认为新版本目录的 changes/）
+        explicit: 把两个文件直接配对（见 pair_document_versions）
+        on_result: 每对完成时的回调，参数为结果字典
+
+    Returns:
+        结果列表：成功时为 old、new、report、stats、wall_ms，读取失败时为 docx_path、error
+    """
+    results = []
+
+    def collect(result):
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(docx_files)))
+    if jobs == 1:
+        docs = [load_diff_document(path, rule_files, ir_format) for path in docx_files]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            docs = list(pool.map(load_diff_document, docx_files,
+                                 [rule_files] * len(docx_files), [ir_format] * len(docx_files)))
+
+    for doc in docs:
+        if 'error' in doc:
+            collect(doc)
+    docs = [doc for doc in docs if 'error' not in doc]
+    if explicit and len(docs) != 2:
+        return results
+
+    for old_doc, new_doc in pair_document_versions(docs, explicit):
+        wall = time.perf_counter()
+        opcodes = diff_sequences(old_doc['lines'], new_doc['lines'])
+        html, stats = render_diff_report(old_doc, new_doc, opcodes)
+        report = diff_report_path(old_doc, new_doc, output_dir)
+        report.parent.mkdir(parents=True, exist_ok=True)
+        _write_bytes_atomic(report, html.encode('utf-8'))
+        collect({
+            'old': old_doc['docx_path'],
+            'new': new_doc['docx_path'],
+            'report': str(report),
+            'stats': stats,
+            'wall_ms': round((time.perf_counter() - wall) * 1000, 3),
+        })
+    return results
+
+# 监视模式：轮询间隔（秒）。空闲时每次轮询只是列一遍目录，几乎不占CPU
+WATCH_INTERVAL = 2.0
+# 文件最后一次变化后需保持不变的时间（秒），Word保存时的多次写入和改名合并为一次转换
+WATCH_DEBOUNCE = 1.0
+
+def scan_docx_files(inputs, recursive=False):
+    """
+    列出监视范围内的docx文件及其签名（修改时间、大小），跳过 ~$ 开头的Word锁文件/临时文件
+
+    Args:
+        inputs: 目录或 .docx 文件路径列表
+        recursive: 是否包含子目录
+
+    Returns:
+        {Path: (st_mtime_ns, st_size)}
+    """
+    found = {}
+
+    def add(path, stat):
+        if not path.name.startswith('~$') and path.suffix.lower() == '.docx':
+            found[path] = (stat.st_mtime_ns, stat.st_size)
+
+    def scan_dir(dir_path):
+        try:
+            entries = list(os.scandir(dir_path))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    add(Path(entry.path), entry.stat())
+                elif recursive and entry.is_dir(follow_symlinks=False):
+                    scan_dir(entry.path)
+            except OSError:
+                # 扫描期间被删除或改名（Word保存时常见），下一轮再处理
+                continue
+
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            scan_dir(path)
+        else:
+            try:
+                add(path, path.stat())
+            except OSError:
+                continue
+    return found
+
+def watch_docx_changes(inputs, recursive=False, interval=WATCH_INTERVAL, debounce=WATCH_DEBOUNCE):
+    """
+    轮询监视docx文件，产出已稳定的变化文件列表
+
+    文件签名变化后开始计时，在 debounce 秒内再次变化则重新计时；
+    计时结束后与同一轮中其他已稳定的文件一起产出。删除的文件不产出。
+
+    Yields:
+        变化文件的路径列表（按路径排序）
+    """
+    known = scan_docx_files(inputs, recursive)
+    pending = {}
+    while True:
+        # 有待处理的变化时缩短间隔，及时在防抖结束后转换
+        time.sleep(min(interval, debounce / 2) if pending else interval)
+        now = time.monotonic()
+        current = scan_docx_files(inputs, recursive)
+        for path, signature in current.items():
+            if known.get(path) != signature:
+                pending[path] = now
+        for path in list(pending):
+            if path not in current:
+                del pending[path]
+        known = current
+
+        ready = sorted(path for path, changed_at in pending.items() if now - changed_at >= debounce)
+        if ready:
+            for path in ready:
+                del pending[path]
+            yield ready
 
-def get_footer_links(docx_path):
+def convert_batch(docx_files, jobs=None, on_result=None, force=False, options=None, executor=None):
     """
-    扫描目录，根据已存在的HTML文件动态生成footer链接
+    使用进程池批量转换Word文档
 
     Args:
-        docx_path: Word文件路径
+        docx_files: Word文件路径列表
+        jobs: 并行进程数（默认CPU核数；为1时在当前进程中顺序执行）
+        on_result: 每个文件完成时的回调，参数为转换结果字典
+        force: 忽略增量缓存，强制重新转换
+        options: 转换选项字典，原样传给 convert_document
+        executor: 使用已有的进程池（守护进程模式），此时忽略 jobs
 
     Returns:
-        footer链接HTML字符串
+        转换结果列表（按完成顺序）
     """
-    dir_path = Path(docx_path).parent
+    results = []
 
-    # 定义文档类型到显示名称的映射
-    doc_type_names = {
-        'user-agreement': '用户协议',
-        'privacy-policy': '隐私协议',
-        'children-privacy': '儿童隐私保护',
-        'document': '第三方清单',
-    }
+    def collect(result):
+        results.append(result)
+        if on_result:
+            on_result(result)
 
-    # 扫描目录中的所有HTML文件
-    html_files = list(dir_path.glob("*.html"))
+    options = options or {}
+    options_hash = get_options_hash(options)
 
-    # 按文档类型分组，只保留最新的版本（如果有多个日期版本）
-    latest_files = {}
-    for html_file in html_files:
-        filename = html_file.stem
-        doc_type = get_document_type_from_filename(filename)
-
-        # 如果该类型还没有文件，或者当前文件更新（通过修改时间判断）
-        if doc_type not in latest_files:
-            latest_files[doc_type] = html_file
+    # 读取各输出目录的缓存，跳过未变化的文档
+    caches = {}
+    templates = {}
+    pending = []
+    for docx_path in docx_files:
+        docx_path = Path(docx_path)
+        try:
+            template = templates[docx_path] = get_document_template(docx_path, options.get('template'))
+        except ValueError as e:
+            collect({'success': False, 'docx_path': str(docx_path), 'error': str(e), 'traceback': ''})
+            continue
+        entries = caches.setdefault(docx_path.parent, load_conversion_cache(docx_path.parent))
+        docx_hash = file_sha256(docx_path)
+        cached = None if force else lookup_conversion_cache(docx_path, docx_hash, entries, options_hash,
+                                                            template.hash)
+        if cached:
+            collect(cached)
         else:
-            # 比较修改时间，保留最新的
-            if html_file.stat().st_mtime > latest_files[doc_type].stat().st_mtime:
-                latest_files[doc_type] = html_file
+            pending.append((docx_path, docx_hash))
 
-    # 生成footer链接
-    links = []
-    for doc_type, html_file in latest_files.items():
-        label = doc_type_names.get(doc_type, html_file.stem)
-        links.append(f'          <a href="./{html_file.name}">{label}</a>\n')
+    def record(result, docx_path, docx_hash):
+        if result['success']:
+            caches[docx_path.parent][docx_path.name] = make_cache_entry(
+                result, docx_hash, options_hash, templates[docx_path].hash)
+        collect(result)
 
-    # 按照固定顺序排序：用户协议、隐私协议、儿童隐私、其他
-    order = ['user-agreement', 'privacy-policy', 'children-privacy', 'document']
-    sorted_links = []
-    for doc_type in order:
-        if doc_type in latest_files:
-            html_file = latest_files[doc_type]
-            label = doc_type_names[doc_type]
-            sorted_links.append(f'          <a href="./{html_file.name}">{label}</a>\n')
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(pending)))
 
-    # 添加其他类型
-    for doc_type, html_file in latest_files.items():
-        if doc_type not in order:
-            label = doc_type_names.get(doc_type, html_file.stem)
-            sorted_links.append(f'          <a href="./{html_file.name}">{label}</a>\n')
+    def run_in(pool):
+        from concurrent.futures import as_completed
+        futures = {
+            pool.submit(convert_document, docx_path, '', options, False, docx_hash): (docx_path, docx_hash)
+            for docx_path, docx_hash in pending
+        }
+        for future in as_completed(futures):
+            record(future.result(), *futures[future])
 
-    return ''.join(sorted_links)
+    if executor is not None:
+        run_in(executor)
+    elif jobs == 1:
+        for docx_path, docx_hash in pending:
+            record(convert_document(docx_path, '', options, False, docx_hash), docx_path, docx_hash)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            run_in(pool)
 
-def generate_html(content, title, date, docx_path):
-    """生成HTML文件，内容严格从Word提取"""
-    docx_file = Path(docx_path)
-    # 使用英文+日期格式生成文件名
-    html_filename = generate_english_filename(title, date)
-    html_path = docx_file.parent / html_filename
+    # 新写入的页面按目录统一登记到footer链接索引（每个目录写一次）
+    written = {}
+    for r in results:
+        if r['success'] and not r.get('skipped'):
+            html_path = Path(r['html_path'])
+            written.setdefault(html_path.parent, []).append(html_path.name)
+    for dir_path, html_names in written.items():
+        update_footer_index(dir_path, html_names)
 
-    # 获取动态footer链接
-    footer_links = get_footer_links(docx_path)
+    # 跳过的页面引用的共享CSS/JS可能已被删除，按目录和模板补齐
+    if options.get('assets') == 'external':
+        restore = {}
+        for r in results:
+            if r.get('skipped'):
+                template = templates[Path(r['docx_path'])]
+                restore[(Path(r['html_path']).parent, template.source)] = template
+        for (dir_path, _), template in restore.items():
+            write_page_assets(dir_path, options.get('minify', False), template)
 
-    # 智能修复标题序号
-    content = fix_heading_numbers(content)
+    # 全部输出生成后再统一解析footer链接（跳过的页面也需要更新兄弟页面链接）
+    links_by_dir = resolve_footer_links([r['html_path'] for r in results if r['success']])
 
-    # 处理日期
-    if date:
-        date_display = date
-    else:
-        # 默认使用当前月份的1日
-        now = datetime.now()
-        date_display = f"{now.year}年{now.month}月1日"
-
-    # CSS 样式（内联）
-    css = """<style>
-:root {
-  --primary-color: #E88A7A;
-  --primary-light: #F0A898;
-  --primary-dark: #D86A5A;
-  --bg-color: #FFF9F7;
-  --card-bg: #FFFFFF;
-  --text-primary: #3D3A38;
-  --text-secondary: #6B6662;
-  --text-light: #9A958F;
-  --border-color: #F0EBE7;
-  --spacing-xs: 8px;
-  --spacing-sm: 12px;
-  --spacing-md: 16px;
-  --spacing-lg: 24px;
-  --spacing-xl: 32px;
-  --border-radius: 12px;
-  --shadow: 0 2px 12px rgba(232, 138, 122, 0.1);
-}
-* {
-  margin: 0;
-  padding: 0;
-  box-sizing: border-box;
-}
-html {
-  font-size: 16px;
-  -webkit-text-size-adjust: 100%;
-  -webkit-tap-highlight-color: transparent;
-}
-body {
-  font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'PingFang SC', 'Hiragino Sans GB', 'Microsoft YaHei', 'Helvetica Neue', Helvetica, Arial, sans-serif;
-  background: var(--bg-color);
-  color: var(--text-primary);
-  line-height: 1.8;
-  min-height: 100vh;
-}
-body.in-miniprogram {
-  padding-bottom: env(safe-area-inset-bottom);
-}
-.page-wrapper {
-  min-height: 100vh;
-  display: flex;
-  flex-direction: column;
-}
-.header {
-  background: var(--card-bg);
-  padding: var(--spacing-lg) var(--spacing-md);
-  border-bottom: 1px solid var(--border-color);
-}
-.header-content {
-  max-width: 800px;
-  margin: 0 auto;
-}
-.header-title {
-  color: var(--text-primary);
-  font-size: 1.5rem;
-  font-weight: 600;
-  margin-bottom: var(--spacing-xs);
-}
-.header-subtitle {
-  color: var(--text-light);
-  font-size: 0.85rem;
-}
-.main-content {
-  flex: 1;
-  padding: var(--spacing-lg) var(--spacing-md);
-  max-width: 800px;
-  margin: 0 auto;
-  width: 100%;
-}
-.content-card {
-  background: var(--card-bg);
-  border-radius: var(--border-radius);
-  box-shadow: var(--shadow);
-  padding: var(--spacing-lg) var(--spacing-md);
-  overflow: hidden;
-}
-.content-card h1 {
-  font-size: 1.4rem;
-  font-weight: 700;
-  color: var(--text-primary);
-  margin-bottom: var(--spacing-md);
-  padding-bottom: var(--spacing-sm);
-  border-bottom: 2px dashed var(--border-color);
-}
-.content-card h2 {
-  font-size: 1.15rem;
-  font-weight: 700;
-  color: var(--text-primary);
-  margin-top: var(--spacing-lg);
-  margin-bottom: var(--spacing-sm);
-  padding-left: 12px;
-  border-left: 4px solid var(--primary-color);
-}
-.content-card h3 {
-  font-size: 1.05rem;
-  font-weight: 700;
-  color: var(--text-primary);
-  margin-top: var(--spacing-md);
-  margin-bottom: var(--spacing-xs);
-}
-.content-card p {
-  margin-bottom: var(--spacing-sm);
-  color: var(--text-secondary);
-  text-align: justify;
-  line-height: 1.9;
-}
-.content-card strong,
-.content-card b {
-  color: var(--primary-dark);
-  font-weight: 600;
-}
-.content-card a {
-  color: var(--primary-color);
-  text-decoration: underline;
-  text-underline-offset: 2px;
-}
-.content-card ol,
-.content-card ul {
-  margin: var(--spacing-sm) 0;
-  padding-left: var(--spacing-lg);
-  color: var(--text-secondary);
-  line-height: 1.9;
-}
-.content-card ol li,
-.content-card ul li {
-  margin-bottom: var(--spacing-xs);
-}
-.content-card ol {
-  list-style: decimal;
-}
-.content-card ol li::marker {
-  color: var(--primary-color);
-  font-weight: 600;
-}
-.content-card ul {
-  list-style: disc;
-}
-.content-card ul li::marker {
-  color: var(--primary-light);
-}
-.emphasis-box {
-  background: #FAF3F1;
-  border-left: 3px solid var(--primary-color);
-  border-radius: 4px;
-  padding: var(--spacing-md);
-  margin: var(--spacing-md) 0;
-}
-.emphasis-box p {
-  margin-bottom: 0;
-  color: var(--text-primary);
-}
-.table-wrapper {
-  margin: var(--spacing-lg) 0;
-  overflow-x: auto;
-  -webkit-overflow-scrolling: touch;
-}
-.content-card table {
-  width: 100%;
-  border-collapse: collapse;
-  background: #fff;
-  border-radius: 8px;
-  overflow: hidden;
-  box-shadow: 0 2px 8px rgba(0, 0, 0, 0.06);
-  min-width: 600px;
-}
-.content-card thead {
-  background: var(--primary-color);
-}
-.content-card thead th {
-  color: #fff;
-  font-weight: 600;
-  padding: var(--spacing-md);
-  text-align: left;
-  border-bottom: 2px solid var(--primary-dark);
-}
-.content-card tbody tr {
-  border-bottom: 1px solid var(--border-color);
-  transition: background-color 0.2s;
-}
-.content-card tbody tr:last-child {
-  border-bottom: none;
-}
-.content-card tbody tr:hover {
-  background: #FAF9F8;
-}
-.content-card td {
-  padding: var(--spacing-md);
-  color: var(--text-secondary);
-  line-height: 1.6;
-}
-.content-card td a {
-  color: var(--primary-color);
-  text-decoration: none;
-  word-break: break-all;
-}
-.content-card td a:hover {
-  text-decoration: underline;
-}
-.footer {
-  background: var(--card-bg);
-  border-top: 1px solid var(--border-color);
-  padding: var(--spacing-lg) var(--spacing-md);
-  margin-top: var(--spacing-lg);
-}
-.footer-content {
-  max-width: 800px;
-  margin: 0 auto;
-  text-align: center;
-}
-.footer-links {
-  display: flex;
-  flex-wrap: wrap;
-  justify-content: center;
-  gap: var(--spacing-md);
-  margin-bottom: var(--spacing-md);
-}
-.footer-links a {
-  color: var(--text-secondary);
-  text-decoration: none;
-  font-size: 0.85rem;
-  transition: color 0.2s;
-}
-.footer-links a:hover {
-  color: var(--primary-color);
-}
-.footer-copyright {
-  color: var(--text-light);
-  font-size: 0.8rem;
-}
-.back-top {
-  position: fixed;
-  right: var(--spacing-md);
-  bottom: var(--spacing-md);
-  width: 44px;
-  height: 44px;
-  background: var(--primary-color);
-  color: #fff;
-  border: none;
-  border-radius: 50%;
-  box-shadow: 0 4px 12px rgba(232, 138, 122, 0.25);
-  cursor: pointer;
-  opacity: 0;
-  visibility: hidden;
-  transition: all 0.25s;
-  z-index: 99;
-  display: flex;
-  align-items: center;
-  justify-content: center;
-  font-size: 1rem;
-}
-.back-top.visible {
-  opacity: 1;
-  visibility: visible;
-}
-.back-top:hover {
-  background: var(--primary-dark);
-  transform: translateY(-2px);
-}
-@media (min-width: 768px) {
-  html {
-    font-size: 16px;
-  }
-  .header {
-    padding: var(--spacing-xl) var(--spacing-lg);
-  }
-  .header-title {
-    font-size: 1.5rem;
-  }
-  .main-content {
-    padding: var(--spacing-xl);
-  }
-  .content-card {
-    padding: var(--spacing-xl);
-  }
-  .content-card h1 {
-    font-size: 1.5rem;
-  }
-  .content-card h2 {
-    font-size: 1.2rem;
-  }
-  .footer-links a {
-    font-size: 0.95rem;
-  }
-}
-@media (min-width: 1200px) {
-  .main-content {
-    padding: var(--spacing-xl) 0;
-  }
-  .content-card {
-    padding: 40px;
-  }
-}
-@media (max-width: 374px) {
-  html {
-    font-size: 14px;
-  }
-  .header {
-    padding: var(--spacing-md) var(--spacing-sm);
-  }
-  .main-content {
-    padding: var(--spacing-md) var(--spacing-sm);
-  }
-  .content-card {
-    padding: var(--spacing-md) var(--spacing-sm);
-    border-radius: var(--spacing-sm);
-  }
-}
-@media (min-width: 376px) and (max-width: 767px) {
-  body.in-miniprogram .content-card {
-    border-radius: 0;
-  }
-}
-@media print {
-  .header,
-  .footer,
-  .back-top {
-    display: none;
-  }
-  .content-card {
-    box-shadow: none;
-    border: none;
-  }
-  body {
-    background: #fff;
-  }
-}
-@keyframes fadeIn {
-  from {
-    opacity: 0;
-    transform: translateY(10px);
-  }
-  to {
-    opacity: 1;
-    transform: translateY(0);
-  }
-}
-.main-content {
-  animation: fadeIn 0.4s ease-out;
-}
-::-webkit-scrollbar {
-  width: 6px;
-  height: 6px;
-}
-::-webkit-scrollbar-track {
-  background: var(--bg-color);
-}
-::-webkit-scrollbar-thumb {
-  background: var(--primary-light);
-  border-radius: 3px;
-}
-::-webkit-scrollbar-thumb:hover {
-  background: var(--primary-color);
-}
-</style>
-"""
+    # footer回填后页面才是最终内容，此时再统计大小并写出预压缩文件
+    if options.get('minify') or options.get('precompress'):
+        for r in results:
+            if not r['success']:
+                continue
+            html_path = Path(r['html_path'])
+            sizes = r.setdefault('sizes', {})
+            if 'original' in sizes:
+                # 子进程统计时footer链接为空，补上未压缩的链接字节数
+                footer_write, footer_written = count_written_bytes()
+                footer_write(links_by_dir[html_path.parent])
+                sizes['original'] += footer_written()
+            if options.get('precompress'):
+                sizes.update(precompress_page(html_path))
+            else:
+                sizes['html'] = html_path.stat().st_size
 
-    # HTML 模板
-    html_content = f"""<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-  <meta charset="UTF-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no, viewport-fit=cover">
-  <meta name="format-detection" content="telephone=no, email=no">
-  <meta name="apple-mobile-web-app-capable" content="yes">
-  <meta name="apple-mobile-web-app-status-bar-style" content="black-translucent">
-  <title>{title}</title>
-  {css}
-</head>
-<body>
-  <div class="page-wrapper">
-    <header class="header">
-      <div class="header-content">
-        <h1 class="header-title">{title}</h1>
-        <p class="header-subtitle">生效日期：{date_display}</p>
-      </div>
-    </header>
-
-    <main class="main-content">
-      <article class="content-card">
-"""
+    if pending:
+        for dir_path, entries in caches.items():
+            try:
+                save_conversion_cache(dir_path, entries)
+            except OSError as e:
+                print(f"[警告] 无法写入转换缓存 {Path(dir_path) / CACHE_FILENAME}: {e}")
 
-    # 严格添加Word文档内容，不修改任何文字
-    for item in content:
-        # 处理表格类型
-        if item.get('type') == 'table':
-            html_content += f'        {item["html"]}\n'
-            continue
+    return results
 
-        # 处理段落类型
-        text = item['text']
-        level = item['level']
-
-        if level == 1:
-            html_content += f'        <h1>{text}</h1>\n'
-        elif level == 2:
-            html_content += f'        <h2>{text}</h2>\n'
-        elif level == 3:
-            html_content += f'        <h3>{text}</h3>\n'
-        elif level == 4:
-            html_content += f'        <h4>{text}</h4>\n'
-        elif level == 5:
-            html_content += f'        <h5>{text}</h5>\n'
-        elif level == 6:
-            html_content += f'        <h6>{text}</h6>\n'
-        else:
-            # 普通段落，保持原样
-            html_content += f'        <p>{text}</p>\n'
-
-    # 结束HTML
-    html_content += """      </article>
-    </main>
-
-    <footer class="footer">
-      <div class="footer-content">
-        <nav class="footer-links">
-""" + footer_links + """        </nav>
-        <p class="footer-copyright">上海东桓文化科技有限公司 © 2026</p>
-      </div>
-    </footer>
-
-    <button class="back-top" id="backTop" aria-label="返回顶部">▲</button>
-  </div>
-
-  <script>
-    const backTop = document.getElementById('backTop');
-    function toggleBackTop() {
-      if (window.scrollY > 300) {
-        backTop.classList.add('visible');
-      } else {
-        backTop.classList.remove('visible');
-      }
+def print_single_result(result):
+    """打印单个文件的转换结果"""
+    html_path = Path(result['html_path'])
+    print(f"[成功] 提取了 {result['count']} 个段落")
+    print(f"[信息] 标题：{result['title']}")
+    print(f"[信息] 生效日期：{result['date']}")
+
+    print(f"\n{'='*60}")
+    print(f"[完成] HTML文件已生成")
+    print(f"{'='*60}")
+    print(f"Word文件: {result['docx_path']}")
+    print(f"HTML文件: {html_path.absolute()}")
+    print(f"{'='*60}\n")
+    print(f"请在浏览器中访问以下地址查看效果：")
+    print(f"file:///{html_path.absolute().as_posix()}")
+    print(f"\n提示：Windows用户可以直接双击HTML文件打开")
+
+# 守护进程模式：常驻进程保持 python-docx/lxml 已导入、工作进程已启动，
+# 命令行检测到运行中的服务时只作为客户端提交任务
+DAEMON_HOST = '127.0.0.1'
+DAEMON_TOKEN_HEADER = 'X-H5-Token'
+# 客户端探测服务是否可用的超时（秒）
+DAEMON_CONNECT_TIMEOUT = 0.5
+# 单个请求体的上限
+DAEMON_MAX_REQUEST = 1024 * 1024
+
+def daemon_state_path():
+    """服务状态文件（pid、端口、访问令牌），位于当前用户的临时目录"""
+    import tempfile
+    import getpass
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = 'default'
+    user = re.sub(r'[^\w.-]', '_', user)
+    return Path(tempfile.gettempdir()) / f'h5-convert-daemon-{user}.json'
+
+def script_signature():
+    """转换器版本 + 脚本文件的修改时间和大小；脚本更新后客户端不再使用旧的服务"""
+    stat = Path(__file__).stat()
+    return f'{CONVERTER_VERSION}:{stat.st_mtime_ns}:{stat.st_size}'
+
+class ConversionDaemon:
+    """
+    常驻转换服务：持有预热的进程池，限制同时执行的任务数
+
+    同一输出目录的任务串行执行，避免并发改写目录中的缓存和footer索引。
+    """
+
+    def __init__(self, max_jobs=2, workers=None):
+        from concurrent.futures import ProcessPoolExecutor
+        import threading
+
+        self.max_jobs = max_jobs
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=load_dependencies)
+        self.slots = threading.BoundedSemaphore(max_jobs)
+        self.lock = threading.Lock()
+        self.dir_locks = {}
+        self.running = 0
+        self.completed = 0
+
+    def warm_up(self):
+        """启动全部工作进程并完成导入，第一个任务无需等待"""
+        for future in [self.pool.submit(load_dependencies) for _ in range(self.workers)]:
+            future.result()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    def status(self):
+        with self.lock:
+            return {
+                'pid': os.getpid(),
+                'version': CONVERTER_VERSION,
+                'max_jobs': self.max_jobs,
+                'workers': self.workers,
+                'running': self.running,
+                'completed': self.completed,
+            }
+
+    def _dir_locks(self, docx_files):
+        import threading
+        with self.lock:
+            keys = sorted({os.path.normcase(str(Path(p).resolve().parent)) for p in docx_files})
+            return [self.dir_locks.setdefault(key, threading.Lock()) for key in keys]
+
+    def run_job(self, job):
+        """
+        执行一个转换任务
+
+        Args:
+            job: 任务字典：paths（文件、目录或通配符列表）、recursive、force、options
+
+        Returns:
+            {'ok': True, 'results': [...], 'invalid': [...]}
+
+        Raises:
+            ValueError: 任务格式错误
+        """
+        if not isinstance(job, dict):
+            raise ValueError('任务必须是JSON对象')
+        paths = job.get('paths')
+        if not isinstance(paths, list) or not paths or not all(isinstance(p, str) for p in paths):
+            raise ValueError('paths 必须是非空的路径字符串列表')
+        options = job.get('options') or {}
+        if not isinstance(options, dict):
+            raise ValueError('options 必须是JSON对象')
+
+        docx_files, invalid = collect_docx_files(paths, recursive=bool(job.get('recursive')))
+        with self.slots:
+            with self.lock:
+                self.running += 1
+            # 按固定顺序获取目录锁，避免两个任务互相等待
+            locks = self._dir_locks(docx_files)
+            for lock in locks:
+                lock.acquire()
+            try:
+                results = convert_batch(docx_files, force=bool(job.get('force')),
+                                        options=options, executor=self.pool)
+            finally:
+                for lock in reversed(locks):
+                    lock.release()
+                with self.lock:
+                    self.running -= 1
+                    self.completed += 1
+        return {'ok': True, 'results': results, 'invalid': invalid}
+
+def serve_http(daemon, port=0):
+    """
+    在本机回环地址上提供HTTP接口（GET /status，POST /convert），直到 Ctrl+C
+
+    访问令牌写入只有当前用户可读的状态文件，请求需在 X-H5-Token 头中携带。
+    """
+    import secrets
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    token = secrets.token_hex(16)
+
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def authorized(self):
+            if secrets.compare_digest(self.headers.get(DAEMON_TOKEN_HEADER, ''), token):
+                return True
+            self.reply(403, {'ok': False, 'error': '访问令牌无效'})
+            return False
+
+        def do_GET(self):
+            if self.path != '/status':
+                self.reply(404, {'ok': False, 'error': '未知接口'})
+            elif self.authorized():
+                self.reply(200, dict(daemon.status(), ok=True, signature=script_signature()))
+
+        def do_POST(self):
+            if self.path != '/convert':
+                self.reply(404, {'ok': False, 'error': '未知接口'})
+                return
+            if not self.authorized():
+                return
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > DAEMON_MAX_REQUEST:
+                self.reply(413, {'ok': False, 'error': '请求过大'})
+                return
+            try:
+                response = daemon.run_job(json.loads(self.rfile.read(length) or b'null'))
+            except ValueError as e:
+                self.reply(400, {'ok': False, 'error': str(e)})
+                return
+            self.reply(200, response)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((DAEMON_HOST, port), Handler)
+    server.daemon_threads = True
+    state = {
+        'pid': os.getpid(),
+        'port': server.server_address[1],
+        'token': token,
+        'signature': script_signature(),
     }
-    backTop.addEventListener('click', () => {
-      window.scrollTo({ top: 0, behavior: 'smooth' });
-    });
-    window.addEventListener('scroll', toggleBackTop);
-    toggleBackTop();
-
-    const isMiniprogram = /miniprogram/i.test(navigator.userAgent) ||
-                         window.__wxjs_environment === 'miniprogram';
-    if (isMiniprogram) document.body.classList.add('in-miniprogram');
-  </script>
-</body>
-</html>
-"""
+    state_path = daemon_state_path()
+    tmp_path = state_path.with_name(f'{state_path.name}.{os.getpid()}.tmp')
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
 
-    # 写入HTML文件
-    with open(html_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    print(f"[服务] 转换服务已启动：http://{DAEMON_HOST}:{state['port']}"
+          f"（同时执行任务数 {daemon.max_jobs}，工作进程 {daemon.workers}），按 Ctrl+C 停止")
+    print(f"[服务] 状态文件：{state_path}", flush=True)
 
-    return html_path
+    # kill/任务管理器结束进程时同样清理状态文件
+    import signal
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            if json.loads(state_path.read_text(encoding='utf-8')).get('pid') == os.getpid():
+                state_path.unlink()
+        except (OSError, ValueError):
+            pass
+
+def serve_stdin(daemon):
+    """
+    从标准输入逐行读取JSON任务，每个任务完成后向标准输出写一行JSON结果
+
+    请求中的 id 字段原样带回；结果按完成顺序输出。转换过程中的提示信息输出到标准错误。
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    import threading
+
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    write_lock = threading.Lock()
+
+    def handle(line):
+        job_id = None
+        try:
+            job = json.loads(line)
+            if isinstance(job, dict):
+                job_id = job.get('id')
+            response = daemon.run_job(job)
+        except ValueError as e:
+            response = {'ok': False, 'error': str(e)}
+        except Exception as e:
+            response = {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+        response['id'] = job_id
+        with write_lock:
+            out.write(json.dumps(response, ensure_ascii=False) + '\n')
+            out.flush()
+
+    with ThreadPoolExecutor(max_workers=daemon.max_jobs) as threads:
+        for line in sys.stdin:
+            if line.strip():
+                threads.submit(handle, line)
+
+def daemon_request(state, method, path, payload=None, timeout=None):
+    """向转换服务发送请求，返回响应JSON；连接失败或服务返回错误时抛出 OSError"""
+    import http.client
+
+    conn = http.client.HTTPConnection(DAEMON_HOST, state['port'], timeout=timeout)
+    try:
+        body = None if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        conn.request(method, path, body=body, headers={
+            DAEMON_TOKEN_HEADER: state['token'],
+            'Content-Type': 'application/json; charset=utf-8',
+        })
+        response = conn.getresponse()
+        data = json.loads(response.read().decode('utf-8'))
+    except ValueError as e:
+        raise OSError(f'无效的服务响应: {e}')
+    finally:
+        conn.close()
+    if response.status != 200:
+        raise OSError(data.get('error') or f'HTTP {response.status}')
+    return data
+
+def convert_via_daemon(state, docx_files, force=False, options=None):
+    """
+    把转换任务交给运行中的服务执行
+
+    Returns:
+        与 convert_batch 格式相同的结果列表（docx_path 还原为调用方传入的路径）
+
+    Raises:
+        OSError: 服务不可用或返回错误
+    """
+    originals = {str(Path(p).resolve()): str(p) for p in docx_files}
+    response = daemon_request(state, 'POST', '/convert', {
+        'paths': list(originals),
+        'force': force,
+        'options': options or {},
+    })
+    results = response['results']
+    for result in results:
+        result['docx_path'] = originals.get(result['docx_path'], result['docx_path'])
+    return results
+
+def find_daemon():
+    """
+    查找运行中的转换服务
+
+    Returns:
+        服务状态字典（pid、port、token）；没有服务、脚本已更新或无法连接时返回None
+    """
+    try:
+        state = json.loads(daemon_state_path().read_text(encoding='utf-8'))
+        if state.get('signature') != script_signature():
+            return None
+        daemon_request(state, 'GET', '/status', timeout=DAEMON_CONNECT_TIMEOUT)
+    except (OSError, ValueError, KeyError, AttributeError):
+        return None
+    return state
+
+def format_size(size):
+    """字节数格式化为 KB"""
+    return f"{size / 1024:.1f} KB"
+
+def print_size_report(results):
+    """打印压缩/预压缩前后的页面大小（每个页面一行，最后汇总）"""
+    pages = [r for r in results if r['success'] and r.get('sizes')]
+    if not pages:
+        return
+
+    totals = {}
+    for r in pages:
+        sizes = r['sizes']
+        parts = []
+        if 'original' in sizes:
+            saved = 1 - sizes['html'] / sizes['original'] if sizes['original'] else 0
+            parts.append(f"原始 {format_size(sizes['original'])} → 压缩后 {format_size(sizes['html'])}（-{saved:.0%}）")
+        else:
+            parts.append(f"HTML {format_size(sizes['html'])}")
+        for suffix, label in (('gz', 'gzip'), ('br', 'brotli')):
+            if suffix in sizes:
+                parts.append(f"{label} {format_size(sizes[suffix])}")
+        print(f"[大小] {Path(r['html_path']).name}: {'，'.join(parts)}")
+        for key, size in sizes.items():
+            totals[key] = totals.get(key, 0) + size
+
+    if len(pages) > 1:
+        parts = [f"HTML {format_size(totals['html'])}"]
+        if 'original' in totals:
+            parts.insert(0, f"原始 {format_size(totals['original'])}")
+        for suffix, label in (('gz', 'gzip'), ('br', 'brotli')):
+            if suffix in totals:
+                parts.append(f"{label} {format_size(totals[suffix])}")
+        print(f"[大小] 合计 {len(pages)} 个页面: {'，'.join(parts)}")
+
+def watch_main(args, options):
+    """--watch 模式：启动时同步一次，之后只转换变化的文档并刷新所在目录的footer导航"""
+    inputs = []
+    for item in args.paths:
+        path = Path(item)
+        if path.is_dir() or (path.is_file() and path.suffix.lower() == '.docx'):
+            inputs.append(path)
+        else:
+            print(f"[警告] 跳过无效路径（--watch 只接受目录或 .docx 文件）: {item}")
+    if not inputs:
+        print("[错误] 没有可监视的目录或文件")
+        sys.exit(1)
+    if args.watch_interval <= 0 or args.debounce < 0:
+        print("[错误] --watch-interval 必须大于0，--debounce 不能为负数")
+        sys.exit(1)
+    if args.jobs is not None and args.jobs < 1:
+        print("[错误] --jobs 必须大于等于 1")
+        sys.exit(1)
+
+    load_dependencies()
+
+    def report(result):
+        if result.get('skipped'):
+            return
+        if result['success']:
+            print(f"[成功] {result['docx_path']} → {Path(result['html_path']).name}（{result['count']} 个段落）")
+        else:
+            print(f"[错误] {result['docx_path']} 转换失败: {result['error']}")
+
+    def convert(docx_files):
+        jobs = min(args.jobs or os.cpu_count() or 1, len(docx_files))
+        results = convert_batch(docx_files, jobs=jobs, on_result=report, force=args.force, options=options)
+        # 转换只回填本次生成的页面，同目录其他页面的footer导航也需要刷新
+        dirs = {Path(r['html_path']).parent for r in results if r['success'] and not r.get('skipped')}
+        for relinked in relink_directories(sorted(dirs)):
+            for name in relinked['changed']:
+                print(f"[已更新] {Path(relinked['dir']) / name} 的footer导航")
+        return results
+
+    # 启动时同步一次：增量缓存会跳过未变化的文档
+    initial = sorted(scan_docx_files(inputs, args.recursive))
+    if initial:
+        convert(initial)
+    print(f"[监视] 正在监视 {', '.join(str(p) for p in inputs)}"
+          f"（轮询间隔 {args.watch_interval:g} 秒，防抖 {args.debounce:g} 秒），按 Ctrl+C 停止", flush=True)
+
+    try:
+        for changed in watch_docx_changes(inputs, args.recursive, args.watch_interval, args.debounce):
+            for path in changed:
+                print(f"[变化] {path}")
+            convert(changed)
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        print("\n[监视] 已停止")
+
+def relink_main(args):
+    """--relink 模式：并行重写各目录页面的footer导航并报告变化"""
+    dir_paths, invalid = collect_html_dirs(args.paths, recursive=args.recursive)
+    for item in invalid:
+        print(f"[警告] 跳过无效路径（不存在或不是目录/HTML文件）: {item}")
+    if not dir_paths:
+        print("[错误] 未找到包含HTML页面的目录")
+        sys.exit(1)
+    if args.jobs is not None and args.jobs < 1:
+        print("[错误] --jobs 必须大于等于 1")
+        sys.exit(1)
+
+    action = '需要更新' if args.dry_run else '已更新'
+
+    def report(result):
+        for name in result['changed']:
+            print(f"[{action}] {Path(result['dir']) / name}")
+        for name, error in result['errors'].items():
+            print(f"[错误] {Path(result['dir']) / name}: {error}")
+
+    results = relink_directories(dir_paths, jobs=args.jobs, on_result=report, dry_run=args.dry_run)
+
+    changed = sum(len(r['changed']) for r in results)
+    pages = sum(r['pages'] for r in results)
+    skipped = sum(len(r['skipped']) for r in results)
+    errors = sum(len(r['errors']) for r in results)
+    print(f"\n{'='*60}")
+    print(f"[完成] {len(results)} 个目录，{pages} 个页面，{action} {changed} 个"
+          f"（无footer导航跳过 {skipped} 个），失败 {errors} 个")
+    print(f"{'='*60}")
+
+    if errors or (args.dry_run and changed):
+        sys.exit(1)
+
+def diff_main(args, options):
+    """--diff 模式：对比相邻版本的文档并写出HTML变更报告"""
+    docx_files, invalid = collect_docx_files(args.paths, recursive=args.recursive)
+    for item in invalid:
+        print(f"[警告] 跳过无效路径（不存在或不是 .docx 文件）: {item}")
+    if len(docx_files) < 2:
+        print("[错误] 至少需要两个 .docx 文件才能对比版本")
+        sys.exit(1)
+    if args.jobs is not None and args.jobs < 1:
+        print("[错误] --jobs 必须大于等于 1")
+        sys.exit(1)
+
+    # 只指定两个文件时直接对比，不要求文档类型相同
+    explicit = len(args.paths) == 2 and all(Path(p).is_file() for p in args.paths) and len(docx_files) == 2
+
+    def report(result):
+        if 'error' in result:
+            print(f"[错误] {result['docx_path']}: {result['error']}")
+            return
+        stats = result['stats']
+        print(f"[变更] {Path(result['old']).name} -> {Path(result['new']).name}: "
+              f"新增 {stats['added']} 段，删除 {stats['removed']} 段，修改 {stats['modified']} 段 "
+              f"-> {result['report']}")
+
+    results = diff_versions(docx_files, jobs=args.jobs, rule_files=options.get('heading_rules'),
+                            ir_format=options.get('ir_cache'), output_dir=args.diff_output,
+                            explicit=explicit, on_result=report)
+
+    reports = [r for r in results if 'error' not in r]
+    errors = len(results) - len(reports)
+    changed = sum(1 for r in reports if any(r['stats'].values()))
+    print(f"\n{'='*60}")
+    print(f"[完成] 对比了 {len(reports)} 对版本，其中 {changed} 对有变化，读取失败 {errors} 个文件")
+    print(f"{'='*60}")
+
+    if errors:
+        sys.exit(1)
 
 def main():
-    if len(sys.argv) != 2:
-        print("使用方法: python convert-docx.py <word文件路径>")
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='将Word协议文档转换为H5页面',
+        usage='python convert-docx.py <word文件路径|目录|通配符> [...] [选项]\n'
+              '       python convert-docx.py --serve [--port PORT] [--max-jobs N] [-j N]'
+    )
+    parser.add_argument('paths', nargs='*', help='Word文件路径、目录或通配符（可指定多个）')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='批量转换时的并行进程数（默认：CPU核数）')
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help='递归扫描目录中的子目录')
+    parser.add_argument('-f', '--force', action='store_true',
+                        help='忽略增量缓存，强制重新转换所有文档')
+    parser.add_argument('--heading-rules', action='append', metavar='FILE',
+                        help='自定义标题规则文件（JSON，可多次指定，优先于内置规则）')
+    parser.add_argument('--rebuild-index', action='store_true',
+                        help=f'扫描给定目录中的HTML文件，重建footer链接索引（{FOOTER_INDEX_FILENAME}）后退出')
+    parser.add_argument('--relink', action='store_true',
+                        help='不重新转换Word，只按目录索引重写给定目录中所有页面的footer导航后退出')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='与 --relink 一起使用：只列出footer导航过期的页面，不写入（存在过期页面时退出码为1）')
+    parser.add_argument('--diff', action='store_true',
+                        help='对比同一目录中同类型文档的相邻版本（或指定的两个文件），输出HTML变更报告')
+    parser.add_argument('--diff-output', metavar='DIR',
+                        help=f'变更报告输出目录（默认：新版本所在目录的 {DIFF_DIRNAME}/）')
+    parser.add_argument('--template', metavar='NAME|DIR',
+                        help=f'页面模板：{TEMPLATES_DIR.name}/ 下的模板名称或模板目录（默认 {DEFAULT_TEMPLATE}；'
+                             f'文档目录中的 {TEMPLATE_SELECT_FILENAME} 优先）')
+    parser.add_argument('--assets', choices=ASSET_MODES, default='inline',
+                        help='inline：CSS/JS内联到每个页面（默认，单文件可独立使用）；'
+                             'external：每个输出目录共享一份按内容哈希命名的 agreement.<hash>.css/.js')
+    parser.add_argument('--minify', action='store_true',
+                        help='压缩输出的HTML/CSS/JS（只去掉模板的缩进、换行和注释，正文文本不变）')
+    parser.add_argument('--precompress', action='store_true',
+                        help='在每个页面旁写出 .gz（安装了 brotli 模块时同时写出 .br）预压缩文件')
+    parser.add_argument('--long-doc', action='store_true',
+                        help='长文档模式：根据二、三级标题生成目录，靠后的章节使用 content-visibility 延后布局')
+    parser.add_argument('--ir-cache', nargs='?', const='auto', choices=IR_CACHE_FORMATS,
+                        help='在每个docx旁边缓存解析结果（中间表示，.<文件名>.h5-ir.json/.msgpack），'
+                             '文档未变化时重新渲染不再解析docx；auto（默认）：安装了 msgpack 时使用 msgpack')
+    parser.add_argument('--table-chunk-rows', type=int, default=0, metavar='N',
+                        help='表体超过N行的表格分块显示，滚动时逐块加载（默认0：不分块）')
+    parser.add_argument('--profile', nargs='?', const='-', metavar='FILE',
+                        help=f'输出各阶段耗时、计数和内存峰值（JSON lines，默认输出到stderr；'
+                             f'也可设置环境变量 {PROFILE_ENV}）')
+    parser.add_argument('--profile-dump', metavar='DIR',
+                        help=f'为每个文档保存 cProfile 统计到目录（也可设置环境变量 {PROFILE_DUMP_ENV}）')
+    parser.add_argument('--watch', action='store_true',
+                        help='监视给定目录（-r 包含子目录），文档保存后自动重新转换并刷新footer导航')
+    parser.add_argument('--watch-interval', type=float, default=WATCH_INTERVAL, metavar='SECONDS',
+                        help=f'--watch 的轮询间隔（默认 {WATCH_INTERVAL:g} 秒）')
+    parser.add_argument('--debounce', type=float, default=WATCH_DEBOUNCE, metavar='SECONDS',
+                        help=f'--watch 中文件停止变化多久后才转换（默认 {WATCH_DEBOUNCE:g} 秒）')
+    parser.add_argument('--serve', action='store_true',
+                        help='启动常驻转换服务（本机HTTP），之后的命令行调用自动交给服务执行')
+    parser.add_argument('--serve-stdin', action='store_true',
+                        help='常驻服务的标准输入模式：逐行读取JSON任务，逐行输出JSON结果')
+    parser.add_argument('--port', type=int, default=0,
+                        help='--serve 监听的本机端口（默认0：自动选择，写入状态文件）')
+    parser.add_argument('--max-jobs', type=int, default=2, metavar='N',
+                        help='常驻服务同时执行的任务数（默认2；工作进程数由 -j 指定）')
+    parser.add_argument('--no-daemon', action='store_true',
+                        help='即使常驻服务正在运行，也在当前进程中转换')
+    args = parser.parse_args()
+
+    if args.serve or args.serve_stdin:
+        if args.max_jobs < 1 or (args.jobs is not None and args.jobs < 1):
+            print("[错误] --max-jobs 和 --jobs 必须大于等于 1")
+            sys.exit(1)
+        load_dependencies()
+        daemon = ConversionDaemon(max_jobs=args.max_jobs, workers=args.jobs)
+        try:
+            daemon.warm_up()
+            if args.serve_stdin:
+                serve_stdin(daemon)
+            else:
+                serve_http(daemon, args.port)
+        finally:
+            daemon.close()
+        return
+
+    if not args.paths:
+        parser.error('请指定Word文件路径、目录或通配符')
+
+    if args.profile or args.profile_dump:
+        output = args.profile or os.environ.get(PROFILE_ENV) or '-'
+        if output != '-':
+            output = str(Path(output).resolve())
+        dump_dir = str(Path(args.profile_dump).resolve()) if args.profile_dump else None
+        enable_profiling(output, dump_dir)
+
+    if args.relink:
+        relink_main(args)
+        return
+
+    if args.rebuild_index:
+        for item in args.paths:
+            dir_path = Path(item) if Path(item).is_dir() else Path(item).parent
+            if not dir_path.is_dir():
+                print(f"[警告] 跳过不存在的目录: {item}")
+                continue
+            files = rebuild_footer_index(dir_path)
+            latest = latest_html_by_type(files)
+            print(f"[完成] {dir_path}: 索引了 {len(files)} 个HTML文件，"
+                  f"最新版本：{', '.join(latest[t] for t in sorted(latest)) or '无'}")
+        return
+
+    options = {}
+    if args.table_chunk_rows < 0:
+        print("[错误] --table-chunk-rows 不能为负数")
         sys.exit(1)
+    if args.table_chunk_rows:
+        options['table_chunk_rows'] = args.table_chunk_rows
+    if args.assets != 'inline':
+        options['assets'] = args.assets
+    if args.long_doc:
+        options['long_doc'] = True
+    if args.minify:
+        options['minify'] = True
+    if args.precompress:
+        options['precompress'] = True
+        if _brotli_module() is None:
+            print("[提示] 未安装 brotli 模块，只生成 .gz 文件（pip install brotli 后可同时生成 .br）")
+    if args.template:
+        template_path = Path(args.template)
+        options['template'] = str(template_path.resolve()) if template_path.is_dir() else args.template
+        # 提前加载并编译模板，避免每个文档都报同样的错误
+        try:
+            load_page_template(options['template']).compile(args.minify)
+        except ValueError as e:
+            print(f"[错误] {e}")
+            sys.exit(1)
+    if args.ir_cache:
+        options['ir_cache'] = resolve_ir_format(args.ir_cache)
+        if args.ir_cache == 'msgpack' and _msgpack_module() is None:
+            print("[提示] 未安装 msgpack 模块，中间表示缓存改用JSON（pip install msgpack 后可使用 msgpack）")
+            options['ir_cache'] = 'json'
+    if args.heading_rules:
+        options['heading_rules'] = [str(Path(p).resolve()) for p in args.heading_rules]
+        # 提前校验规则文件，避免每个文档都报同样的错误
+        try:
+            get_heading_classifier(options['heading_rules'])
+        except ValueError as e:
+            print(f"[错误] {e}")
+            sys.exit(1)
+
+    if args.diff:
+        diff_main(args, options)
+        return
+
+    if args.watch:
+        watch_main(args, options)
+        return
 
-    docx_path = sys.argv[1]
+    # 单个文件保持原有的校验提示
+    if len(args.paths) == 1 and not Path(args.paths[0]).is_dir():
+        import glob
+        docx_path = args.paths[0]
+        if not glob.has_magic(docx_path):
+            if not os.path.exists(docx_path):
+                print(f"[错误] 文件不存在: {docx_path}")
+                sys.exit(1)
+            if not docx_path.lower().endswith('.docx'):
+                print(f"[错误] 文件格式错误，请提供 .docx 文件: {docx_path}")
+                sys.exit(1)
 
-    if not os.path.exists(docx_path):
-        print(f"[错误] 文件不存在: {docx_path}")
+    docx_files, invalid = collect_docx_files(args.paths, recursive=args.recursive)
+    for item in invalid:
+        print(f"[警告] 跳过无效路径（不存在或不是 .docx 文件）: {item}")
+
+    if not docx_files:
+        print("[错误] 未找到可转换的 .docx 文件")
         sys.exit(1)
 
-    if not docx_path.lower().endswith('.docx'):
-        print(f"[错误] 文件格式错误，请提供 .docx 文件: {docx_path}")
+    if args.jobs is not None and args.jobs < 1:
+        print("[错误] --jobs 必须大于等于 1")
         sys.exit(1)
 
-    try:
+    # 常驻服务运行时交给服务转换（分析模式始终在当前进程中执行）
+    daemon = None if args.no_daemon or _profiler is not None else find_daemon()
+
+    def convert(files, jobs, on_result=None):
+        if daemon is not None:
+            try:
+                results = convert_via_daemon(daemon, files, args.force, options)
+            except OSError as e:
+                print(f"[警告] 转换服务不可用，改为在当前进程中转换: {e}")
+            else:
+                if on_result:
+                    for result in results:
+                        on_result(result)
+                return results
+        # 使用中间表示缓存时只在需要解析docx时才加载 python-docx
+        if not options.get('ir_cache'):
+            load_dependencies()
+        return convert_batch(files, jobs=jobs, on_result=on_result, force=args.force, options=options)
+
+    # 单文件：保持详细输出
+    if len(docx_files) == 1 and not invalid:
         print(f"[开始] 正在读取Word文档...")
-        content, title, date = extract_text_from_docx(docx_path)
-        print(f"[成功] 提取了 {len(content)} 个段落")
-        print(f"[信息] 标题：{title}")
-        print(f"[信息] 生效日期：{date}")
-
-        html_path = generate_html(content, title, date, docx_path)
-
-        print(f"\n{'='*60}")
-        print(f"[完成] HTML文件已生成")
-        print(f"{'='*60}")
-        print(f"Word文件: {docx_path}")
-        print(f"HTML文件: {html_path.absolute()}")
-        print(f"{'='*60}\n")
-        print(f"请在浏览器中访问以下地址查看效果：")
-        print(f"file:///{html_path.absolute().as_posix()}")
-        print(f"\n提示：Windows用户可以直接双击HTML文件打开")
+        result = convert(docx_files, 1)[0]
+        if not result['success']:
+            print(f"[错误] 转换失败: {result['error']}")
+            print(result['traceback'], end='')
+            sys.exit(1)
+        if result.get('skipped'):
+            print(f"[跳过] 文档未变化，沿用已生成的HTML（使用 --force 强制重新转换）")
+        print_single_result(result)
+        print_size_report([result])
+        return
 
-    except Exception as e:
-        print(f"[错误] 转换失败: {e}")
-        import traceback
-        traceback.print_exc()
+    # 批量模式
+    jobs = min(args.jobs or os.cpu_count() or 1, len(docx_files))
+    if daemon is not None:
+        print(f"[开始] 共 {len(docx_files)} 个Word文档，由转换服务执行（pid {daemon['pid']}）")
+    else:
+        print(f"[开始] 共 {len(docx_files)} 个Word文档，并行进程数：{jobs}")
+    start_time = datetime.now()
+
+    def report(result):
+        if result.get('skipped'):
+            print(f"[跳过] {result['docx_path']} 未变化 → {Path(result['html_path']).name}")
+        elif result['success']:
+            print(f"[成功] {result['docx_path']} → {Path(result['html_path']).name}（{result['count']} 个段落）")
+        else:
+            print(f"[错误] {result['docx_path']} 转换失败: {result['error']}")
+
+    results = convert(docx_files, jobs, report)
+
+    failed = [r for r in results if not r['success']]
+    succeeded = [r for r in results if r['success']]
+    skipped = [r for r in succeeded if r.get('skipped')]
+
+    # 同一目录下标题和日期相同的文档会生成同名HTML，后完成的会覆盖先完成的
+    outputs = {}
+    for r in succeeded:
+        key = os.path.normcase(str(Path(r['html_path']).resolve()))
+        outputs.setdefault(key, []).append(r['docx_path'])
+    for html_key, sources in outputs.items():
+        if len(sources) > 1:
+            print(f"[警告] 多个文档生成了同一个HTML文件 {html_key}: {', '.join(sources)}")
+
+    print_size_report(results)
+
+    elapsed = (datetime.now() - start_time).total_seconds()
+    print(f"\n{'='*60}")
+    print(f"[完成] 成功 {len(succeeded)} 个（其中未变化跳过 {len(skipped)} 个），失败 {len(failed)} 个，耗时 {elapsed:.1f} 秒")
+    print(f"{'='*60}")
+
+    if failed:
         sys.exit(1)
 
 if __name__ == '__main__':
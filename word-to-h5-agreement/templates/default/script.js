@@ -0,0 +1,17 @@
+const backTop = document.getElementById('backTop');
+function toggleBackTop() {
+  if (window.scrollY > 300) {
+    backTop.classList.add('visible');
+  } else {
+    backTop.classList.remove('visible');
+  }
+}
+backTop.addEventListener('click', () => {
+  window.scrollTo({ top: 0, behavior: 'smooth' });
+});
+window.addEventListener('scroll', toggleBackTop);
+toggleBackTop();
+
+const isMiniprogram = /miniprogram/i.test(navigator.userAgent) ||
+                     window.__wxjs_environment === 'miniprogram';
+if (isMiniprogram) document.body.classList.add('in-miniprogram');
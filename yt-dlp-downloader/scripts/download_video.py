@@ -5,14 +5,148 @@ Supports downloading videos with customizable options
 """
 import subprocess
 import sys
+import errno
 import json
 import os
 import platform
+import selectors
 import socket
+import threading
+import time
 import urllib.request
 import urllib.error
+import urllib.parse
+from collections import deque
 from pathlib import Path
 
+# Batch mode defaults: total parallel downloads, and parallel downloads per host
+BATCH_WORKERS = 4
+BATCH_PER_HOST = 2
+
+# Clash proxy detection: candidate ports are probed in parallel within one timeout window
+CLASH_PORTS = range(7890, 7900)  # 7890 to 7899
+CLASH_PROBE_TIMEOUT = 1.5
+# CONNECT target on the loopback discard port: the proxy answers (or refuses) without dialing upstream
+CLASH_PROBE_TARGET = "127.0.0.1:9"
+# Non-blocking connect_ex results that mean "still connecting" (WSAEWOULDBLOCK on Windows)
+CONNECT_IN_PROGRESS = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, "WSAEWOULDBLOCK", errno.EWOULDBLOCK)}
+# How long (seconds) a detected proxy, or the absence of one, is remembered on disk
+CLASH_CACHE_TTL = 600
+CLASH_CACHE_TTL_NONE = 60
+
+# YouTube accessibility check: probe URL, per-request timeout, and how long (seconds) results are reused
+ACCESS_PROBE_URL = "https://www.youtube.com"
+ACCESS_PROBE_TIMEOUT = 10
+ACCESS_CACHE_TTL = 1800
+ACCESS_CACHE_TTL_FAIL = 60  # failures are retried sooner (network or proxy may come back)
+ACCESS_CACHE_PREFIX = "access:"
+
+# Streaming yt-dlp output: progress lines are parsed into events, other output keeps only a tail
+PROGRESS_PREFIX = "[progress] "
+PROGRESS_TEMPLATE = (
+    "download:" + PROGRESS_PREFIX +
+    "%(progress.status)s %(progress.downloaded_bytes)s %(progress.total_bytes)s "
+    "%(progress.total_bytes_estimate)s %(progress.speed)s %(progress.eta)s %(info.id)s"
+)
+OUTPUT_TAIL_LINES = 50
+OUTPUT_MAX_LINE = 4096
+
+# "auto" runs yt-dlp in-process through yt_dlp.YoutubeDL when the package is importable,
+# "subprocess" always runs the yt-dlp executable. Library calls keep the executable
+# unless asked otherwise; the command line uses CLI_ENGINE
+ENGINES = ("auto", "subprocess")
+DEFAULT_ENGINE = "subprocess"
+CLI_ENGINE = "auto"
+
+CACHE_FILENAME = "cache.json"
+_cache_lock = threading.Lock()
+
+def get_cache_path():
+    """
+    Location of the on-disk detection cache
+
+    Returns:
+        Path: %LOCALAPPDATA%/yt-dlp-downloader/cache.json on Windows,
+              $XDG_CACHE_HOME (or ~/.cache)/yt-dlp-downloader/cache.json elsewhere
+    """
+    if platform.system() == "Windows" and os.environ.get("LOCALAPPDATA"):
+        base = Path(os.environ["LOCALAPPDATA"])
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base / "yt-dlp-downloader" / CACHE_FILENAME
+
+def _read_cache():
+    try:
+        with open(get_cache_path(), encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _write_cache(data):
+    path = get_cache_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError:
+        # The cache is only an optimization
+        pass
+
+def load_cache_entry(key, ttl):
+    """
+    Read a cached value if it is younger than ttl seconds
+
+    Args:
+        key (str): Cache key
+        ttl (float): Maximum age in seconds
+
+    Returns:
+        dict or None: The stored entry ({"value": ..., "time": ...}), None if missing or expired
+    """
+    with _cache_lock:
+        entry = _read_cache().get(key)
+    if not isinstance(entry, dict) or "value" not in entry:
+        return None
+    age = time.time() - entry.get("time", 0)
+    if age < 0 or age > ttl:
+        return None
+    return entry
+
+def save_cache_entry(key, value):
+    """
+    Store a value in the on-disk cache with the current time
+
+    Args:
+        key (str): Cache key
+        value: JSON-serializable value
+    """
+    with _cache_lock:
+        data = _read_cache()
+        data[key] = {"value": value, "time": time.time()}
+        _write_cache(data)
+
+def invalidate_cache_entry(key, prefix=False, match=None):
+    """
+    Remove a value from the on-disk cache
+
+    Args:
+        key (str): Cache key
+        prefix (bool): Remove every key starting with key
+        match (callable): Only remove entries whose value match(value) accepts
+    """
+    with _cache_lock:
+        data = _read_cache()
+        keys = [k for k in data if k.startswith(key)] if prefix else [key] if key in data else []
+        if match is not None:
+            keys = [k for k in keys if isinstance(data[k], dict) and match(data[k].get("value"))]
+        for k in keys:
+            del data[k]
+        if keys:
+            _write_cache(data)
+
 def get_chrome_proxy():
     """
     Get proxy settings from Chrome browser
@@ -59,38 +193,120 @@ def get_chrome_proxy():
         # Silently fail - proxy is optional
         return None
 
-def detect_clash_proxy():
+def probe_http_proxies(ports, host="127.0.0.1", timeout=CLASH_PROBE_TIMEOUT, target=CLASH_PROBE_TARGET):
+    """
+    Find local ports that speak HTTP proxy
+
+    All ports are probed at once with non-blocking sockets: connect, send a
+    CONNECT request for target and read the status line. The default target is
+    a loopback address, so the proxy replies without waiting on an upstream
+    node. Closed ports fail immediately; ports that drop packets cost no more
+    than the shared timeout. Ports that answer with something other than HTTP
+    (e.g. SOCKS), close the connection or stay silent are rejected.
+
+    Args:
+        ports (iterable): Candidate ports
+        host (str): Proxy host
+        timeout (float): Total time budget in seconds for all ports
+        target (str): host:port used in the CONNECT request
+
+    Returns:
+        list: Ports that answered the CONNECT request with an HTTP status line,
+              ascending
+    """
+    request = f"CONNECT {target} HTTP/1.1\r\nHost: {target}\r\n\r\n".encode("ascii")
+    deadline = time.monotonic() + timeout
+    verified = []
+    # port -> received bytes (None until the request has been sent)
+    pending = {}
+
+    with selectors.DefaultSelector() as selector:
+        for port in ports:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            if sock.connect_ex((host, port)) not in CONNECT_IN_PROGRESS:
+                sock.close()
+                continue
+            pending[port] = None
+            selector.register(sock, selectors.EVENT_WRITE, port)
+
+        while pending:
+            # The lowest verified port wins; stop once no lower port is still in play
+            if verified and min(pending) > verified[0]:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for key, events in selector.select(remaining):
+                sock, port = key.fileobj, key.data
+                try:
+                    if events & selectors.EVENT_WRITE:
+                        if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR):
+                            raise OSError("connect failed")
+                        sock.sendall(request)
+                        pending[port] = b""
+                        selector.modify(sock, selectors.EVENT_READ, port)
+                        continue
+                    data = sock.recv(64)
+                    if not data:
+                        raise OSError("connection closed")
+                    pending[port] += data
+                    if b"\r\n" not in pending[port] and len(pending[port]) < 12:
+                        continue
+                    if pending[port].startswith(b"HTTP/1."):
+                        verified.append(port)
+                        verified.sort()
+                except OSError:
+                    pass
+                del pending[port]
+                selector.unregister(sock)
+                sock.close()
+
+        for key in list(selector.get_map().values()):
+            key.fileobj.close()
+
+    return verified
+
+def detect_clash_proxy(use_cache=True):
     """
     Detect Clash proxy by checking common Clash ports
 
+    Ports 7890-7899 are probed in parallel and verified with a CONNECT
+    handshake. The result is cached on disk (CLASH_CACHE_TTL seconds, or
+    CLASH_CACHE_TTL_NONE when nothing was found) so later runs skip the scan;
+    a cached proxy is re-verified with the same CONNECT handshake and the ports
+    are scanned again when it no longer answers.
+
+    Args:
+        use_cache (bool): Use and update the on-disk cache (default: True)
+
     Returns:
         str or None: Proxy URL if Clash is running, None otherwise
     """
     try:
-        # Check Clash ports 7890-7899
-        clash_ports = list(range(7890, 7900))  # 7890 to 7899
-
-        for port in clash_ports:
-            try:
-                # Try to connect to port
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.settimeout(0.5)
-                    result = s.connect_ex(('127.0.0.1', port))
-
-                    if result == 0:
-                        # Port is open - Clash is likely running
-                        # Default Clash HTTP proxy is usually 7890
-                        # Return HTTP proxy URL
-                        return f"http://127.0.0.1:{port}"
-            except Exception:
-                continue
+        if use_cache:
+            entry = load_cache_entry("clash_proxy", CLASH_CACHE_TTL)
+            if entry is not None:
+                proxy = entry["value"]
+                if proxy is None:
+                    if time.time() - entry["time"] <= CLASH_CACHE_TTL_NONE:
+                        return None
+                else:
+                    # Re-verify only the cached port; a stopped Clash fails at once
+                    port = int(proxy.rsplit(":", 1)[1])
+                    if probe_http_proxies([port]):
+                        return proxy
 
-        return None
+        ports = probe_http_proxies(CLASH_PORTS)
+        proxy = f"http://127.0.0.1:{ports[0]}" if ports else None
+        if use_cache:
+            save_cache_entry("clash_proxy", proxy)
+        return proxy
     except Exception as e:
         # Silently fail - proxy is optional
         return None
 
-def detect_proxy():
+def detect_proxy(use_cache=True):
     """
     Detect proxy from multiple sources with priority
 
@@ -98,6 +314,9 @@ def detect_proxy():
     1. Chrome system proxy (if configured)
     2. Clash proxy (if running)
 
+    Args:
+        use_cache (bool): Reuse the cached Clash detection result (default: True)
+
     Returns:
         dict: Proxy information with source and URL, or None
     """
@@ -111,7 +330,7 @@ def detect_proxy():
         }
 
     # Try Clash proxy
-    proxy = detect_clash_proxy()
+    proxy = detect_clash_proxy(use_cache)
     if proxy:
         return {
             "source": "Clash",
@@ -122,18 +341,40 @@ def detect_proxy():
     # No proxy found
     return None
 
-def test_youtube_access(proxy=None):
+def _probe_url(opener, url, method):
+    """Request url without downloading the body (HEAD, or GET for the first byte only)"""
+    request = urllib.request.Request(url, method=method, headers={
+        'User-Agent': 'Mozilla/5.0',
+        # Redirects are followed as GET, so limit the body there too
+        'Range': 'bytes=0-0',
+    })
+    with opener.open(request, timeout=ACCESS_PROBE_TIMEOUT) as response:
+        return response.getcode()
+
+def test_youtube_access(proxy=None, url=ACCESS_PROBE_URL, cache_ttl=ACCESS_CACHE_TTL):
     """
     Test if YouTube is accessible
 
+    Sends a HEAD request (falling back to a one-byte range GET if HEAD is
+    not allowed) instead of loading the page. The result is cached on disk
+    per host and route (direct or proxy) for cache_ttl seconds; a failure is
+    only reused for ACCESS_CACHE_TTL_FAIL seconds.
+
     Args:
         proxy (str): Proxy URL to use for testing
+        url (str): URL to probe (default: YouTube home page)
+        cache_ttl (float): Seconds to reuse a cached result, 0 to always probe
 
     Returns:
-        dict: Test result with accessible status and info
+        dict: Test result with accessible status and info ("cached": True if reused)
     """
-    import urllib.request
-    import urllib.error
+    cache_key = _access_cache_key(url, proxy)
+    if cache_ttl > 0:
+        entry = load_cache_entry(cache_key, cache_ttl)
+        if entry is not None and isinstance(entry["value"], dict):
+            if entry["value"].get("accessible") or \
+                    time.time() - entry["time"] <= ACCESS_CACHE_TTL_FAIL:
+                return dict(entry["value"], cached=True)
 
     try:
         # Create URL opener with proxy if specified
@@ -143,94 +384,498 @@ def test_youtube_access(proxy=None):
         else:
             opener = urllib.request.build_opener()
 
-        # Test with YouTube main page (timeout 10 seconds)
-        request = urllib.request.Request('https://www.youtube.com', headers={'User-Agent': 'Mozilla/5.0'})
-        response = opener.open(request, timeout=10)
+        try:
+            status = _probe_url(opener, url, "HEAD")
+        except urllib.error.HTTPError as e:
+            if e.code not in (405, 501):
+                raise
+            status = _probe_url(opener, url, "GET")
 
-        # Check if we got a valid response
-        if response.getcode() == 200:
-            return {
+        # Any successful response (200, or 206 for the range request) means reachable
+        if 200 <= status < 300:
+            result = {
                 "accessible": True,
                 "proxy_used": proxy if proxy else "Direct",
                 "status": "OK"
             }
         else:
-            return {
+            result = {
                 "accessible": False,
                 "proxy_used": proxy if proxy else "Direct",
-                "status": f"HTTP {response.getcode()}"
+                "status": f"HTTP {status}"
             }
     except (urllib.error.URLError, urllib.error.HTTPError, Exception) as e:
-        return {
+        result = {
             "accessible": False,
             "proxy_used": proxy if proxy else "Direct",
             "status": f"Error: {str(e)[:100]}"
         }
 
-def download_video(url, output_dir=".", format_id="bestvideo+bestaudio/best", cookies_browser=None, **kwargs):
+    if cache_ttl > 0:
+        save_cache_entry(cache_key, result)
+    return result
+
+def _access_cache_key(url, proxy=None):
+    return f"{ACCESS_CACHE_PREFIX}{url_host(url)}|{proxy or 'direct'}"
+
+def invalidate_access_cache(url):
     """
-    Download video using yt-dlp
+    Forget cached accessibility results for the host of url (all routes)
+
+    Called after a failed download so the next attempt probes again.
 
     Args:
-        url (str): Video URL
-        output_dir (str): Output directory (default: current directory)
-        format_id (str): Video format selector (default: bestvideo+bestaudio/best)
-        cookies_browser (str): Browser to use for cookies (default: tries 'chrome' if available)
-        **kwargs: Additional yt-dlp options
+        url (str): Any URL on the host
+    """
+    invalidate_cache_entry(f"{ACCESS_CACHE_PREFIX}{url_host(url)}|", prefix=True)
+
+def clear_access_failure(url, proxy=None):
+    """
+    Forget a cached "not accessible" result for one route
+
+    Called after a successful download, which proves the route works.
+
+    Args:
+        url (str): Any URL on the host
+        proxy (str): Proxy URL of the route, None for direct
+    """
+    invalidate_cache_entry(_access_cache_key(url, proxy),
+                           match=lambda value: isinstance(value, dict) and not value.get("accessible"))
+
+def is_ytdlp_installed():
+    """
+    Check if the yt-dlp executable is available
 
     Returns:
-        dict: Download result with status and info
+        bool: True if `yt-dlp --version` runs successfully
     """
-    # Ensure output directory exists
-    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    try:
+        subprocess.run(["yt-dlp", "--version"], capture_output=True, check=True)
+        return True
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return False
 
-    # Build command
-    cmd = ["yt-dlp", url]
+def _collect_tail(stream, tail):
+    """Read a text stream to the end, keeping only the last lines in tail (a bounded deque)"""
+    with stream:
+        for line in stream:
+            tail.append(line[:OUTPUT_MAX_LINE])
 
-    # Add format
-    cmd.extend(["-f", format_id])
+def _progress_value(text):
+    """Convert a progress template field to int/float; yt-dlp prints NA for unknown values"""
+    if text in ("NA", "None", ""):
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return float(text)
+        except ValueError:
+            return None
 
-    # Add output directory
-    cmd.extend(["-o", f"{output_dir}/%(title)s.%(ext)s"])
+def parse_progress_line(line):
+    """
+    Parse a line printed with PROGRESS_TEMPLATE
 
-    # Use browser cookies (default to chrome for better YouTube support)
-    if cookies_browser is None:
-        cookies_browser = kwargs.get("cookies_browser", "chrome")
+    Args:
+        line (str): A line of yt-dlp output
 
-    # Check if cookies_browser is specified and not empty
-    use_cookies = cookies_browser and cookies_browser.strip()
+    Returns:
+        dict or None: Progress event with status, downloaded_bytes, total_bytes,
+                      speed (bytes/s), eta (seconds), percent and video_id; None
+                      for other lines. Unknown numeric values are None.
+    """
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    fields = line[len(PROGRESS_PREFIX):].split()
+    if len(fields) < 7:
+        return None
+    status, downloaded, total, estimate, speed, eta, video_id = fields[:7]
+    return make_progress_event(
+        status, _progress_value(downloaded), _progress_value(total), _progress_value(estimate),
+        _progress_value(speed), _progress_value(eta), None if video_id == "NA" else video_id
+    )
 
-    # Get proxy from multiple sources with priority
-    manual_proxy = kwargs.get("proxy")
-    proxy_url = None
-    proxy_info = None
+def make_progress_event(status, downloaded, total, estimate, speed, eta, video_id):
+    """Build a progress event dict (shared by the subprocess and in-process engines)"""
+    if total is None:
+        total = estimate
+    percent = None
+    if downloaded is not None and total:
+        percent = min(100.0, downloaded * 100.0 / total)
+    return {
+        "status": status,
+        "downloaded_bytes": downloaded,
+        "total_bytes": total,
+        "speed": speed,
+        "eta": eta,
+        "percent": percent,
+        "video_id": video_id
+    }
 
-    if manual_proxy:
-        proxy_url = manual_proxy
-        proxy_info = {
-            "source": "Manual",
-            "url": manual_proxy,
-            "description": "Manually specified proxy"
+def format_bytes(size):
+    """Human-readable size (e.g. 12.34MiB)"""
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.2f}{unit}"
+        size /= 1024
+    return f"{size:.2f}GiB"
+
+def print_progress(event):
+    """
+    Print a progress event as a single updating console line
+
+    Args:
+        event (dict): Progress event from parse_progress_line
+    """
+    parts = ["[download]"]
+    if event["percent"] is not None:
+        parts.append(f"{event['percent']:5.1f}%")
+    if event["total_bytes"]:
+        parts.append(f"of {format_bytes(event['total_bytes'])}")
+    elif event["downloaded_bytes"] is not None:
+        parts.append(format_bytes(event["downloaded_bytes"]))
+    if event["speed"]:
+        parts.append(f"at {format_bytes(event['speed'])}/s")
+    if event["eta"] is not None:
+        minutes, seconds = divmod(int(event["eta"]), 60)
+        parts.append(f"ETA {minutes:02d}:{seconds:02d}")
+    end = "\n" if event["status"] == "finished" else ""
+    print("\r" + " ".join(parts).ljust(60), end=end, flush=True)
+
+class YtdlpRun:
+    """
+    Run yt-dlp and stream its progress instead of buffering all output
+
+    Progress lines (see PROGRESS_TEMPLATE) are parsed into event dicts as
+    they are printed; all other output is kept only as a bounded tail of
+    the last OUTPUT_TAIL_LINES lines per stream, so memory use stays flat
+    for long downloads and verbose logs.
+
+    Iterate the run to receive progress events, or call wait() with a
+    callback. Afterwards returncode, stdout and stderr (tails) are set.
+
+    Example:
+        run = YtdlpRun(["yt-dlp", url])
+        for event in run:
+            print(event["downloaded_bytes"], event["speed"], event["eta"])
+        print(run.returncode, run.stderr)
+    """
+
+    def __init__(self, cmd, tail_lines=OUTPUT_TAIL_LINES):
+        self.cmd = list(cmd) + ["--newline", "--progress-template", PROGRESS_TEMPLATE]
+        self.tail_lines = tail_lines
+        self.returncode = None
+        self.stdout = ""
+        self.stderr = ""
+
+    def __iter__(self):
+        stdout_tail = deque(maxlen=self.tail_lines)
+        stderr_tail = deque(maxlen=self.tail_lines)
+        process = subprocess.Popen(
+            self.cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1
+        )
+        # Drain stderr in the background so a chatty process never blocks on a full pipe
+        stderr_reader = threading.Thread(
+            target=_collect_tail, args=(process.stderr, stderr_tail), daemon=True
+        )
+        stderr_reader.start()
+        completed = False
+        try:
+            for line in process.stdout:
+                event = parse_progress_line(line)
+                if event is not None:
+                    yield event
+                else:
+                    stdout_tail.append(line[:OUTPUT_MAX_LINE])
+            completed = True
+        finally:
+            if not completed:
+                # Stopping the iteration early (or an error in the consumer) stops the download
+                process.kill()
+            process.stdout.close()
+            self.returncode = process.wait()
+            stderr_reader.join()
+            self.stdout = "".join(stdout_tail)
+            self.stderr = "".join(stderr_tail)
+
+    def wait(self, on_progress=None):
+        """
+        Run to completion
+
+        Args:
+            on_progress (callable): Called with each progress event
+
+        Returns:
+            subprocess.CompletedProcess: returncode plus the stdout/stderr tails
+        """
+        for event in self:
+            if on_progress:
+                on_progress(event)
+        return subprocess.CompletedProcess(self.cmd, self.returncode, self.stdout, self.stderr)
+
+def _ytdlp_module():
+    """Import the yt_dlp package if it is installed (in-process engine), otherwise None"""
+    try:
+        import yt_dlp
+        return yt_dlp
+    except ImportError:
+        return None
+
+def is_cookie_error(error):
+    """
+    Check whether a yt-dlp failure was caused by reading browser cookies
+
+    Args:
+        error: Exception or stderr text
+
+    Returns:
+        bool: True if the failure came from loading browser cookies
+    """
+    if isinstance(error, Exception):
+        yt_dlp = _ytdlp_module()
+        cookie_error = getattr(getattr(yt_dlp, "cookies", None), "CookieLoadError", None)
+        # YoutubeDL reports it as a DownloadError wrapping the CookieLoadError
+        causes = (error, (getattr(error, "exc_info", None) or (None, None))[1], error.__context__)
+        if cookie_error is not None and any(isinstance(cause, cookie_error) for cause in causes):
+            return True
+    text = str(error)
+    return "Could not copy" in text and "cookie" in text.lower()
+
+def parse_cookies_browser(cookies_browser):
+    """Convert a --cookies-from-browser value (BROWSER[:PROFILE]) to the YoutubeDL cookiesfrombrowser tuple"""
+    browser, _, profile = cookies_browser.strip().partition(":")
+    return (browser.lower(), profile or None, None, None)
+
+class _TailLogger:
+    """YoutubeDL logger that keeps only the last OUTPUT_TAIL_LINES messages per stream"""
+
+    def __init__(self):
+        self.stdout = deque(maxlen=OUTPUT_TAIL_LINES)
+        self.stderr = deque(maxlen=OUTPUT_TAIL_LINES)
+
+    def clear(self):
+        self.stdout.clear()
+        self.stderr.clear()
+
+    def debug(self, msg):
+        self.stdout.append(msg[:OUTPUT_MAX_LINE] + "\n")
+
+    info = debug
+
+    def warning(self, msg):
+        self.stderr.append(msg[:OUTPUT_MAX_LINE] + "\n")
+
+    error = warning
+
+class YtdlpEngine:
+    """
+    In-process yt-dlp engine built on yt_dlp.YoutubeDL
+
+    YoutubeDL instances are kept warm and reused across calls, so extractors
+    are initialized and browser cookies are read once per instance rather
+    than once per yt-dlp process. Instances are pooled per (proxy, cookies
+    browser); a call borrows an idle instance or creates one, so batch
+    downloads in parallel threads each get their own instance. Per-call
+    options (format, output template, subtitles, ...) are applied for the
+    duration of the call and then restored.
+    """
+
+    def __init__(self, yt_dlp):
+        self.yt_dlp = yt_dlp
+        self._idle = {}
+        self._lock = threading.Lock()
+        # Browsers whose cookies could not be read; later calls go straight to no cookies
+        self._cookie_failures = set()
+
+    def _create(self, proxy, cookies_browser):
+        logger = _TailLogger()
+        state = {"on_progress": None, "logger": logger}
+        params = {
+            "quiet": True,
+            "no_warnings": False,
+            "noprogress": True,
+            "logger": logger,
         }
-    else:
-        proxy_info = detect_proxy()  # Try Chrome first, then Clash
-        proxy_url = proxy_info["url"] if proxy_info else None
+        if proxy:
+            params["proxy"] = proxy
+        if cookies_browser:
+            params["cookiesfrombrowser"] = parse_cookies_browser(cookies_browser)
+        ydl = self.yt_dlp.YoutubeDL(params)
+
+        def hook(d):
+            if state["on_progress"] is not None:
+                state["on_progress"](make_progress_event(
+                    d.get("status"), d.get("downloaded_bytes"), d.get("total_bytes"),
+                    d.get("total_bytes_estimate"), d.get("speed"), d.get("eta"),
+                    (d.get("info_dict") or {}).get("id")
+                ))
+
+        ydl.add_progress_hook(hook)
+        return ydl, state
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+        return self._create(*key)
+
+    def _release(self, key, instance):
+        with self._lock:
+            self._idle.setdefault(key, []).append(instance)
+
+    def call(self, method, url, proxy=None, cookies_browser=None, params=None, on_progress=None):
+        """
+        Run a YoutubeDL operation on a warm instance
+
+        If browser cookies cannot be read, the call is retried without cookies
+        (same behavior as the subprocess path).
+
+        Args:
+            method (str): "info" (metadata), "formats" (format table) or "download"
+            url (str): Video URL
+            proxy (str): Proxy URL
+            cookies_browser (str): Browser to read cookies from ('' or None disables)
+            params (dict): YoutubeDL options applied for this call only
+            on_progress (callable): Called with progress events while downloading
+
+        Returns:
+            dict: On success "result" (sanitized info dict for "info"/"download",
+                  format table text for "formats"); on failure "error". Both carry
+                  "stdout"/"stderr" tails of yt-dlp messages, and "cookies_fallback"
+                  if cookies were dropped.
+        """
+        key = (proxy or None, (cookies_browser or "").strip() or None)
+        if key[1] in self._cookie_failures:
+            outcome = self.call(method, url, proxy, None, params, on_progress)
+            outcome["cookies_fallback"] = True
+            return outcome
+        instance = None
+        stdout = stderr = ""
+        saved = {}
+        missing = object()
+        try:
+            # Creating an instance can fail too (bad cookies browser spec, invalid options)
+            instance = ydl, state = self._acquire(key)
+            state["logger"].clear()
+            for name, value in (params or {}).items():
+                saved[name] = ydl.params.get(name, missing)
+                if name == "outtmpl":
+                    value = dict(ydl.params.get("outtmpl") or {}, default=value)
+                ydl.params[name] = value
+            state["on_progress"] = on_progress
+
+            if method == "formats":
+                info = ydl.extract_info(url, download=False)
+                outcome = {"result": ydl.render_formats_table(info) or f"{info.get('id')} has no formats"}
+            else:
+                info = ydl.extract_info(url, download=(method == "download"))
+                outcome = {"result": ydl.sanitize_info(info)}
+        except Exception as e:
+            outcome = {"error": str(e), "exception": e}
+        finally:
+            if instance is not None:
+                state["on_progress"] = None
+                for name, value in saved.items():
+                    if value is missing:
+                        ydl.params.pop(name, None)
+                    else:
+                        ydl.params[name] = value
+                # Read the message tails before another thread can borrow the instance
+                stdout = "".join(state["logger"].stdout)
+                stderr = "".join(state["logger"].stderr)
+                # A failed cookie load is not cached by YoutubeDL, so the instance stays reusable
+                self._release(key, instance)
+
+        outcome["stdout"] = stdout
+        outcome["stderr"] = stderr
+        if "error" in outcome and key[1] and (is_cookie_error(outcome["exception"]) or is_cookie_error(outcome["stderr"])):
+            # Fallback: retry without cookies
+            print(f"Warning: Could not use {cookies_browser} cookies. Retrying without cookies...")
+            with self._lock:
+                self._cookie_failures.add(key[1])
+            outcome = self.call(method, url, proxy, None, params, on_progress)
+            outcome["cookies_fallback"] = True
+        outcome.pop("exception", None)
+        return outcome
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """
+    Shared in-process engine
+
+    Returns:
+        YtdlpEngine or None: None if the yt_dlp package is not installed
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            yt_dlp = _ytdlp_module()
+            if yt_dlp is None:
+                return None
+            _engine = YtdlpEngine(yt_dlp)
+        return _engine
+
+def select_engine(engine=DEFAULT_ENGINE):
+    """
+    Pick the engine for a call
+
+    Args:
+        engine (str): "auto" (in-process when yt_dlp is importable) or "subprocess" (default)
+
+    Returns:
+        YtdlpEngine or None: None means run the yt-dlp executable
+    """
+    if engine == "subprocess":
+        return None
+    return get_engine()
+
+def resolve_proxy(manual_proxy=None, test_youtube=True, cache_ttl=ACCESS_CACHE_TTL):
+    """
+    Decide which proxy to use for downloads
+
+    A manual proxy is used as-is. Otherwise the proxy is auto-detected
+    (Chrome first, then Clash) and, if test_youtube is set, YouTube
+    accessibility is checked, searching for a proxy when direct access fails.
+
+    Args:
+        manual_proxy (str): Manually specified proxy URL
+        test_youtube (bool): Test YouTube accessibility before choosing
+        cache_ttl (float): Seconds to reuse cached accessibility results, 0 to always probe
+
+    Returns:
+        str or None: Proxy URL to use, None for a direct connection
+    """
+    if manual_proxy:
+        return manual_proxy
+
+    proxy_info = detect_proxy()  # Try Chrome first, then Clash
+    proxy_url = proxy_info["url"] if proxy_info else None
 
     # Test YouTube accessibility if no manual proxy specified
-    test_youtube = kwargs.get("test_youtube", True)
-    if test_youtube and not manual_proxy:
+    if test_youtube:
         print("\n[Testing YouTube accessibility...]")
-        test_result = test_youtube_access(proxy_url if proxy_url else None)
+        test_result = test_youtube_access(proxy_url if proxy_url else None, cache_ttl=cache_ttl)
 
         if test_result["accessible"]:
-            print(f"[OK] YouTube accessible: {test_result['proxy_used']}")
+            cached = " (cached)" if test_result.get("cached") else ""
+            print(f"[OK] YouTube accessible: {test_result['proxy_used']}{cached}")
         else:
             print(f"[FAIL] YouTube not accessible: {test_result['status']}")
 
             # Try to find a working proxy if direct access fails
             if not proxy_url:
                 print("\n[Searching for proxy...]")
-                proxy_info = detect_proxy()
+                proxy_info = detect_proxy(use_cache=False)
 
                 if proxy_info:
                     proxy_url = proxy_info["url"]
@@ -238,7 +883,7 @@ def download_video(url, output_dir=".", format_id="bestvideo+bestaudio/best", co
                     print(f"[Proxy] Description: {proxy_info['description']}")
 
                     # Test with proxy
-                    test_result = test_youtube_access(proxy_url)
+                    test_result = test_youtube_access(proxy_url, cache_ttl=cache_ttl)
                     if test_result["accessible"]:
                         print(f"[OK] YouTube accessible via {proxy_info['source']} proxy")
                     else:
@@ -248,44 +893,16 @@ def download_video(url, output_dir=".", format_id="bestvideo+bestaudio/best", co
                     print("[Proxy] No proxy detected (Chrome/Clash not available)")
                     proxy_url = None
 
-    # Add proxy if available
-    if proxy_url:
-        cmd.extend(["--proxy", proxy_url])
-
-    # Additional options
-    if kwargs.get("write_subs"):
-        cmd.append("--write-subs")
-    if kwargs.get("write_auto_subs"):
-        cmd.append("--write-auto-subs")
-    if kwargs.get("sub_lang"):
-        cmd.extend(["--sub-langs", kwargs["sub_lang"]])
-    if kwargs.get("write_description"):
-        cmd.append("--write-description")
-    if kwargs.get("write_info_json"):
-        cmd.append("--write-info-json")
-    if kwargs.get("write_thumbnail"):
-        cmd.append("--write-thumbnail")
-    if kwargs.get("extract_flat"):
-        cmd.append("--extract-flat")
-    if kwargs.get("playlist_start"):
-        cmd.extend(["--playlist-start", str(kwargs["playlist_start"])])
-    if kwargs.get("playlist_end"):
-        cmd.extend(["--playlist-end", str(kwargs["playlist_end"])])
-    if kwargs.get("no_playlists"):
-        cmd.append("--no-playlists")
-    if kwargs.get("verbose"):
-        cmd.append("--verbose")
+    return proxy_url
 
-    # Check if yt-dlp is installed
-    try:
-        subprocess.run(["yt-dlp", "--version"], capture_output=True, check=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        return {
-            "success": False,
-            "error": "yt-dlp is not installed. Please install it with: pip install yt-dlp"
-        }
+def report_existing_files(url, output_dir):
+    """
+    Print files in output_dir that already belong to this video
 
-    # Check for existing video file before downloading
+    Args:
+        url (str): Video URL
+        output_dir (str): Output directory
+    """
     print("\n[Checking for existing files...]")
     try:
         # Extract video ID from URL
@@ -318,59 +935,187 @@ def download_video(url, output_dir=".", format_id="bestvideo+bestaudio/best", co
         print(f"\n[Warning] Could not check for existing files: {e}")
         print()
 
-    # Execute download with automatic fallback
+def build_ytdlp_params(output_dir, format_id, options):
+    """
+    YoutubeDL options equivalent to the command line built by download_video
+
+    Args:
+        output_dir (str): Output directory
+        format_id (str): Video format selector
+        options (dict): download_video keyword options
+
+    Returns:
+        dict: Per-call options for YtdlpEngine.call
+    """
+    params = {"format": format_id, "outtmpl": f"{output_dir}/%(title)s.%(ext)s"}
+    if options.get("write_subs"):
+        params["writesubtitles"] = True
+    if options.get("write_auto_subs"):
+        params["writeautomaticsub"] = True
+    if options.get("sub_lang"):
+        params["subtitleslangs"] = [lang.strip() for lang in options["sub_lang"].split(",") if lang.strip()]
+    if options.get("write_description"):
+        params["writedescription"] = True
+    if options.get("write_info_json"):
+        params["writeinfojson"] = True
+    if options.get("write_thumbnail"):
+        params["writethumbnail"] = True
+    if options.get("extract_flat"):
+        params["extract_flat"] = "in_playlist"
+    if options.get("playlist_start"):
+        params["playliststart"] = int(options["playlist_start"])
+    if options.get("playlist_end"):
+        params["playlistend"] = int(options["playlist_end"])
+    if options.get("no_playlists"):
+        params["noplaylist"] = True
+    if options.get("verbose"):
+        params["verbose"] = True
+    return params
+
+def download_video(url, output_dir=".", format_id="bestvideo+bestaudio/best", cookies_browser=None, **kwargs):
+    """
+    Download video using yt-dlp
+
+    Args:
+        url (str): Video URL
+        output_dir (str): Output directory (default: current directory)
+        format_id (str): Video format selector (default: bestvideo+bestaudio/best)
+        cookies_browser (str): Browser to use for cookies (default: tries 'chrome' if available)
+        **kwargs: Additional yt-dlp options
+            (on_progress: callable receiving progress events, see parse_progress_line)
+
+    Returns:
+        dict: Download result with status and info (stdout/stderr hold the last lines only)
+    """
+    # Ensure output directory exists
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    # Build command
+    cmd = ["yt-dlp", url]
+
+    # Add format
+    cmd.extend(["-f", format_id])
+
+    # Add output directory
+    cmd.extend(["-o", f"{output_dir}/%(title)s.%(ext)s"])
+
+    # Use browser cookies (default to chrome for better YouTube support)
+    if cookies_browser is None:
+        cookies_browser = kwargs.get("cookies_browser", "chrome")
+
+    # Check if cookies_browser is specified and not empty
+    use_cookies = cookies_browser and cookies_browser.strip()
+
+    # Get proxy from multiple sources with priority (batch mode resolves it once up front)
+    if "resolved_proxy" in kwargs:
+        proxy_url = kwargs["resolved_proxy"]
+    else:
+        proxy_url = resolve_proxy(kwargs.get("proxy"), kwargs.get("test_youtube", True),
+                                  kwargs.get("access_cache_ttl", ACCESS_CACHE_TTL))
+
+    # Add proxy if available
+    if proxy_url:
+        cmd.extend(["--proxy", proxy_url])
+
+    # Additional options
+    if kwargs.get("write_subs"):
+        cmd.append("--write-subs")
+    if kwargs.get("write_auto_subs"):
+        cmd.append("--write-auto-subs")
+    if kwargs.get("sub_lang"):
+        cmd.extend(["--sub-langs", kwargs["sub_lang"]])
+    if kwargs.get("write_description"):
+        cmd.append("--write-description")
+    if kwargs.get("write_info_json"):
+        cmd.append("--write-info-json")
+    if kwargs.get("write_thumbnail"):
+        cmd.append("--write-thumbnail")
+    if kwargs.get("extract_flat"):
+        cmd.append("--flat-playlist")
+    if kwargs.get("playlist_start"):
+        cmd.extend(["--playlist-start", str(kwargs["playlist_start"])])
+    if kwargs.get("playlist_end"):
+        cmd.extend(["--playlist-end", str(kwargs["playlist_end"])])
+    if kwargs.get("no_playlists"):
+        cmd.append("--no-playlist")
+    if kwargs.get("verbose"):
+        cmd.append("--verbose")
+
+    # Run in-process when the yt_dlp package is available, otherwise use the executable
+    engine = select_engine(kwargs.get("engine", DEFAULT_ENGINE))
+
+    # Check if yt-dlp is installed (batch mode checks once up front)
+    if engine is None and kwargs.get("check_ytdlp", True) and not is_ytdlp_installed():
+        return {
+            "success": False,
+            "error": "yt-dlp is not installed. Please install it with: pip install yt-dlp"
+        }
+
+    # Check for existing video file before downloading (batch mode reports results only)
+    if not kwargs.get("quiet"):
+        report_existing_files(url, output_dir)
+
+    # Execute download with automatic fallback, streaming progress to on_progress
+    on_progress = kwargs.get("on_progress")
+    cookies_fallback = False
     try:
+        if engine is not None:
+            run = engine.call("download", url, proxy_url, cookies_browser if use_cookies else None,
+                              build_ytdlp_params(output_dir, format_id, kwargs), on_progress)
+            cookies_fallback = run.get("cookies_fallback", False)
+            result = subprocess.CompletedProcess(cmd, 1 if "error" in run else 0, run["stdout"], run["stderr"])
         # First try with cookies if enabled
-        if use_cookies:
+        elif use_cookies:
             cmd_with_cookies = cmd.copy()
             cmd_with_cookies.extend(["--cookies-from-browser", cookies_browser])
 
-            result = subprocess.run(
-                cmd_with_cookies,
-                capture_output=True,
-                text=True,
-                check=False
-            )
+            result = YtdlpRun(cmd_with_cookies).wait(on_progress)
 
             # Check if cookies failed
             if result.returncode != 0 and "Could not copy" in result.stderr and "cookie" in result.stderr.lower():
                 # Fallback: retry without cookies
                 print(f"Warning: Could not use {cookies_browser} cookies. Retrying without cookies...")
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    check=False
-                )
+                cookies_fallback = True
+                result = YtdlpRun(cmd).wait(on_progress)
         else:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=False
-            )
+            result = YtdlpRun(cmd).wait(on_progress)
 
         if result.returncode == 0:
-            return {
+            outcome = {
                 "success": True,
                 "message": "Download completed successfully",
                 "url": url,
                 "output_dir": output_dir
             }
+        elif engine is not None:
+            outcome = {
+                "success": False,
+                "error": f"Download failed: {run['error']}",
+                "stderr": result.stderr,
+                "stdout": result.stdout
+            }
         else:
-            return {
+            outcome = {
                 "success": False,
                 "error": f"Download failed with return code {result.returncode}",
                 "stderr": result.stderr,
                 "stdout": result.stdout
             }
+        if cookies_fallback:
+            outcome["cookies_fallback"] = True
+        if not outcome["success"]:
+            # The network route may have changed; probe again next time
+            invalidate_access_cache(url)
+        else:
+            clear_access_failure(url, proxy_url)
+        return outcome
     except Exception as e:
         return {
             "success": False,
             "error": f"Exception occurred: {str(e)}"
         }
 
-def get_video_info(url, cookies_browser="chrome", proxy=None):
+def get_video_info(url, cookies_browser="chrome", proxy=None, engine=DEFAULT_ENGINE):
     """
     Get video information without downloading
 
@@ -378,15 +1123,30 @@ def get_video_info(url, cookies_browser="chrome", proxy=None):
         url (str): Video URL
         cookies_browser (str): Browser to use for cookies (default: 'chrome')
         proxy (str): Proxy URL (default: uses Chrome proxy if available)
+        engine (str): "auto" (in-process when yt_dlp is importable) or "subprocess" (default)
 
     Returns:
         dict: Video information or error
     """
-    try:
-        # Get proxy if not specified
-        if proxy is None:
-            proxy = detect_proxy()  # Try Chrome first, then Clash
+    # Get proxy if not specified
+    if proxy is None:
+        proxy_info = detect_proxy()  # Try Chrome first, then Clash
+        proxy = proxy_info["url"] if proxy_info else None
+
+    ytdlp_engine = select_engine(engine)
+    if ytdlp_engine is not None:
+        run = ytdlp_engine.call("info", url, proxy, cookies_browser)
+        if "error" in run:
+            return {
+                "success": False,
+                "error": f"Failed to get video info: {run['error']}"
+            }
+        return {
+            "success": True,
+            "info": run["result"]
+        }
 
+    try:
         # Build command
         cmd = ["yt-dlp", "--dump-json"]
         if proxy:
@@ -445,7 +1205,7 @@ def get_video_info(url, cookies_browser="chrome", proxy=None):
             "error": "yt-dlp is not installed. Please install it with: pip install yt-dlp"
         }
 
-def list_formats(url, cookies_browser="chrome", proxy=None):
+def list_formats(url, cookies_browser="chrome", proxy=None, engine=DEFAULT_ENGINE):
     """
     List available formats for a video
 
@@ -453,15 +1213,30 @@ def list_formats(url, cookies_browser="chrome", proxy=None):
         url (str): Video URL
         cookies_browser (str): Browser to use for cookies (default: 'chrome')
         proxy (str): Proxy URL (default: uses Chrome proxy if available)
+        engine (str): "auto" (in-process when yt_dlp is importable) or "subprocess" (default)
 
     Returns:
         dict: Formats list or error
     """
-    try:
-        # Get proxy if not specified
-        if proxy is None:
-            proxy = detect_proxy()  # Try Chrome first, then Clash
+    # Get proxy if not specified
+    if proxy is None:
+        proxy_info = detect_proxy()  # Try Chrome first, then Clash
+        proxy = proxy_info["url"] if proxy_info else None
+
+    ytdlp_engine = select_engine(engine)
+    if ytdlp_engine is not None:
+        run = ytdlp_engine.call("formats", url, proxy, cookies_browser)
+        if "error" in run:
+            return {
+                "success": False,
+                "error": run["stderr"] or run["error"]
+            }
+        return {
+            "success": True,
+            "formats": run["result"]
+        }
 
+    try:
         # Try with cookies first
         cmd = ["yt-dlp", "--list-formats"]
         if proxy:
@@ -505,15 +1280,216 @@ def list_formats(url, cookies_browser="chrome", proxy=None):
             "error": "yt-dlp is not installed. Please install it with: pip install yt-dlp"
         }
 
+def read_url_list(source):
+    """
+    Read video URLs from a list file or stdin
+
+    Blank lines and lines starting with '#' are skipped, duplicates are dropped.
+
+    Args:
+        source (str): Path to a text file with one URL per line, or '-' for stdin
+
+    Returns:
+        list: URLs in file order
+    """
+    if source == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+    urls = []
+    seen = set()
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#") or line in seen:
+            continue
+        seen.add(line)
+        urls.append(line)
+    return urls
+
+def url_host(url):
+    """
+    Host key used for per-host concurrency limits
+
+    youtube.com, www.youtube.com, m.youtube.com and youtu.be share one key.
+
+    Args:
+        url (str): Video URL
+
+    Returns:
+        str: Normalized host name
+    """
+    host = (urllib.parse.urlsplit(url).hostname or "").lower()
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    if host == "youtu.be":
+        host = "youtube.com"
+    return host
+
+def download_batch(urls, output_dir=".", workers=BATCH_WORKERS, per_host=BATCH_PER_HOST, on_result=None, **kwargs):
+    """
+    Download multiple videos in parallel with a bounded worker pool
+
+    Proxy detection, the YouTube check and the yt-dlp installation check run
+    once for the whole batch. Workers take the next queued URL whose host has
+    a free slot, so one busy site never holds up downloads from other sites.
+    If browser cookies fail for one video, the remaining videos skip them.
+
+    Args:
+        urls (list): Video URLs
+        output_dir (str): Output directory (default: current directory)
+        workers (int): Maximum parallel downloads (default: BATCH_WORKERS)
+        per_host (int): Maximum parallel downloads per host (default: BATCH_PER_HOST)
+        on_result (callable): Called with each result dict as soon as it completes
+        **kwargs: Options passed to download_video
+
+    Returns:
+        list: Result dicts (in completion order), each with "url" set
+    """
+    results = []
+    if not urls:
+        return results
+
+    lock = threading.Condition()
+
+    def collect(result):
+        # Serialize callbacks so reports from different workers don't interleave
+        with lock:
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+    if select_engine(kwargs.get("engine", DEFAULT_ENGINE)) is None and not is_ytdlp_installed():
+        for url in urls:
+            collect({
+                "success": False,
+                "url": url,
+                "error": "yt-dlp is not installed. Please install it with: pip install yt-dlp"
+            })
+        return results
+
+    kwargs["resolved_proxy"] = resolve_proxy(kwargs.pop("proxy", None), kwargs.pop("test_youtube", True),
+                                             kwargs.pop("access_cache_ttl", ACCESS_CACHE_TTL))
+    kwargs["check_ytdlp"] = False
+    kwargs["quiet"] = True
+    cookies = {"browser": kwargs.pop("cookies_browser", None)}
+
+    pending = deque(urls)
+    active = {}
+
+    def next_url():
+        # Called with lock held: first queued URL whose host is below its limit
+        for i, url in enumerate(pending):
+            host = url_host(url)
+            if active.get(host, 0) < per_host:
+                del pending[i]
+                active[host] = active.get(host, 0) + 1
+                return url, host
+        return None
+
+    def worker():
+        while True:
+            with lock:
+                job = next_url()
+                while job is None and pending:
+                    lock.wait()
+                    job = next_url()
+                if job is None:
+                    return
+                cookies_browser = cookies["browser"]
+            url, host = job
+            try:
+                result = download_video(url, output_dir, cookies_browser=cookies_browser, **kwargs)
+            except Exception as e:
+                result = {"success": False, "error": f"Exception occurred: {str(e)}"}
+            result.setdefault("url", url)
+            with lock:
+                active[host] -= 1
+                if result.get("cookies_fallback"):
+                    cookies["browser"] = ""
+                lock.notify_all()
+            collect(result)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(workers, len(urls))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
 def main():
     """CLI interface"""
-    if len(sys.argv) < 2:
-        print("Usage: python download_video.py <url> [options]")
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Download videos with yt-dlp",
+        usage="python download_video.py <url> [options]\n"
+              "       python download_video.py --batch <urls.txt|-> [-j N] [--per-host N] [options]",
+    )
+    parser.add_argument("url", nargs="?", help="Video URL")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Download every URL in FILE (one per line, '-' reads stdin)")
+    parser.add_argument("-o", "--output-dir", default=".", help="Output directory (default: current directory)")
+    parser.add_argument("-j", "--jobs", type=int, default=BATCH_WORKERS,
+                        help=f"Parallel downloads in batch mode (default: {BATCH_WORKERS})")
+    parser.add_argument("--per-host", type=int, default=BATCH_PER_HOST,
+                        help=f"Parallel downloads per host in batch mode (default: {BATCH_PER_HOST})")
+    parser.add_argument("--proxy", help="Proxy URL (default: auto-detect Chrome/Clash)")
+    parser.add_argument("--access-cache-ttl", type=float, default=ACCESS_CACHE_TTL, metavar="SECONDS",
+                        help=f"Reuse YouTube accessibility results for this long (default: {ACCESS_CACHE_TTL}, 0 disables)")
+    parser.add_argument("--engine", choices=ENGINES, default=CLI_ENGINE,
+                        help="auto: run yt-dlp in-process when the yt_dlp package is installed; "
+                             f"subprocess: always run the yt-dlp executable (default: {CLI_ENGINE})")
+    parser.add_argument("--cookies-browser", default=None,
+                        help="Browser to read cookies from (default: chrome, '' disables)")
+    args = parser.parse_args()
+
+    options = {"access_cache_ttl": args.access_cache_ttl, "engine": args.engine}
+    if args.proxy:
+        options["proxy"] = args.proxy
+    if args.cookies_browser is not None:
+        options["cookies_browser"] = args.cookies_browser
+
+    if args.batch:
+        if args.url:
+            parser.error("give either a URL or --batch, not both")
+        if args.jobs < 1 or args.per_host < 1:
+            parser.error("--jobs and --per-host must be at least 1")
+        try:
+            urls = read_url_list(args.batch)
+        except OSError as e:
+            print(f"✗ Cannot read URL list: {e}")
+            sys.exit(1)
+        if not urls:
+            print("✗ No URLs to download")
+            sys.exit(1)
+
+        done = [0]
+
+        def report(result):
+            done[0] += 1
+            if result["success"]:
+                print(f"[{done[0]}/{len(urls)}] ✓ {result['url']}", flush=True)
+            else:
+                print(f"[{done[0]}/{len(urls)}] ✗ {result['url']}: {result['error']}", flush=True)
+
+        print(f"[Batch] {len(urls)} URL(s), {args.jobs} parallel, {args.per_host} per host")
+        results = download_batch(urls, args.output_dir, workers=args.jobs, per_host=args.per_host,
+                                 on_result=report, **options)
+        failed = sum(1 for r in results if not r["success"])
+        print(f"\n[Batch] {len(results) - failed} succeeded, {failed} failed")
+        if failed:
+            sys.exit(1)
+        return
+
+    if not args.url:
+        parser.print_usage()
         print("Example: python download_video.py https://youtube.com/watch?v=xxx")
         sys.exit(1)
 
-    url = sys.argv[1]
-    result = download_video(url)
+    result = download_video(args.url, args.output_dir, on_progress=print_progress, **options)
 
     if result["success"]:
         print(f"✓ Download completed: {result['message']}")